@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Instagram Analysis State
+Persists per-account aggregates in SQLite so reports can be refreshed incrementally
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from comment_analytics import TOP_COMMENTERS
+from engagement_trends import SUM_COLUMNS, EngagementTrends
+from instagram_io import DEFAULT_BATCH_SIZE, iter_batches
+from instagram_report import TREND_WEEKS
+from instagram_writers import SQLITE_PRAGMAS
+
+# Bumped whenever the state tables change shape; older state files are rebuilt from the dumps
+STATE_VERSION = 2
+
+CAPTION_BUCKETS = [0, 500, 1000, 2000, 5000]
+CAPTION_BUCKET_LABELS = ['Short', 'Medium', 'Long', 'Very Long']
+
+# Aggregate dimension -> post record column it groups by
+DIMENSIONS = {
+    'hour': 'hour',
+    'day_of_week': 'day_of_week',
+    'month': 'month',
+    'type': 'type',
+    'language': 'language',
+    'caption_bucket': 'caption_bucket',
+    'hashtag': 'hashtags',
+    # One entry per comment, so post_count is the commenter's comment count
+    'commenter': 'commenters',
+}
+# Dimensions whose record column holds a JSON list of keys
+LIST_DIMENSIONS = ['hashtag', 'commenter']
+
+# Raw post fields a post's contribution depends on; other fields (CDN urls and the like)
+# change between scrapes without changing the aggregates
+FINGERPRINT_FIELDS = ['id', 'type', 'timestamp', 'likesCount', 'commentsCount', 'caption', 'hashtags']
+FINGERPRINT_COMMENT_FIELDS = ['id', 'ownerUsername', 'text']
+
+# Post record columns that define a post's contribution to the aggregates
+RECORD_COLUMNS = [
+    'post_id', 'timestamp', 'type', 'likes', 'comments', 'engagement', 'hour', 'day_of_week',
+    'month', 'caption_length', 'caption_bucket', 'language', 'is_carousel', 'hashtags',
+    'question_count', 'complaint_count', 'commenters', 'caption_preview'
+]
+
+STATE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS state_posts (
+        account TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        fingerprint INTEGER NOT NULL,
+        timestamp TEXT,
+        type TEXT,
+        likes INTEGER,
+        comments INTEGER,
+        engagement INTEGER,
+        hour INTEGER,
+        day_of_week TEXT,
+        month TEXT,
+        caption_length INTEGER,
+        caption_bucket TEXT,
+        language TEXT,
+        is_carousel INTEGER,
+        hashtags TEXT,
+        question_count INTEGER,
+        complaint_count INTEGER,
+        commenters TEXT,
+        caption_preview TEXT,
+        PRIMARY KEY (account, post_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_state_posts_engagement ON state_posts(account, engagement)',
+    'CREATE INDEX IF NOT EXISTS idx_state_posts_caption_length ON state_posts(account, caption_length)',
+    '''
+    CREATE TABLE IF NOT EXISTS state_aggregates (
+        account TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        key TEXT NOT NULL,
+        post_count INTEGER NOT NULL,
+        engagement_sum INTEGER NOT NULL,
+        PRIMARY KEY (account, dimension, key)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS state_totals (
+        account TEXT PRIMARY KEY,
+        posts INTEGER NOT NULL,
+        likes INTEGER NOT NULL,
+        comments INTEGER NOT NULL,
+        engagement INTEGER NOT NULL,
+        caption_length_sum INTEGER NOT NULL,
+        captioned_posts INTEGER NOT NULL,
+        carousel_count INTEGER NOT NULL,
+        carousel_engagement INTEGER NOT NULL,
+        posts_with_comments INTEGER NOT NULL,
+        question_count INTEGER NOT NULL,
+        complaint_count INTEGER NOT NULL,
+        min_timestamp TEXT,
+        max_timestamp TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS state_daily (
+        account TEXT NOT NULL,
+        date TEXT NOT NULL,
+        posts INTEGER NOT NULL,
+        likes INTEGER NOT NULL,
+        comments INTEGER NOT NULL,
+        engagement INTEGER NOT NULL,
+        PRIMARY KEY (account, date)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS state_comments (
+        account TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        comment_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        text TEXT,
+        PRIMARY KEY (account, kind, comment_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_state_comments_post ON state_comments(account, post_id)',
+]
+
+TOTAL_COLUMNS = [
+    'posts', 'likes', 'comments', 'engagement', 'caption_length_sum', 'captioned_posts',
+    'carousel_count', 'carousel_engagement', 'posts_with_comments', 'question_count', 'complaint_count'
+]
+
+UPSERT_AGGREGATE_SQL = '''
+    INSERT INTO state_aggregates (account, dimension, key, post_count, engagement_sum)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(account, dimension, key) DO UPDATE SET
+        post_count = post_count + excluded.post_count,
+        engagement_sum = engagement_sum + excluded.engagement_sum
+'''
+
+UPSERT_TOTALS_SQL = f'''
+    INSERT INTO state_totals (account, {', '.join(TOTAL_COLUMNS)}, min_timestamp, max_timestamp)
+    VALUES (?, {', '.join('?' for _ in TOTAL_COLUMNS)}, ?, ?)
+    ON CONFLICT(account) DO UPDATE SET
+        {', '.join(f'{column} = {column} + excluded.{column}' for column in TOTAL_COLUMNS)},
+        min_timestamp = MIN(COALESCE(min_timestamp, excluded.min_timestamp),
+                            COALESCE(excluded.min_timestamp, min_timestamp)),
+        max_timestamp = MAX(COALESCE(max_timestamp, excluded.max_timestamp),
+                            COALESCE(excluded.max_timestamp, max_timestamp))
+'''
+
+UPSERT_DAILY_SQL = f'''
+    INSERT INTO state_daily (account, date, {', '.join(SUM_COLUMNS)})
+    VALUES (?, ?, {', '.join('?' for _ in SUM_COLUMNS)})
+    ON CONFLICT(account, date) DO UPDATE SET
+        {', '.join(f'{column} = {column} + excluded.{column}' for column in SUM_COLUMNS)}
+'''
+
+
+def post_fingerprint(post):
+    """Stable 64-bit hash of the raw fields that feed a post's contribution"""
+    fields = {field: post.get(field) for field in FINGERPRINT_FIELDS}
+    fields['childPosts'] = len(post.get('childPosts') or [])
+    fields['latestComments'] = [[comment.get(field) for field in FINGERPRINT_COMMENT_FIELDS]
+                                for comment in post.get('latestComments') or []]
+    digest = hashlib.blake2b(json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def post_records(analyzer):
+    """Build one contribution record per post from the analyzer's derived features.
+
+    The analyzer only needs to hold the posts being merged, not the whole dump.
+    """
+    df = analyzer.ensure_features('engagement', 'timestamp', 'hour', 'day_of_week', 'month',
+                                  'caption_length', 'language', 'is_carousel')
+    tag_lists = [[] for _ in range(len(df))]
+    for post_row, tag in zip(analyzer.hashtags['post'].tolist(), analyzer.hashtags['hashtag'].tolist()):
+        tag_lists[post_row].append(tag)
+    comments = analyzer.comments
+    comment_posts = comments['post'].to_numpy()
+    question_counts = np.bincount(comment_posts[comments['is_question'].to_numpy()], minlength=len(df))
+    # The account's own replies are not complaints
+    owners = comments['ownerUsername'].astype(object)
+    from_audience = (owners != analyzer.account_name).to_numpy()
+    complaint_counts = np.bincount(comment_posts[comments['is_complaint'].to_numpy() & from_audience],
+                                   minlength=len(df))
+    commenter_lists = [[] for _ in range(len(df))]
+    for post_row, owner in zip(comment_posts.tolist(), owners.tolist()):
+        if isinstance(owner, str):
+            commenter_lists[post_row].append(owner)
+    timestamps = df['timestamp']
+    if getattr(timestamps.dt, 'tz', None) is not None:
+        timestamps = timestamps.dt.tz_convert('UTC')
+
+    records = pd.DataFrame({
+        'post_id': df['id'].astype(str),
+        'timestamp': timestamps.dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'type': df['type'],
+        'likes': df['likesCount'].fillna(0).astype('int64'),
+        'comments': df['commentsCount'].fillna(0).astype('int64'),
+        'engagement': df['engagement'].fillna(0).astype('int64'),
+        'hour': df['hour'].astype('Int64'),
+        'day_of_week': df['day_of_week'],
+        'month': df['month'],
+        'caption_length': df['caption_length'].astype('Int64'),
+        'caption_bucket': pd.cut(df['caption_length'], bins=CAPTION_BUCKETS,
+                                 labels=CAPTION_BUCKET_LABELS).astype(object),
+        'language': df['language'],
+        'is_carousel': df['is_carousel'].astype('int64'),
+        'hashtags': [json.dumps(tags, ensure_ascii=False) for tags in tag_lists],
+        'question_count': question_counts.astype('int64'),
+        'complaint_count': complaint_counts.astype('int64'),
+        'commenters': [json.dumps(owners, ensure_ascii=False) for owners in commenter_lists],
+        'caption_preview': df['caption'].str.slice(0, 101),
+    })
+    return records
+
+
+class AnalysisState:
+    """Per-account aggregate state persisted in SQLite.
+
+    merge() folds new or changed posts into running sums and counts (per
+    hour, day, month, type, language, caption-length bucket, hashtag and
+    commenter, plus daily totals for the weekly trend), subtracting the
+    previous contribution of changed posts. sections() returns the same
+    structures as InstagramAnalyzer.compute_sections(), built from those
+    aggregates, so refresh cost follows the size of the change rather than
+    the account history.
+    """
+
+    def __init__(self, db_file, account):
+        self.db_file = db_file
+        self.account = account
+        self.conn = sqlite3.connect(db_file, isolation_level=None)
+        for pragma in SQLITE_PRAGMAS:
+            self.conn.execute(pragma)
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != STATE_VERSION:
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'state_posts'").fetchone():
+                self.conn.close()
+                raise ValueError(f"{db_file} holds analysis state of an older version; "
+                                 f"remove it and merge the dumps again")
+            self.conn.execute(f'PRAGMA user_version = {STATE_VERSION}')
+        for statement in STATE_SCHEMA:
+            self.conn.execute(statement)
+
+    def close(self):
+        self.conn.close()
+
+    def _stored(self, columns, post_ids):
+        """Stored record columns for the given post ids, read through a temp table join"""
+        conn = self.conn
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS incoming_posts (post_id TEXT PRIMARY KEY)')
+        conn.execute('DELETE FROM incoming_posts')
+        conn.executemany('INSERT OR IGNORE INTO incoming_posts VALUES (?)', ((pid,) for pid in post_ids))
+        return pd.read_sql_query(
+            f'SELECT {columns} FROM state_posts s JOIN incoming_posts i ON s.post_id = i.post_id WHERE s.account = ?',
+            conn, params=(self.account,)
+        )
+
+    def merge(self, posts, batch_size=DEFAULT_BATCH_SIZE):
+        """Fold raw posts (e.g. iter_posts(dump)) into the stored state; return new/changed/unchanged counts.
+
+        Posts are checked against their stored fingerprints one batch at a
+        time, and only new and changed posts are loaded into an analyzer, so
+        an unchanged post costs one hash and one indexed lookup.
+        """
+        from analyze_instagram import InstagramAnalyzer
+
+        conn = self.conn
+        conn.execute('BEGIN')
+        try:
+            pending, fingerprints, changed_ids = [], [], []
+            seen = set()
+            unchanged = 0
+            for batch in iter_batches(posts, batch_size):
+                # The first copy of a post wins, as in the other writers
+                incoming = {}
+                for post in batch:
+                    post_id = str(post.get('id'))
+                    if post_id not in seen:
+                        seen.add(post_id)
+                        incoming[post_id] = post
+                stored = self._stored('s.post_id, s.fingerprint', incoming)
+                previous = dict(zip(stored['post_id'], stored['fingerprint'].tolist()))
+                for post_id, post in incoming.items():
+                    fingerprint = post_fingerprint(post)
+                    if previous.get(post_id) == fingerprint:
+                        unchanged += 1
+                        continue
+                    if post_id in previous:
+                        changed_ids.append(post_id)
+                    pending.append(post)
+                    fingerprints.append(fingerprint)
+
+            if pending:
+                analyzer = InstagramAnalyzer(posts=pending)
+                records = post_records(analyzer)
+                records['fingerprint'] = fingerprints
+                old = self._stored('s.*', changed_ids).astype({'hour': 'Int64', 'caption_length': 'Int64'})
+                # Old contributions of changed posts are subtracted, new ones added
+                self._apply_deltas(pd.concat([records.assign(sign=1), old.assign(sign=-1)], ignore_index=True))
+                self._store_records(records)
+                self._store_comments(analyzer, records['post_id'].tolist())
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        return {
+            'new': len(pending) - len(changed_ids),
+            'changed': len(changed_ids),
+            'unchanged': unchanged,
+        }
+
+    def _apply_deltas(self, deltas):
+        deltas = deltas.copy()
+        deltas['weighted'] = deltas['engagement'] * deltas['sign']
+        for dimension in LIST_DIMENSIONS:
+            column = DIMENSIONS[dimension]
+            deltas[column] = deltas[column].map(json.loads)
+
+        rows = []
+        for dimension, column in DIMENSIONS.items():
+            frame = deltas[[column, 'sign', 'weighted']]
+            if dimension in LIST_DIMENSIONS:
+                frame = frame.explode(column)
+            grouped = frame.dropna(subset=[column]).groupby(column, sort=False)[['sign', 'weighted']].sum()
+            rows.extend(
+                (self.account, dimension, str(key), int(count), int(engagement))
+                for key, count, engagement in grouped.itertuples()
+            )
+        self.conn.executemany(UPSERT_AGGREGATE_SQL, rows)
+        self.conn.execute('DELETE FROM state_aggregates WHERE account = ? AND post_count <= 0', (self.account,))
+
+        sign = deltas['sign']
+        has_caption = deltas['caption_length'].notna()
+        is_carousel = deltas['is_carousel'].astype(bool)
+        totals = [
+            int(sign.sum()),
+            int((deltas['likes'] * sign).sum()),
+            int((deltas['comments'] * sign).sum()),
+            int(deltas['weighted'].sum()),
+            int((deltas['caption_length'].fillna(0) * sign).sum()),
+            int(sign[has_caption].sum()),
+            int(sign[is_carousel].sum()),
+            int(deltas.loc[is_carousel, 'weighted'].sum()),
+            int(sign[deltas['comments'] > 0].sum()),
+            int((deltas['question_count'] * sign).sum()),
+            int((deltas['complaint_count'] * sign).sum()),
+        ]
+        added = deltas.loc[sign > 0, 'timestamp'].dropna()
+        self.conn.execute(UPSERT_TOTALS_SQL, [self.account, *totals,
+                                              added.min() if len(added) else None,
+                                              added.max() if len(added) else None])
+
+        # Daily sums in the shape EngagementTrends keeps (UTC days)
+        dated = deltas.dropna(subset=['timestamp'])
+        likes = dated['likes'] * dated['sign']
+        comments = dated['comments'] * dated['sign']
+        daily = pd.DataFrame({
+            'date': dated['timestamp'].str.slice(0, 10),
+            'posts': dated['sign'],
+            'likes': likes,
+            'comments': comments,
+            'engagement': likes + comments,
+        }).groupby('date', sort=False)[SUM_COLUMNS].sum()
+        self.conn.executemany(UPSERT_DAILY_SQL, (
+            (self.account, date, *(int(value) for value in values)) for date, *values in daily.itertuples()
+        ))
+        self.conn.execute('DELETE FROM state_daily WHERE account = ? AND posts <= 0', (self.account,))
+
+    def _store_records(self, records):
+        columns = ['fingerprint'] + RECORD_COLUMNS
+        # Series.tolist() yields Python scalars, which sqlite3 can bind
+        values = [[None if pd.isna(value) else value for value in records[column].tolist()]
+                  for column in columns]
+        rows = ((self.account, *row) for row in zip(*values))
+        self.conn.executemany(
+            f'''INSERT OR REPLACE INTO state_posts (account, {', '.join(columns)})
+                VALUES (?, {', '.join('?' for _ in columns)})''',
+            rows
+        )
+
+    def _store_comments(self, analyzer, post_ids):
+        """Replace the stored question and complaint comments of the merged posts"""
+        self.conn.executemany('DELETE FROM state_comments WHERE account = ? AND post_id = ?',
+                              ((self.account, post_id) for post_id in post_ids))
+        comments = analyzer.comments
+        positions = comments.groupby('post').cumcount().tolist()
+        rows = []
+        for post_row, position, comment_id, owner, text, question, complaint in zip(
+                comments['post'].tolist(), positions, comments['id'].tolist(),
+                comments['ownerUsername'].astype(object).tolist(), comments['text'].tolist(),
+                comments['is_question'].tolist(), comments['is_complaint'].tolist()):
+            post_id = post_ids[post_row]
+            comment_id = comment_id if isinstance(comment_id, str) and comment_id else f"{post_id}:{position}"
+            if question:
+                rows.append((self.account, 'question', comment_id, post_id, text))
+            # The account's own replies are not complaints
+            if complaint and owner != analyzer.account_name:
+                rows.append((self.account, 'complaint', comment_id, post_id, text))
+        self.conn.executemany('INSERT OR IGNORE INTO state_comments VALUES (?, ?, ?, ?, ?)', rows)
+
+    def _comment_texts(self, kind, limit=5):
+        return [text for (text,) in self.conn.execute(
+            'SELECT text FROM state_comments WHERE account = ? AND kind = ? ORDER BY rowid LIMIT ?',
+            (self.account, kind, limit)
+        )]
+
+    def _weekly_trend(self):
+        daily = pd.read_sql_query(
+            f"SELECT date, {', '.join(SUM_COLUMNS)} FROM state_daily WHERE account = ? ORDER BY date",
+            self.conn, params=(self.account,)
+        )
+        index = pd.MultiIndex.from_arrays([[self.account] * len(daily), pd.to_datetime(daily['date'], utc=True)],
+                                          names=['account', 'date'])
+        trends = EngagementTrends(daily[SUM_COLUMNS].set_axis(index)) if len(daily) else EngagementTrends()
+        return trends.week_over_week().reset_index('account', drop=True).tail(TREND_WEEKS)
+
+    def _dimension(self, dimension):
+        """Stored (key, post_count, engagement_sum) rows of one dimension in first-seen order"""
+        return self.conn.execute(
+            'SELECT key, post_count, engagement_sum FROM state_aggregates '
+            'WHERE account = ? AND dimension = ? ORDER BY rowid',
+            (self.account, dimension)
+        ).fetchall()
+
+    def _top_posts(self, order, limit=5):
+        return pd.read_sql_query(
+            f'''SELECT caption_preview AS caption, engagement, likes AS likesCount,
+                       comments AS commentsCount, timestamp
+                FROM state_posts WHERE account = ? ORDER BY engagement {order} LIMIT ?''',
+            self.conn, params=(self.account, limit)
+        )
+
+    def sections(self, min_usage=1):
+        """Report sections computed from the stored aggregates"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(TOTAL_COLUMNS)}, min_timestamp, max_timestamp FROM state_totals WHERE account = ?",
+            (self.account,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"No stored state for @{self.account} in {self.db_file}")
+        totals = dict(zip(TOTAL_COLUMNS + ['min_timestamp', 'max_timestamp'], row))
+        posts = totals['posts']
+
+        def mean(total, count):
+            return total / count if count else math.nan
+
+        # Engagement
+        engagement = {
+            'total_posts': posts,
+            'total_likes': totals['likes'],
+            'total_comments': totals['comments'],
+            'avg_likes': round(mean(totals['likes'], posts), 2),
+            'avg_comments': round(mean(totals['comments'], posts), 2),
+            'avg_engagement': round(mean(totals['engagement'], posts), 2),
+            'top_posts': self._top_posts('DESC'),
+            'worst_posts': self._top_posts('ASC'),
+        }
+
+        # Content types
+        types = sorted(self._dimension('type'), key=lambda item: item[1], reverse=True)
+        carousel_count = totals['carousel_count']
+        content = {
+            'types': {key: count for key, count, _ in types},
+            'carousel_count': carousel_count,
+            'carousel_avg_engagement': round(totals['carousel_engagement'] / carousel_count, 2) if carousel_count else 0,
+        }
+
+        # Hashtags (rowid order keeps first-use order for ties)
+        tags = self._dimension('hashtag')
+        top_used = sorted(tags, key=lambda item: item[1], reverse=True)[:15]
+        performing = [(key, round(total / count, 2)) for key, count, total in tags if count >= min_usage]
+        hashtags = {
+            'total_unique': len(tags),
+            'top_used': [(key, count) for key, count, _ in top_used],
+            'top_performing': sorted(performing, key=lambda item: item[1], reverse=True)[:10],
+            'stats': pd.DataFrame(
+                [(key, count, mean(total, count), total) for key, count, total in tags],
+                columns=['hashtag', 'count', 'avg_engagement', 'total_engagement']
+            ).set_index('hashtag'),
+        }
+
+        # Posting patterns
+        if totals['min_timestamp'] and totals['max_timestamp']:
+            date_range = (pd.Timestamp(totals['max_timestamp']) - pd.Timestamp(totals['min_timestamp'])).days
+        else:
+            date_range = 0
+        hours = pd.DataFrame(
+            [(int(key), mean(total, count), count) for key, count, total in self._dimension('hour')],
+            columns=['hour', 'mean', 'count']
+        ).set_index('hour').sort_index()
+        days = pd.Series({key: mean(total, count) for key, count, total in self._dimension('day_of_week')},
+                         dtype=float).sort_index().sort_values(ascending=False)
+        months = pd.Series({key: count for key, count, _ in self._dimension('month')},
+                           dtype='int64').sort_values(ascending=False, kind='stable')
+        patterns = {
+            'date_range_days': date_range,
+            'posts_per_week': round(posts / (date_range / 7), 2) if date_range > 0 else 0,
+            'best_hours': hours.nlargest(5, 'mean'),
+            'best_days': days.head(),
+            'posting_by_month': months,
+            'weekly_trend': self._weekly_trend(),
+        }
+
+        # Captions
+        min_length, max_length = self.conn.execute(
+            'SELECT MIN(caption_length), MAX(caption_length) FROM state_posts WHERE account = ?',
+            (self.account,)
+        ).fetchone()
+        buckets = {key: mean(total, count) for key, count, total in self._dimension('caption_bucket')}
+        languages = sorted(self._dimension('language'), key=lambda item: item[1], reverse=True)
+        captions = {
+            'avg_length': round(mean(totals['caption_length_sum'], totals['captioned_posts']), 0),
+            'max_length': max_length,
+            'min_length': min_length,
+            'language_distribution': {key: count for key, count, _ in languages},
+            'length_vs_engagement': {label: buckets.get(label, math.nan) for label in CAPTION_BUCKET_LABELS},
+        }
+
+        # Comments (the account's own comments are left out of the commenters)
+        commenters = [(key, count) for key, count, _ in self._dimension('commenter') if key != self.account]
+        comments = {
+            'total_comments': totals['comments'],
+            'posts_with_comments': totals['posts_with_comments'],
+            'comment_rate': round(mean(totals['posts_with_comments'], posts) * 100, 2),
+            'sample_questions': self._comment_texts('question'),
+            'total_questions': totals['question_count'],
+            'sample_complaints': self._comment_texts('complaint'),
+            'total_complaints': totals['complaint_count'],
+            'unique_commenters': len(commenters),
+            'top_commenters': sorted(commenters, key=lambda item: item[1], reverse=True)[:TOP_COMMENTERS],
+        }
+
+        return {
+            'engagement': engagement,
+            'content': content,
+            'hashtags': hashtags,
+            'patterns': patterns,
+            'captions': captions,
+            'comments': comments,
+        }
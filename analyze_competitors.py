@@ -4,175 +4,592 @@
 и сохранения их в структурированный MD файл
 """
 
+import hashlib
 import json
+import os
 import re
+import sys
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator
 
+from competitor_cache import DEFAULT_CACHE_BYTES, DuplicateIndex, ExtractionCache, text_fingerprint
+from instagram_io import iter_batches, iter_posts
+
+# Размер части отчета в символах; новая часть начинается на границе раздела
+PART_SIZE = 10000
+# Результатов в одной задаче пула и задач в работе на процесс
+EXTRACT_CHUNK_SIZE = 64
+PENDING_PER_WORKER = 4
+# Версия формата extract_result; при изменении формата записи кэша устаревают
+EXTRACT_VERSION = 3
+
+# Категории контентной стратегии: категория -> {метка: регулярное выражение}.
+# Новые темы и промо-механики добавляются здесь или во внешнем JSON файле
+# (см. load_category_definitions) без изменения кода. Паттерны пишутся
+# в нижнем регистре и без захватывающих групп.
+CATEGORY_DEFINITIONS = {
+    'content_types': {
+        'Видео контент': r'видео|video|reel|сторис|stories',
+        'Фото контент': r'карусель|carousel|фото|photo',
+        'Инфографика': r'инфографик|infographic',
+    },
+    'key_themes': {
+        'Рецепты': r'рецепт|recipe|готов|cook',
+        'Советы по уходу': r'совет|advice|tip|рекоменд',
+        'Развитие ребенка': r'развитие|development|рост|growth',
+    },
+    'ugc_mentions': {
+        'UGC': r'ugc|пользовательский контент|отзыв',
+    },
+    'promo_mechanics': {
+        'Конкурсы и розыгрыши': r'конкурс|contest|giveaway|розыгрыш',
+        'Скидки и промо': r'скидк|discount|промо|promo',
+    },
+}
+
+# Извлекаемые значения: имя -> регулярное выражение (значение в первой сработавшей группе)
+EXTRACTOR_PATTERNS = {
+    'instagram': r'@([A-Za-z0-9_.]+)|instagram\.com/([A-Za-z0-9_.]+)',
+    'telegram': r't\.me/([A-Za-z0-9_]+)|@([A-Za-z0-9_]+)',
+    'influencer': r'(?:блогер|blogger|influencer|амбассадор)\s+([А-Яа-я\s]+)',
+}
+
+
+# Метрики в разделах отчета: ключ extract_key_metrics -> подпись
+REPORT_METRICS = [
+    ('followers', 'Подписчики'),
+    ('posts_count', 'Публикации'),
+    ('likes', 'Лайки'),
+    ('engagement_rate', 'ER, %'),
+]
+# Числовые метрики: метрика -> паттерн подписи (в нижнем регистре, без захватывающих групп).
+# Число может стоять перед подписью ("45K подписчиков") или после нее ("Followers: 45K").
+METRIC_LABELS = {
+    'followers': r'подписчик\w*|фолловер\w*|followers?|subscribers?',
+    'posts': r'публикаци\w*|пост(?:ов|а)?|posts?',
+    'likes': r'лайк\w*|likes?',
+}
+ENGAGEMENT_LABEL = r'er|engagement(?:\s+rate)?|вовлеч[её]нност\w*'
+METRIC_COLUMNS = list(METRIC_LABELS) + ['engagement_rate']
+# Множители: суффикс (без точки, в нижнем регистре) -> множитель; латиница и кириллица отдельно
+SUFFIX_FACTORS = {
+    'k': 1e3, 'к': 1e3, 'тыс': 1e3, 'тысяча': 1e3, 'тысячи': 1e3, 'тысяч': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'м': 1e6, 'млн': 1e6, 'миллион': 1e6, 'миллиона': 1e6, 'миллионов': 1e6,
+    'mln': 1e6, 'million': 1e6,
+    'b': 1e9, 'bn': 1e9, 'млрд': 1e9, 'миллиард': 1e9, 'миллиарда': 1e9, 'миллиардов': 1e9, 'billion': 1e9,
+}
+# Число с разделителями тысяч (пробел, неразрывный пробел, запятая, точка) или десятичной частью.
+# Выражение начинается с цифры, поэтому поиск быстро пропускает текст без чисел.
+NUMBER_PATTERN = r'\d(?<![\d.,]\d)(?:\d{0,2}(?:[ \u00a0\u202f.,]\d{3})+(?:[.,]\d+)?|\d*(?:[.,]\d+)?)'
+SUFFIX_PATTERN = (r'(?:тысяч[аи]?|тыс|миллион(?:а|ов)?|млн|миллиард(?:а|ов)?|млрд'
+                  r'|thousand|million|billion|mln|bn|[kкmмb])\.?(?![^\W\d_])')
+THOUSANDS_REGEX = re.compile(r'\d{1,3}(?:[.,]\d{3})+')
+# Сколько символов перед числом просматривается в поисках подписи ("Followers: 1.2M", "ER 3.5%")
+LABEL_LOOKBEHIND = 40
+
+
+def build_metric_patterns(labels: Dict[str, str]) -> tuple:
+    """(число с суффиксом и подписью после него, подпись перед числом - ищется в конце окна).
+
+    Подпись перед числом может отделяться двоеточием или тире ("Followers: 45K")
+    или только пробелом ("публикаций 1 234").
+    """
+    label = '|'.join(labels.values())
+    number = (rf'(?P<number>{NUMBER_PATTERN})\s*'
+              rf'(?:(?P<percent>%)(?:\s*(?P<rate_label>{ENGAGEMENT_LABEL})\b)?'
+              rf'|(?P<suffix>{SUFFIX_PATTERN})?(?:\s*\+?\s*(?P<label>{label})\b)?)')
+    before = (rf'\b(?:(?P<label>{label})\s*[:\-–—]?'
+              rf'|(?P<rate_label>{ENGAGEMENT_LABEL})\s*(?:[:\-–—=]|составляет|of)?)\s*$')
+    return number, before
+
+
+def parse_number(number: str, suffix: str = '') -> float:
+    """Число из текста с учетом разделителей и суффикса K/тыс/М/млн (латиница и кириллица)"""
+    factor = SUFFIX_FACTORS[suffix.lower().rstrip('.')] if suffix else 1
+    digits = re.sub(r'[\s\u00a0\u202f]', '', number)
+    # Запятая или точка перед группами ровно из трех цифр без множителя - разделитель тысяч
+    if factor == 1 and THOUSANDS_REGEX.fullmatch(digits):
+        digits = re.sub(r'[.,]', '', digits)
+    else:
+        digits = digits.replace(',', '.')
+        if digits.count('.') > 1:
+            whole, fraction = digits.rsplit('.', 1)
+            digits = whole.replace('.', '') + '.' + fraction
+    return float(digits) * factor
+
+
+def load_category_definitions(path: str) -> Dict[str, Dict[str, str]]:
+    """Загружает определения категорий из JSON файла {категория: {метка: паттерн}}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TextScanner:
+    """Сканер текста с заранее скомпилированными паттернами.
+
+    Все паттерны категорий объединены в одно регулярное выражение, которое
+    проходит по тексту (в нижнем регистре) один раз; найденные слова
+    сопоставляются с метками через кэш, общий для всех документов.
+    Извлекаемые значения ищутся отдельными скомпилированными выражениями,
+    которые останавливаются на первом совпадении.
+    """
+
+    def __init__(self, categories: Dict[str, Dict[str, str]] = None):
+        self.categories = categories or CATEGORY_DEFINITIONS
+        self.label_patterns = [
+            (category, label, re.compile(pattern))
+            for category, labels in self.categories.items()
+            for label, pattern in labels.items()
+        ]
+        self.keyword_regex = re.compile('|'.join(
+            f'(?:{pattern})' for labels in self.categories.values() for pattern in labels.values()
+        ))
+        self.extractors = {name: re.compile(pattern, re.IGNORECASE)
+                           for name, pattern in EXTRACTOR_PATTERNS.items()}
+        self.token_labels = {}
+        number, before = build_metric_patterns(METRIC_LABELS)
+        self.metric_regex = re.compile(number, re.IGNORECASE)
+        self.label_before_regex = re.compile(before, re.IGNORECASE)
+        self.metric_labels = [(metric, re.compile(pattern)) for metric, pattern in METRIC_LABELS.items()]
+        self.label_metrics = {}
+        # Отпечаток настроек извлечения: с другими категориями или паттернами кэш не используется
+        settings = [EXTRACT_VERSION, self.categories, EXTRACTOR_PATTERNS, METRIC_LABELS, ENGAGEMENT_LABEL]
+        self.version = hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def from_json(cls, path: str) -> 'TextScanner':
+        """Создает сканер с категориями из JSON файла"""
+        return cls(load_category_definitions(path))
+
+    def _labels_for(self, token: str) -> List[tuple]:
+        """Метки, паттерн которых целиком совпадает с найденным словом"""
+        labels = self.token_labels.get(token)
+        if labels is None:
+            labels = [(category, label) for category, label, pattern in self.label_patterns
+                      if pattern.fullmatch(token)]
+            self.token_labels[token] = labels
+        return labels
+
+    def _metric_for(self, label: str) -> str:
+        """Метрика, паттерн подписи которой целиком совпадает с найденной подписью"""
+        label = label.lower()
+        metric = self.label_metrics.get(label)
+        if metric is None:
+            metric = next((name for name, pattern in self.metric_labels if pattern.fullmatch(label)), '')
+            self.label_metrics[label] = metric
+        return metric
+
+    def iter_metrics(self, text: str) -> Iterator[tuple]:
+        """Все найденные метрики текста: (метрика, значение); ER в процентах"""
+        for match in self.metric_regex.finditer(text):
+            number, percent, rate_label, suffix, label = match.group(
+                'number', 'percent', 'rate_label', 'suffix', 'label')
+            if not (label or rate_label):
+                before = self.label_before_regex.search(text, max(0, match.start() - LABEL_LOOKBEHIND),
+                                                        match.start())
+                if before is None:
+                    continue
+                label, rate_label = before.group('label', 'rate_label')
+            if percent:
+                if rate_label:
+                    yield 'engagement_rate', parse_number(number)
+            elif label:
+                yield self._metric_for(label), parse_number(number, suffix or '')
+
+    def parse_metrics(self, text: str) -> Dict[str, float]:
+        """Первое найденное значение каждой метрики; отсутствующие - None"""
+        found = dict.fromkeys(METRIC_COLUMNS)
+        for metric, value in self.iter_metrics(text):
+            if found[metric] is None:
+                found[metric] = value
+        return found
+
+    def handle(self, text: str, network: str) -> str:
+        """Первый хэндл сети ('instagram' или 'telegram') в тексте; пустая строка, если нет"""
+        match = self.extractors[network].search(text)
+        return (match.group(1) or match.group(2)) if match else ''
+
+    def influencers(self, text: str) -> List[str]:
+        """Упоминания блогеров в тексте"""
+        return self.extractors['influencer'].findall(text)
+
+    def find_categories(self, text: str) -> Dict[str, List[str]]:
+        """Найденные метки по категориям"""
+        found = set()
+        for token in set(self.keyword_regex.findall(text.lower())):
+            found.update(self._labels_for(token))
+        # Метки в порядке определения, как при последовательных проверках
+        return {
+            category: [label for label in labels if (category, label) in found]
+            for category, labels in self.categories.items()
+        }
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Находит категории и извлекаемые значения в тексте"""
+        return {
+            'instagram': self.handle(text, 'instagram'),
+            'telegram': self.handle(text, 'telegram'),
+            'metrics': self.parse_metrics(text),
+            'influencers': self.influencers(text),
+            'categories': self.find_categories(text),
+        }
+
+
+DEFAULT_SCANNER = TextScanner()
+
+
+def parse_follower_count(followers_str: str) -> int:
+    """Конвертация "45K", "1.2М", "1,2 млн", "12 345" в числа"""
+    if not followers_str:
+        return 0
+    match = re.fullmatch(rf'\s*({NUMBER_PATTERN})\s*({SUFFIX_PATTERN})?\s*', followers_str, re.IGNORECASE)
+    if not match:
+        return 0
+    return int(round(parse_number(match.group(1), match.group(2) or '')))
+
+
+def metrics_from_scan(scan: Dict[str, Any]) -> Dict[str, Any]:
+    """Собирает метрики из результата сканирования"""
+    metrics = scan['metrics']
+    return {
+        'followers': int(metrics['followers'] or 0),
+        'posts_count': int(metrics['posts'] or 0),
+        'likes': int(metrics['likes'] or 0),
+        'engagement_rate': metrics['engagement_rate'] or 0,
+        'mentions_influencers': list(set(scan['influencers']))
+    }
+
+
+def metrics_table(results: Iterable[Dict[str, Any]], scanner: TextScanner = None):
+    """Таблица метрик результатов поиска за один проход: строка на результат"""
+    scanner = scanner or DEFAULT_SCANNER
+    return metrics_frame(
+        (result.get('url', ''), scanner.parse_metrics(result.get('text') or '')) for result in results
+    )
+
+
+def metrics_frame(rows: Iterable[tuple]):
+    """Таблица метрик из пар (url, {метрика: значение или None}).
+
+    Счетчики - Int64, ER - Float64; ненайденные метрики - NA, а не 0,
+    поэтому средние и медианы по тысячам страниц считаются только по
+    страницам, где метрика есть.
+    """
+    import pandas as pd
+    urls = []
+    columns = {metric: [] for metric in METRIC_COLUMNS}
+    for url, values in rows:
+        urls.append(url)
+        for metric in METRIC_COLUMNS:
+            columns[metric].append(values[metric])
+    table = pd.DataFrame({metric: pd.array(values, dtype='Float64') for metric, values in columns.items()})
+    counts = list(METRIC_LABELS)
+    table[counts] = table[counts].round().astype('Int64')
+    table.insert(0, 'url', pd.array(urls, dtype='string'))
+    return table
+
+
+def strategy_from_scan(scan: Dict[str, Any]) -> Dict[str, Any]:
+    """Собирает контентную стратегию из результата сканирования"""
+    strategy = {category: list(labels) for category, labels in scan['categories'].items()}
+    strategy['ugc_mentions'] = bool(scan['categories'].get('ugc_mentions'))
+    return strategy
+
+
+# Отдельные извлечения запускают только нужные им выражения, а не весь scan()
 def extract_instagram_handle(text: str) -> str:
     """Извлекает Instagram хэндл из текста"""
-    instagram_pattern = r'@([A-Za-z0-9_.]+)|instagram\.com/([A-Za-z0-9_.]+)'
-    matches = re.findall(instagram_pattern, text, re.IGNORECASE)
-    if matches:
-        return matches[0][0] or matches[0][1]
-    return ""
+    return DEFAULT_SCANNER.handle(text, 'instagram')
+
 
 def extract_telegram_handle(text: str) -> str:
     """Извлекает Telegram хэндл из текста"""
-    telegram_pattern = r't\.me/([A-Za-z0-9_]+)|@([A-Za-z0-9_]+)'
-    matches = re.findall(telegram_pattern, text, re.IGNORECASE)
-    if matches:
-        return matches[0][0] or matches[0][1]
-    return ""
+    return DEFAULT_SCANNER.handle(text, 'telegram')
+
 
 def extract_key_metrics(text: str) -> Dict[str, Any]:
     """Извлекает ключевые метрики из текста"""
-    metrics = {
-        'followers': 0,
-        'posts_count': 0,
-        'engagement_rate': 0,
-        'mentions_influencers': []
-    }
-    
-    # Поиск количества подписчиков
-    followers_pattern = r'(\d+(?:\.\d+)?[KkМм]?)\s*(?:подписчик|follower|subscriber)'
-    followers_match = re.search(followers_pattern, text, re.IGNORECASE)
-    if followers_match:
-        followers_str = followers_match.group(1)
-        # Конвертация K/М в числа
-        if 'K' in followers_str.upper():
-            metrics['followers'] = int(float(followers_str.replace('K', '').replace('k', '')) * 1000)
-        elif 'М' in followers_str.upper():
-            metrics['followers'] = int(float(followers_str.replace('М', '').replace('M', '')) * 1000000)
-        else:
-            metrics['followers'] = int(float(followers_str))
-    
-    # Поиск упоминаний инфлюенсеров
-    influencer_pattern = r'(?:блогер|blogger|influencer|амбассадор)\s+([А-Яа-я\s]+)'
-    influencers = re.findall(influencer_pattern, text, re.IGNORECASE)
-    metrics['mentions_influencers'] = list(set(influencers))
-    
-    return metrics
+    return metrics_from_scan({'metrics': DEFAULT_SCANNER.parse_metrics(text),
+                              'influencers': DEFAULT_SCANNER.influencers(text)})
+
 
 def analyze_content_strategy(text: str) -> Dict[str, List[str]]:
     """Анализирует контентную стратегию"""
-    strategy = {
-        'content_types': [],
-        'key_themes': [],
-        'ugc_mentions': False,
-        'promo_mechanics': []
+    return strategy_from_scan({'categories': DEFAULT_SCANNER.find_categories(text)})
+
+
+def extract_result(result: Dict[str, Any], scanner: TextScanner = None) -> Dict[str, Any]:
+    """Извлекает все данные одного результата поиска"""
+    scanner = scanner or DEFAULT_SCANNER
+    text = result.get('text', '')
+    scan = scanner.scan(text)
+    return {
+        'url': result.get('url', ''),
+        'summary': text[:300],
+        'instagram': scan['instagram'],
+        'telegram': scan['telegram'],
+        'metrics': metrics_from_scan(scan),
+        # Найденные значения без подстановки 0, для таблицы метрик
+        'metric_values': scan['metrics'],
+        'strategy': strategy_from_scan(scan),
+        'fingerprint': text_fingerprint(text),
     }
+
+
+_worker_scanner = None
+
+
+def _init_worker(categories: Dict[str, Dict[str, str]]):
+    """Компилирует сканер один раз на процесс"""
+    global _worker_scanner
+    _worker_scanner = TextScanner(categories)
+
+
+def _extract_chunk(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [extract_result(result, _worker_scanner) for result in results]
+
+
+def iter_extracted(results: Iterable[Dict[str, Any]], scanner: TextScanner = None,
+                   workers: int = 1, chunk_size: int = EXTRACT_CHUNK_SIZE,
+                   cache: ExtractionCache = None) -> Iterator[Dict[str, Any]]:
+    """Извлекает данные результатов, при workers > 1 в пуле процессов.
+
+    Результаты отдаются в исходном порядке; в работе одновременно не более
+    PENDING_PER_WORKER пачек на процесс, поэтому вход может быть генератором
+    любой длины. С кэшем уже обработанные страницы берутся из него, а
+    извлекаются только новые.
+    """
+    scanner = scanner or DEFAULT_SCANNER
+    if cache is not None:
+        yield from iter_cached(results, scanner, workers, chunk_size, cache)
+        return
+    if workers is not None and workers <= 1:
+        for result in results:
+            yield extract_result(result, scanner)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * PENDING_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scanner.categories,)) as pool:
+        pending = deque()
+        for chunk in iter_batches(results, chunk_size):
+            pending.append(pool.submit(_extract_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_cached(results: Iterable[Dict[str, Any]], scanner: TextScanner, workers: int,
+                chunk_size: int, cache: ExtractionCache) -> Iterator[Dict[str, Any]]:
+    """Извлечение через кэш; пул процессов создается один раз и только если промахов много"""
+    from contextlib import ExitStack
+    workers = workers or os.cpu_count() or 1
+    with ExitStack() as stack:
+        pool = None
+
+        def extract(missing):
+            nonlocal pool
+            if workers <= 1 or len(missing) <= chunk_size:
+                return [extract_result(result, scanner) for result in missing]
+            if pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(scanner.categories,)))
+            futures = [pool.submit(_extract_chunk, chunk) for chunk in iter_batches(missing, chunk_size)]
+            return [extracted for future in futures for extracted in future.result()]
+
+        yield from cache.iter_extracted(results, extract)
+
+
+def render_source_section(idx: int, extracted: Dict[str, Any]) -> str:
+    """Раздел отчета по одному источнику"""
+    instagram = extracted['instagram']
+    telegram = extracted['telegram']
+    metrics = extracted['metrics']
     
-    # Типы контента
-    if re.search(r'видео|video|reel|сторис|stories', text, re.IGNORECASE):
-        strategy['content_types'].append('Видео контент')
-    if re.search(r'карусель|carousel|фото|photo', text, re.IGNORECASE):
-        strategy['content_types'].append('Фото контент')
-    if re.search(r'инфографик|infographic', text, re.IGNORECASE):
-        strategy['content_types'].append('Инфографика')
-    
-    # Ключевые темы
-    if re.search(r'рецепт|recipe|готов|cook', text, re.IGNORECASE):
-        strategy['key_themes'].append('Рецепты')
-    if re.search(r'совет|advice|tip|рекоменд', text, re.IGNORECASE):
-        strategy['key_themes'].append('Советы по уходу')
-    if re.search(r'развитие|development|рост|growth', text, re.IGNORECASE):
-        strategy['key_themes'].append('Развитие ребенка')
-    
-    # UGC контент
-    strategy['ugc_mentions'] = bool(re.search(r'ugc|пользовательский контент|отзыв', text, re.IGNORECASE))
-    
-    # Промо механики
-    if re.search(r'конкурс|contest|giveaway|розыгрыш', text, re.IGNORECASE):
-        strategy['promo_mechanics'].append('Конкурсы и розыгрыши')
-    if re.search(r'скидк|discount|промо|promo', text, re.IGNORECASE):
-        strategy['promo_mechanics'].append('Скидки и промо')
+    section = f"\n#### Источник {idx + 1}: {extracted['url']}\n"
+    section += f"**Краткое содержание:** {extracted['summary']}...\n\n"
     
-    return strategy
+    if instagram or telegram:
+        section += "**Социальные сети:**\n"
+        if instagram:
+            section += f"- Instagram: @{instagram}\n"
+        if telegram:
+            section += f"- Telegram: @{telegram}\n"
+        section += "\n"
+    
+    if any(metrics[key] for key, _ in REPORT_METRICS):
+        section += f"**Метрики:**\n"
+        for key, title in REPORT_METRICS:
+            if metrics[key]:
+                section += f"- {title}: {metrics[key]:,}\n"
+        if metrics['mentions_influencers']:
+            section += f"- Упомянутые инфлюенсеры: {', '.join(metrics['mentions_influencers'])}\n"
+        section += "\n"
+    
+    return section
 
-def process_search_results(results: List[Dict[str, Any]], brand_name: str) -> str:
-    """Обрабатывает результаты поиска и создает MD отчет"""
-    report = f"## {brand_name}\n\n"
-    report += f"*Дата анализа: {datetime.now().strftime('%Y-%m-%d %H:%M')}*\n\n"
+
+def render_duplicate_section(idx: int, extracted: Dict[str, Any], original: int) -> str:
+    """Раздел отчета по источнику, повторяющему уже учтенный"""
+    return (f"\n#### Источник {idx + 1}: {extracted['url']}\n"
+            f"*Повторяет источник {original + 1}, в выводах не учитывается*\n")
+
+
+def iter_report_sections(results: Iterable[Dict[str, Any]], brand_name: str,
+                         scanner: TextScanner = None, workers: int = 1,
+                         cache: ExtractionCache = None, metric_rows: list = None) -> Iterator[str]:
+    """Отдает разделы MD отчета по мере обработки результатов.
+
+    Для выводов хранятся только уникальные значения в порядке появления,
+    а не все извлеченные данные. Почти одинаковые тексты (в том числе
+    одна страница, найденная дважды) учитываются в выводах один раз.
+    В metric_rows, если передан, добавляются пары (url, метрики) тех же
+    источников, что вошли в выводы (см. metrics_frame).
+    """
+    header = f"## {brand_name}\n\n"
+    header += f"*Дата анализа: {datetime.now().strftime('%Y-%m-%d %H:%M')}*\n\n"
     
     # Сводная информация
-    report += "### 📊 Сводная информация\n\n"
+    header += "### 📊 Сводная информация\n\n"
+    yield header
     
-    all_instagram_handles = []
-    all_telegram_handles = []
-    all_metrics = []
-    all_strategies = []
+    instagram_handles = {}
+    telegram_handles = {}
+    content_types = {}
+    themes = {}
+    ugc_count = 0
+    # Метрика -> [источников, сумма, максимум]
+    metric_totals = {key: [0, 0, 0] for key, _ in REPORT_METRICS}
+    duplicates = DuplicateIndex()
+    duplicate_count = 0
     
-    for idx, result in enumerate(results):
-        text = result.get('text', '')
-        url = result.get('url', '')
-        
-        # Извлекаем данные
-        instagram = extract_instagram_handle(text)
-        telegram = extract_telegram_handle(text)
-        metrics = extract_key_metrics(text)
-        strategy = analyze_content_strategy(text)
-        
-        if instagram:
-            all_instagram_handles.append(instagram)
-        if telegram:
-            all_telegram_handles.append(telegram)
-        
-        all_metrics.append(metrics)
-        all_strategies.append(strategy)
+    for idx, extracted in enumerate(iter_extracted(results, scanner, workers, cache=cache)):
+        original = duplicates.find_or_add(extracted['fingerprint'], idx)
+        if original is not None:
+            duplicate_count += 1
+            yield render_duplicate_section(idx, extracted, original)
+            continue
+        if metric_rows is not None:
+            metric_rows.append((extracted['url'], extracted['metric_values']))
+        if extracted['instagram']:
+            instagram_handles[extracted['instagram']] = None
+        if extracted['telegram']:
+            telegram_handles[extracted['telegram']] = None
+        strategy = extracted['strategy']
+        content_types.update(dict.fromkeys(strategy['content_types']))
+        themes.update(dict.fromkeys(strategy['key_themes']))
+        ugc_count += strategy['ugc_mentions']
+        for key, totals in metric_totals.items():
+            value = extracted['metrics'][key]
+            if value:
+                totals[0] += 1
+                totals[1] += value
+                totals[2] = max(totals[2], value)
         
         # Добавляем детальную информацию
-        report += f"\n#### Источник {idx + 1}: {url}\n"
-        report += f"**Краткое содержание:** {text[:300]}...\n\n"
-        
-        if instagram or telegram:
-            report += "**Социальные сети:**\n"
-            if instagram:
-                report += f"- Instagram: @{instagram}\n"
-            if telegram:
-                report += f"- Telegram: @{telegram}\n"
-            report += "\n"
-        
-        if metrics['followers'] > 0:
-            report += f"**Метрики:**\n"
-            report += f"- Подписчики: {metrics['followers']:,}\n"
-            if metrics['mentions_influencers']:
-                report += f"- Упомянутые инфлюенсеры: {', '.join(metrics['mentions_influencers'])}\n"
-            report += "\n"
+        yield render_source_section(idx, extracted)
     
     # Общий анализ
-    report += "\n### 🎯 Ключевые выводы\n\n"
+    summary = "\n### 🎯 Ключевые выводы\n\n"
     
     # Социальные сети
-    if all_instagram_handles:
-        report += f"**Instagram аккаунты:** @{', @'.join(set(all_instagram_handles))}\n"
-    if all_telegram_handles:
-        report += f"**Telegram каналы:** @{', @'.join(set(all_telegram_handles))}\n"
+    if instagram_handles:
+        summary += f"**Instagram аккаунты:** @{', @'.join(instagram_handles)}\n"
+    if telegram_handles:
+        summary += f"**Telegram каналы:** @{', @'.join(telegram_handles)}\n"
     
     # Контентная стратегия
-    report += "\n**Используемые типы контента:**\n"
-    all_content_types = []
-    for strategy in all_strategies:
-        all_content_types.extend(strategy['content_types'])
-    for content_type in set(all_content_types):
-        report += f"- {content_type}\n"
+    summary += "\n**Используемые типы контента:**\n"
+    for content_type in content_types:
+        summary += f"- {content_type}\n"
     
     # Темы
-    report += "\n**Ключевые темы:**\n"
-    all_themes = []
-    for strategy in all_strategies:
-        all_themes.extend(strategy['key_themes'])
-    for theme in set(all_themes):
-        report += f"- {theme}\n"
+    summary += "\n**Ключевые темы:**\n"
+    for theme in themes:
+        summary += f"- {theme}\n"
     
     # UGC
-    ugc_count = sum(1 for s in all_strategies if s['ugc_mentions'])
     if ugc_count > 0:
-        report += f"\n**UGC контент:** Используется (найдено в {ugc_count} источниках)\n"
+        summary += f"\n**UGC контент:** Используется (найдено в {ugc_count} источниках)\n"
     
-    report += "\n---\n\n"
+    # Метрики по всем источникам
+    if any(totals[0] for totals in metric_totals.values()):
+        summary += "\n**Метрики по источникам:**\n"
+        for key, title in REPORT_METRICS:
+            count, total, maximum = metric_totals[key]
+            if count:
+                summary += (f"- {title}: в {count} источниках, в среднем {round(total / count, 2):,}, "
+                            f"максимум {maximum:,}\n")
     
-    return report
+    # Повторы
+    if duplicate_count:
+        summary += f"\n**Дубликаты:** {duplicate_count} (повторяют уже учтенные источники и не вошли в выводы)\n"
+    
+    summary += "\n---\n\n"
+    yield summary
+
+
+def process_search_results(results: Iterable[Dict[str, Any]], brand_name: str,
+                           scanner: TextScanner = None, workers: int = 1,
+                           cache: ExtractionCache = None) -> str:
+    """Обрабатывает результаты поиска и создает MD отчет"""
+    return ''.join(iter_report_sections(results, brand_name, scanner, workers, cache))
+
+
+class ReportPartWriter:
+    """Пишет разделы отчета в файлы, начиная новую часть только на границе раздела.
+
+    Части называются {base}_part{N}.md; если отчет уместился в одну часть,
+    она сохраняется как {base}.md.
+    """
+
+    def __init__(self, base_filename: str, max_part_size: int = PART_SIZE):
+        self.base_filename = base_filename
+        self.max_part_size = max_part_size
+        self.files = []
+        self.file = None
+        self.part_size = 0
+
+    def _open_part(self):
+        if self.file:
+            self.file.close()
+        filename = f"{self.base_filename}_part{len(self.files) + 1}.md"
+        self.file = open(filename, 'w', encoding='utf-8')
+        self.files.append(filename)
+        self.part_size = 0
+
+    def write(self, section: str):
+        if self.file is None or (self.max_part_size and self.part_size >= self.max_part_size):
+            self._open_part()
+        self.file.write(section)
+        self.file.flush()
+        self.part_size += len(section)
+
+    def close(self) -> List[str]:
+        if self.file:
+            self.file.close()
+            self.file = None
+        if len(self.files) == 1:
+            filename = f"{self.base_filename}.md"
+            os.replace(self.files[0], filename)
+            self.files = [filename]
+        for filename in self.files:
+            print(f"Сохранено: {filename}")
+        return self.files
+
+
+def save_report_sections(sections: Iterable[str], base_filename: str,
+                         max_part_size: int = PART_SIZE) -> List[str]:
+    """Сохраняет поток разделов отчета по частям"""
+    writer = ReportPartWriter(base_filename, max_part_size)
+    for section in sections:
+        writer.write(section)
+    return writer.close()
 
 def save_to_chunks(content: str, base_filename: str, chunk_size: int = 10000):
     """Сохраняет контент по частям в отдельные файлы"""
@@ -184,8 +601,74 @@ def save_to_chunks(content: str, base_filename: str, chunk_size: int = 10000):
             f.write(chunk)
         print(f"Сохранено: {filename}")
 
+
+def main():
+    """Анализ результатов поиска из JSON/JSON Lines файла"""
+    args = sys.argv[1:]
+    workers = 1
+    if '--workers' in args:
+        idx = args.index('--workers')
+        workers = int(args[idx + 1])
+        del args[idx:idx + 2]
+    max_part_size = PART_SIZE
+    if '--max-part-size' in args:
+        idx = args.index('--max-part-size')
+        max_part_size = int(args[idx + 1])
+        del args[idx:idx + 2]
+    metrics_file = None
+    if '--metrics-csv' in args:
+        idx = args.index('--metrics-csv')
+        metrics_file = args[idx + 1]
+        del args[idx:idx + 2]
+    cache_file = None
+    if '--cache' in args:
+        idx = args.index('--cache')
+        cache_file = args[idx + 1]
+        del args[idx:idx + 2]
+    cache_bytes = DEFAULT_CACHE_BYTES
+    if '--cache-size-mb' in args:
+        idx = args.index('--cache-size-mb')
+        cache_bytes = int(float(args[idx + 1]) * 1024 * 1024)
+        del args[idx:idx + 2]
+    scanner = DEFAULT_SCANNER
+    if '--categories' in args:
+        idx = args.index('--categories')
+        scanner = TextScanner.from_json(args[idx + 1])
+        del args[idx:idx + 2]
+    
+    if len(args) < 2:
+        print("Usage: python analyze_competitors.py <results.json> <brand_name> [output_base] "
+              "[--workers N] [--max-part-size N] [--metrics-csv metrics.csv]")
+        print("       [--cache extraction_cache.db] [--cache-size-mb N] [--categories categories.json]")
+        sys.exit(1)
+    
+    results_file, brand_name = args[0], args[1]
+    output_base = args[2] if len(args) > 2 else f"competitor_analysis_{brand_name.lower()}"
+    cache = ExtractionCache(cache_file, scanner.version, cache_bytes) if cache_file else None
+    # Метрики собираются в том же проходе, что и отчет, без дубликатов
+    metric_rows = [] if metrics_file else None
+    try:
+        sections = iter_report_sections(iter_posts(results_file), brand_name, scanner, workers=workers,
+                                        cache=cache, metric_rows=metric_rows)
+        save_report_sections(sections, output_base, max_part_size)
+    finally:
+        if cache:
+            cache.close()
+    if cache:
+        print(f"Кэш: {cache.hits} из {cache.hits + cache.misses} результатов взяты из кэша, "
+              f"извлечено {cache.misses}")
+    
+    if metrics_file:
+        metrics_frame(metric_rows).to_csv(metrics_file, index=False, encoding='utf-8')
+        print(f"Сохранено: {metrics_file}")
+
+
 # Пример использования
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+        sys.exit(0)
+    
     # Здесь будут результаты от Firecrawl
     sample_results = [
         {
@@ -194,13 +677,5 @@ if __name__ == "__main__":
         }
     ]
     
-    # Обработка результатов
-    report = process_search_results(sample_results, "Nutrilak")
-    
-    # Сохранение полного отчета
-    with open('competitor_analysis_nutrilak.md', 'w', encoding='utf-8') as f:
-        f.write(report)
-    
-    # Если отчет большой, сохраняем по частям
-    if len(report) > 10000:
-        save_to_chunks(report, 'competitor_analysis_nutrilak')
\ No newline at end of file
+    # Обработка результатов с сохранением по частям на границах разделов
+    save_report_sections(iter_report_sections(sample_results, "Nutrilak"), 'competitor_analysis_nutrilak')
@@ -4,25 +4,383 @@ Instagram Account Analysis Script
 Analyzes Instagram JSON data and generates comprehensive markdown report
 """
 
-import json
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from collections import Counter
-import re
+import glob
 import sys
 from pathlib import Path
 
+from comment_analytics import (TOP_COMMENTERS, classify_comments, comment_delays, commenter_stats,
+                               latency_distribution, post_comment_stats, reply_latencies)
+from engagement_trends import EngagementTrends
+from instagram_io import DEFAULT_BATCH_SIZE, iter_batches, iter_posts, peek_first_post
+from instagram_report import TREND_WEEKS, render_report, save_sections_json
+from pipeline_profiler import DISABLED, StageProfiler
+from post_ranking import RANK_COLUMNS, percentiles, score_posts, top_k
+
+# Typed post columns kept in the analyzer frame; everything else is dropped while streaming
+POST_COLUMNS = ['id', 'type', 'ownerUsername', 'caption', 'likesCount', 'commentsCount', 'timestamp',
+                'childPostsCount']
+COMMENT_FIELDS = ['id', 'text', 'ownerUsername', 'timestamp', 'likesCount']
+# Nested lists go to side tables: name -> columns collected while streaming
+SIDE_TABLE_COLUMNS = {
+    'hashtags': ['post', 'hashtag'],
+    'comments': ['post'] + COMMENT_FIELDS,
+    'replies': ['post', 'comment'] + COMMENT_FIELDS,
+}
+
+
+def text_dtype():
+    """Arrow-backed strings when pyarrow is installed, Python strings otherwise (NaN for missing)"""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except ImportError:
+        return pd.StringDtype('python', na_value=np.nan)
+
+
+def categorical(values):
+    """Categorical with categories in first-appearance order, so value_counts ties stay stable"""
+    codes, categories = pd.factorize(np.array(values, dtype=object))
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def count_array(values):
+    """int32 counts; nullable Int32 only when some values are missing"""
+    counts = pd.array(values, dtype='Int32')
+    return counts if counts.isna().any() else counts.to_numpy('int32')
+
+
+def post_frame(batch):
+    """Typed frame of the analyzed post fields for one batch of raw posts"""
+    column = {name: [post.get(name) for post in batch] for name in POST_COLUMNS if name != 'childPostsCount'}
+    strings = text_dtype()
+    return pd.DataFrame({
+        'id': pd.array([None if v is None else str(v) for v in column['id']], dtype=strings),
+        'type': categorical(column['type']),
+        'ownerUsername': categorical(column['ownerUsername']),
+        'caption': pd.array(column['caption'], dtype=strings),
+        'likesCount': count_array(column['likesCount']),
+        'commentsCount': count_array(column['commentsCount']),
+        'timestamp': pd.to_datetime(pd.Series(column['timestamp'], dtype=object), utc=True),
+        'childPostsCount': np.array([len(post.get('childPosts') or []) for post in batch], dtype='int32'),
+    })
+
+
+def concat_frames(frames):
+    """Concatenate typed frames, merging their categories instead of falling back to object"""
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    for name, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[name] = union_categoricals([frame[name] for frame in frames])
+    return df
+
+
+def collect_nested(batch, offset, side_tables):
+    """Append a batch's hashtags, comments and replies to the side-table row buffers"""
+    tags = side_tables['hashtags'].columns
+    comment_buffer = side_tables['comments']
+    comments = comment_buffer.columns
+    replies = side_tables['replies'].columns
+    for post_row, post in enumerate(batch, offset):
+        for tag in post.get('hashtags') or []:
+            if tag is not None:
+                tags['post'].append(post_row)
+                tags['hashtag'].append(tag)
+        for comment in post.get('latestComments') or []:
+            comment_row = comment_buffer.rows
+            comments['post'].append(post_row)
+            for field in COMMENT_FIELDS:
+                comments[field].append(comment.get(field))
+            for reply in comment.get('replies') or []:
+                replies['post'].append(post_row)
+                replies['comment'].append(comment_row)
+                for field in COMMENT_FIELDS:
+                    replies[field].append(reply.get(field))
+
+
+def hashtag_table(columns):
+    return pd.DataFrame({
+        'post': np.array(columns['post'], dtype='int32'),
+        'hashtag': categorical(columns['hashtag']),
+    })
+
+
+def comment_table(columns):
+    """Typed comments (or replies) table; replies also carry their parent comment row"""
+    strings = text_dtype()
+    table = pd.DataFrame({
+        'post': np.array(columns['post'], dtype='int32'),
+        'id': pd.array([None if v is None else str(v) for v in columns['id']], dtype=strings),
+        'text': pd.array(columns['text'], dtype=strings),
+        'ownerUsername': categorical(columns['ownerUsername']),
+        'timestamp': pd.to_datetime(pd.Series(columns['timestamp'], dtype=object), utc=True, errors='coerce'),
+        'likesCount': count_array(columns['likesCount']),
+    })
+    if 'comment' in columns:
+        table.insert(1, 'comment', np.array(columns['comment'], dtype='int32'))
+    return classify_comments(table)
+
+
+SIDE_TABLE_BUILDERS = {
+    'hashtags': hashtag_table,
+    'comments': comment_table,
+    'replies': comment_table,
+}
+# Buffered side-table rows are converted to a typed chunk once this many pile up
+SIDE_TABLE_CHUNK_ROWS = 100000
+
+
+class SideTable:
+    """Rows of one nested post list, buffered as Python lists and compacted into typed chunks.
+
+    Small accounts never build a chunk until the table is first read; large
+    ones keep at most SIDE_TABLE_CHUNK_ROWS rows as Python objects.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.build = SIDE_TABLE_BUILDERS[name]
+        self.columns = {column: [] for column in SIDE_TABLE_COLUMNS[name]}
+        self.chunks = []
+        self.chunked_rows = 0
+
+    @property
+    def rows(self):
+        return self.chunked_rows + len(self.columns['post'])
+
+    def compact(self, min_rows=None):
+        """Turn the buffered rows into a typed chunk once there are at least min_rows"""
+        buffered = len(self.columns['post'])
+        if buffered and buffered >= (SIDE_TABLE_CHUNK_ROWS if min_rows is None else min_rows):
+            self.chunks.append(self.build(self.columns))
+            self.columns = {column: [] for column in self.columns}
+            self.chunked_rows += buffered
+
+    def frame(self):
+        self.compact(min_rows=0)
+        return concat_frames(self.chunks) if self.chunks else self.build(self.columns)
+
+
+# Character classes counted per caption (single-character classes, see count_chars)
+CYRILLIC_PATTERN = r'[а-яА-ЯёЁ]'
+LATIN_PATTERN = r'[a-zA-Z]'
+EMOJI_PATTERN = '[\U0001F300-\U0001FAFF\u2600-\u27BF]'
+HASHTAG_PATTERN = r'#[^\s#]'
+MENTION_PATTERN = r'@[A-Za-z0-9_.]'
+
+# Extra letter counters: feature column -> pattern. Uzbek Latin writes oʻ and gʻ
+# with a modifier letter turned comma (or an apostrophe in casual text)
+LETTER_RULES = {
+    'uzbek_latin_letters': "[oOgG][ʻ'‘’`]",
+}
+
+# Language labels checked before the Cyrillic vs Latin comparison, in order:
+# (label, function of the caption stats frame returning a boolean mask), e.g.
+# ('uzbek_latin', lambda stats: stats['uzbek_latin_letters'] >= 2)
+LANGUAGE_RULES = []
+
+CAPTION_STAT_COLUMNS = ['caption_length', 'cyrillic_chars', 'latin_chars', 'emoji_count', 'hashtag_count',
+                        'mention_count', *LETTER_RULES, 'language']
+
+
+def count_chars(captions, lengths, char_class):
+    """Characters of char_class in each caption.
+
+    Removing runs of the class and comparing lengths is several times faster
+    than counting single-character regex matches.
+    """
+    return lengths - captions.str.replace(f'{char_class}+', '', regex=True).str.len()
+
+
+def caption_stats(captions):
+    """Per-caption character counts and language label, vectorized over the string column.
+
+    Empty captions are 'unknown'; otherwise the first matching LANGUAGE_RULES
+    entry wins, then Cyrillic vs Latin letter counts decide ('mixed' on a tie).
+    """
+    text = captions.str
+    lengths = text.len()
+    stats = pd.DataFrame({
+        'caption_length': lengths,
+        'cyrillic_chars': count_chars(captions, lengths, CYRILLIC_PATTERN),
+        'latin_chars': count_chars(captions, lengths, LATIN_PATTERN),
+        'emoji_count': count_chars(captions, lengths, EMOJI_PATTERN),
+        'hashtag_count': text.count(HASHTAG_PATTERN),
+        'mention_count': text.count(MENTION_PATTERN),
+    }, index=captions.index)
+    for column, pattern in LETTER_RULES.items():
+        stats[column] = text.count(pattern)
+
+    has_text = (stats['caption_length'] > 0).to_numpy()
+    cyrillic = stats['cyrillic_chars'].to_numpy()
+    latin = stats['latin_chars'].to_numpy()
+    conditions = [~has_text]
+    labels = ['unknown']
+    for label, rule in LANGUAGE_RULES:
+        conditions.append(has_text & rule(stats).to_numpy(dtype=bool))
+        labels.append(label)
+    conditions += [cyrillic > latin, latin > cyrillic]
+    labels += ['russian/uzbek_cyrillic', 'uzbek_latin/english']
+    stats['language'] = np.select(conditions, labels, default='mixed').astype(object)
+    return stats
+
+
+# Derived columns: column -> (required features, compute function, stage name, columns filled together)
+FEATURES = {}
+
+
+def feature(name, requires=(), columns=None):
+    """Register a derived column for InstagramAnalyzer.ensure_features.
+
+    A feature filling several columns at once passes them as columns; its
+    function returns a frame and the feature is registered under each column.
+    """
+    def register(compute):
+        for column in columns or [name]:
+            FEATURES[column] = (tuple(requires), compute, name, tuple(columns or [name]))
+        return compute
+    return register
+
+
+@feature('engagement')
+def _engagement(df):
+    return df['likesCount'] + df['commentsCount']
+
+
+@feature('timestamp')
+def _timestamp(df):
+    return pd.to_datetime(df['timestamp'])
+
+
+@feature('date', requires=['timestamp'])
+def _date(df):
+    return df['timestamp'].dt.date
+
+
+@feature('hour', requires=['timestamp'])
+def _hour(df):
+    return df['timestamp'].dt.hour
+
+
+@feature('day_of_week', requires=['timestamp'])
+def _day_of_week(df):
+    return df['timestamp'].dt.day_name()
+
+
+@feature('month', requires=['timestamp'])
+def _month(df):
+    return df['timestamp'].dt.month_name()
+
+
+@feature('caption_stats', columns=CAPTION_STAT_COLUMNS)
+def _caption_stats(df):
+    return caption_stats(df['caption'])
+
+
+@feature('is_carousel')
+def _is_carousel(df):
+    return df['childPostsCount'] > 0
+
+
+# Report sections: key in compute_sections() -> (analyzer method, features, side tables it reads).
+# Inputs are built before the sections run, so the sections only read shared state.
+SECTIONS = {
+    'engagement': ('analyze_engagement', ['engagement'], []),
+    'content': ('analyze_content_types', ['engagement', 'is_carousel'], []),
+    'hashtags': ('analyze_hashtags', ['engagement'], ['hashtags']),
+    'patterns': ('analyze_posting_patterns', ['engagement', 'date', 'hour', 'day_of_week', 'month'], ['trends']),
+    'captions': ('analyze_captions', ['engagement', 'caption_length', 'language'], []),
+    'comments': ('analyze_comments', ['timestamp'], ['comments', 'replies']),
+}
+
+
 class InstagramAnalyzer:
-    def __init__(self, json_file):
-        """Initialize analyzer with JSON data"""
-        with open(json_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
-        self.df = pd.DataFrame(self.data)
-        self.account_name = self.data[0]['ownerUsername'] if self.data else 'Unknown'
-        self.full_name = self.data[0]['ownerFullName'] if self.data else 'Unknown'
+    def __init__(self, json_file=None, batch_size=DEFAULT_BATCH_SIZE, profiler=None, posts=None):
+        """Initialize analyzer by streaming posts from a JSON or JSON Lines dump
+        (or from an iterable of already parsed posts)"""
+        self.profiler = profiler or DISABLED
+        self.account_name = 'Unknown'
+        self.full_name = 'Unknown'
+        frames = []
+        self._nested = {name: SideTable(name) for name in SIDE_TABLE_COLUMNS}
+        self._side_tables = {}
+        rows = 0
+        batches = iter_batches(iter_posts(json_file) if posts is None else posts, batch_size)
+        while True:
+            with self.profiler.stage('json_load') as stage:
+                batch = next(batches, None)
+                if batch is not None:
+                    stage.add_rows(len(batch))
+            if batch is None:
+                break
+            if not frames:
+                self.account_name = batch[0]['ownerUsername']
+                self.full_name = batch[0]['ownerFullName']
+            with self.profiler.stage('dataframe_build', rows=len(batch)):
+                frames.append(post_frame(batch))
+                collect_nested(batch, rows, self._nested)
+                for table in self._nested.values():
+                    table.compact()
+            rows += len(batch)
+        with self.profiler.stage('dataframe_build'):
+            self.df = concat_frames(frames) if frames else post_frame([])
+        self.computed_features = set()
+        self._trends = None
+    
+    def ensure_features(self, *names):
+        """Add the given derived columns to self.df, computing each one only once.
+
+        Dependencies declared in FEATURES are resolved first, so any analysis
+        section can run on its own and in any order.
+        """
+        for name in names:
+            if name in self.computed_features:
+                continue
+            requires, compute, stage, columns = FEATURES[name]
+            self.ensure_features(*requires)
+            with self.profiler.stage(f"feature:{stage}", rows=len(self.df)):
+                values = compute(self.df)
+                if len(columns) == 1:
+                    self.df[name] = values
+                else:
+                    for column in columns:
+                        self.df[column] = values[column]
+            self.computed_features.update(columns)
+        return self.df
+
+    def side_table(self, name):
+        """Flat table built from a nested post list ('hashtags' or 'comments') on first use.
+
+        Rows point back at self.df through the 'post' column (row position).
+        """
+        if name not in self._side_tables:
+            with self.profiler.stage(f"side_table:{name}"):
+                self._side_tables[name] = self._nested.pop(name).frame()
+        return self._side_tables[name]
+
+    @property
+    def hashtags(self):
+        """Post-hashtag pairs: post, hashtag"""
+        return self.side_table('hashtags')
+
+    @property
+    def comments(self):
+        """Latest comments: post, id, text, ownerUsername, timestamp, likesCount, is_question, is_complaint"""
+        return self.side_table('comments')
+
+    @property
+    def replies(self):
+        """Replies to latest comments: the comments columns plus the parent comment row"""
+        return self.side_table('replies')
         
     def analyze_engagement(self):
         """Calculate engagement metrics"""
+        self.ensure_features('engagement')
         total_posts = len(self.df)
         total_likes = self.df['likesCount'].sum()
         total_comments = self.df['commentsCount'].sum()
@@ -30,12 +388,14 @@ class InstagramAnalyzer:
         avg_comments = self.df['commentsCount'].mean()
         
         # Engagement per post
-        self.df['engagement'] = self.df['likesCount'] + self.df['commentsCount']
         avg_engagement = self.df['engagement'].mean()
         
-        # Top and worst performing posts
-        top_posts = self.df.nlargest(5, 'engagement')[['caption', 'engagement', 'likesCount', 'commentsCount', 'timestamp']]
-        worst_posts = self.df.nsmallest(5, 'engagement')[['caption', 'engagement', 'likesCount', 'commentsCount', 'timestamp']]
+        # Top and worst performing posts: ranked on the engagement column alone,
+        # then only those rows are taken from the full frame
+        columns = ['caption', 'engagement', 'likesCount', 'commentsCount', 'timestamp']
+        top_posts = self.df.loc[self.df['engagement'].nlargest(5).index, columns]
+        worst_posts = self.df.loc[self.df['engagement'].nsmallest(5).index, columns]
+        scores = score_posts(self.df[['engagement']])
         
         return {
             'total_posts': total_posts,
@@ -45,15 +405,29 @@ class InstagramAnalyzer:
             'avg_comments': round(avg_comments, 2),
             'avg_engagement': round(avg_engagement, 2),
             'top_posts': top_posts,
-            'worst_posts': worst_posts
+            'worst_posts': worst_posts,
+            'percentiles': percentiles(self.df['engagement']),
+            'outliers': scores['outlier'].value_counts(sort=False).to_dict()
         }
     
+    def rank_posts(self, metric='engagement', k=5, by=None, bottom=False):
+        """Top (or bottom) k posts by metric, optionally per type, month or hashtag,
+        with each post's percentile and outlier flag"""
+        self.ensure_features('engagement')
+        columns = [column for column in RANK_COLUMNS + ['engagement'] if column in self.df.columns]
+        if metric not in columns:
+            columns.append(metric)
+        frame = self.df[columns]
+        ranked = top_k(frame, metric, k, by, self.hashtags if by == 'hashtag' else None, bottom)
+        return ranked.join(score_posts(frame, metric))
+    
     def analyze_content_types(self):
         """Analyze different content types"""
+        self.ensure_features('engagement', 'is_carousel')
         content_types = self.df['type'].value_counts().to_dict()
         
         # Carousel analysis
-        carousel_posts = self.df[self.df['childPosts'].apply(lambda x: len(x) > 0)]
+        carousel_posts = self.df[self.df['is_carousel']]
         carousel_engagement = carousel_posts['engagement'].mean() if len(carousel_posts) > 0 else 0
         
         return {
@@ -62,45 +436,39 @@ class InstagramAnalyzer:
             'carousel_avg_engagement': round(carousel_engagement, 2)
         }
     
-    def analyze_hashtags(self):
-        """Analyze hashtag usage and performance"""
-        all_hashtags = []
-        hashtag_engagement = {}
-        
-        for _, post in self.df.iterrows():
-            hashtags = post['hashtags']
-            engagement = post['engagement']
-            all_hashtags.extend(hashtags)
-            
-            for tag in hashtags:
-                if tag not in hashtag_engagement:
-                    hashtag_engagement[tag] = []
-                hashtag_engagement[tag].append(engagement)
-        
-        # Calculate average engagement per hashtag
-        hashtag_avg_engagement = {
-            tag: round(sum(engagements) / len(engagements), 2)
-            for tag, engagements in hashtag_engagement.items()
-        }
-        
-        # Sort by usage and engagement
-        hashtag_counts = Counter(all_hashtags)
-        top_hashtags = hashtag_counts.most_common(15)
-        top_performing_hashtags = sorted(hashtag_avg_engagement.items(), key=lambda x: x[1], reverse=True)[:10]
+    def analyze_hashtags(self, min_usage=1):
+        """Analyze hashtag usage and performance.
+
+        Works on an exploded post-hashtag frame; tags used fewer than
+        min_usage times are left out of top_performing.
+        """
+        self.ensure_features('engagement')
+        tags = self.hashtags
+        engagement = self.df['engagement'].to_numpy()[tags['post'].to_numpy()]
+        
+        # Per-tag stats in first-use order, so ties rank like Counter.most_common
+        stats = (pd.Series(engagement, index=tags['hashtag'])
+                 .groupby(level=0, sort=False, observed=True).agg(['count', 'mean', 'median', 'sum']))
+        stats.index.name = 'hashtag'
+        stats = stats.rename(columns={'sum': 'total_engagement', 'mean': 'avg_engagement',
+                                      'median': 'median_engagement'})
+        
+        # Sort by usage and engagement (stable sorts keep first-use order on ties)
+        top_hashtags = stats['count'].sort_values(ascending=False, kind='stable').head(15)
+        avg_engagement = pd.Series([round(value, 2) for value in stats['avg_engagement']], index=stats.index)
+        avg_engagement = avg_engagement[stats['count'] >= min_usage]
+        top_performing_hashtags = avg_engagement.sort_values(ascending=False, kind='stable').head(10)
         
         return {
-            'total_unique': len(hashtag_counts),
-            'top_used': top_hashtags,
-            'top_performing': top_performing_hashtags
+            'total_unique': len(stats),
+            'top_used': list(zip(top_hashtags.index.tolist(), top_hashtags.tolist())),
+            'top_performing': list(zip(top_performing_hashtags.index.tolist(), top_performing_hashtags.tolist())),
+            'stats': stats
         }
     
     def analyze_posting_patterns(self):
         """Analyze posting frequency and timing"""
-        self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
-        self.df['date'] = self.df['timestamp'].dt.date
-        self.df['hour'] = self.df['timestamp'].dt.hour
-        self.df['day_of_week'] = self.df['timestamp'].dt.day_name()
-        self.df['month'] = self.df['timestamp'].dt.month_name()
+        self.ensure_features('engagement', 'date', 'hour', 'day_of_week', 'month')
         
         # Posting frequency
         date_range = (self.df['timestamp'].max() - self.df['timestamp'].min()).days
@@ -113,36 +481,32 @@ class InstagramAnalyzer:
         # Best days
         day_engagement = self.df.groupby('day_of_week')['engagement'].mean().sort_values(ascending=False)
         
+        # Weekly trend with week-over-week changes
+        weekly = self.trends().week_over_week()
+        
         return {
             'date_range_days': date_range,
             'posts_per_week': round(posts_per_week, 2),
             'best_hours': best_hours,
             'best_days': day_engagement.head(),
-            'posting_by_month': self.df['month'].value_counts()
+            'posting_by_month': self.df['month'].value_counts(),
+            'weekly_trend': weekly.reset_index('account', drop=True).tail(TREND_WEEKS)
         }
     
+    def trends(self):
+        """Daily, weekly and monthly engagement time series of the loaded posts"""
+        if self._trends is None:
+            with self.profiler.stage('trends', rows=len(self.df)):
+                self._trends = EngagementTrends.from_posts(self.df, self.account_name)
+        return self._trends
+    
     def analyze_captions(self):
         """Analyze caption patterns and language"""
-        caption_lengths = self.df['caption'].str.len()
-        
-        # Language detection (simple approach - checking for Cyrillic vs Latin)
-        def detect_language(text):
-            if not text:
-                return 'unknown'
-            cyrillic = len(re.findall(r'[а-яА-ЯёЁ]', text))
-            latin = len(re.findall(r'[a-zA-Z]', text))
-            if cyrillic > latin:
-                return 'russian/uzbek_cyrillic'
-            elif latin > cyrillic:
-                return 'uzbek_latin/english'
-            else:
-                return 'mixed'
-        
-        self.df['language'] = self.df['caption'].apply(detect_language)
+        self.ensure_features('engagement', 'caption_length', 'language')
+        caption_lengths = self.df['caption_length']
         language_dist = self.df['language'].value_counts()
         
         # Caption length vs engagement
-        self.df['caption_length'] = caption_lengths
         length_categories = pd.cut(self.df['caption_length'], bins=[0, 500, 1000, 2000, 5000], 
                                   labels=['Short', 'Medium', 'Long', 'Very Long'])
         length_engagement = self.df.groupby(length_categories, observed=False)['engagement'].mean()
@@ -159,220 +523,291 @@ class InstagramAnalyzer:
         """Analyze comments and user interactions"""
         total_comments = self.df['commentsCount'].sum()
         posts_with_comments = len(self.df[self.df['commentsCount'] > 0])
+        comments = self.comments
         
-        # Extract all comments
-        all_comments = []
-        for _, post in self.df.iterrows():
-            if post['latestComments']:
-                all_comments.extend(post['latestComments'])
+        # Comment patterns (the account's own replies are not complaints)
+        from_audience = comments['ownerUsername'].astype(object) != self.account_name
+        questions = comments.loc[comments['is_question'], 'text'].tolist()
+        complaints = comments.loc[comments['is_complaint'] & from_audience, 'text'].tolist()
         
-        # Comment patterns
-        comment_texts = [c['text'] for c in all_comments if 'text' in c]
+        # Most active audience members (the account's own comments left out)
+        commenters = commenter_stats(comments)
+        audience = commenters[commenters.index != self.account_name]
         
-        # Common questions (contains ?)
-        questions = [c for c in comment_texts if '?' in c]
+        # How fast the audience comments and how fast the account answers
+        reply_hours, audience_comments = reply_latencies(comments, self.replies, self.account_name)
+        reply_latency = latency_distribution(reply_hours)
+        reply_latency['answered_rate'] = round(len(reply_hours) / audience_comments * 100, 2) if audience_comments else 0
         
         return {
             'total_comments': total_comments,
             'posts_with_comments': posts_with_comments,
             'comment_rate': round(posts_with_comments / len(self.df) * 100, 2),
             'sample_questions': questions[:5] if questions else [],
-            'total_questions': len(questions)
+            'total_questions': len(questions),
+            'sample_complaints': complaints[:5],
+            'total_complaints': len(complaints),
+            'unique_commenters': len(audience),
+            'top_commenters': list(zip(audience.index[:TOP_COMMENTERS], audience['comments'][:TOP_COMMENTERS].tolist())),
+            'comment_delay': latency_distribution(comment_delays(comments, self.df['timestamp'])),
+            'reply_latency': reply_latency,
+            'per_post': post_comment_stats(comments, len(self.df)).set_axis(
+                pd.Index(self.df['id'].astype(object), name='post_id')),
+            'commenters': commenters,
         }
     
-    def generate_report(self, output_file='instagram_analysis.md'):
-        """Generate comprehensive markdown report"""
-        engagement = self.analyze_engagement()
-        content = self.analyze_content_types()
-        hashtags = self.analyze_hashtags()
-        patterns = self.analyze_posting_patterns()
-        captions = self.analyze_captions()
-        comments = self.analyze_comments()
-        
-        report = f"""# Instagram Analysis Report: @{self.account_name}
-
-*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}*
-*Account: {self.full_name} (@{self.account_name})*
-
-## 📊 Executive Summary
-
-- **Total Posts Analyzed**: {engagement['total_posts']}
-- **Date Range**: {patterns['date_range_days']} days
-- **Average Engagement**: {engagement['avg_engagement']} interactions per post
-- **Posting Frequency**: {patterns['posts_per_week']} posts per week
-
-## 💹 Engagement Metrics
-
-### Overall Performance
-- **Total Likes**: {engagement['total_likes']:,}
-- **Total Comments**: {engagement['total_comments']:,}
-- **Average Likes per Post**: {engagement['avg_likes']}
-- **Average Comments per Post**: {engagement['avg_comments']}
-- **Engagement Rate**: ~{round((engagement['avg_engagement'] / 10000) * 100, 2)}% (assuming ~10K followers)
-
-### Top 5 Performing Posts
-"""
-        
-        # Add top posts
-        for idx, row in engagement['top_posts'].iterrows():
-            caption_preview = row['caption'][:100] + '...' if len(row['caption']) > 100 else row['caption']
-            report += f"\n{idx+1}. **{int(row['engagement'])} interactions** ({int(row['likesCount'])} likes, {int(row['commentsCount'])} comments)\n"
-            report += f"   - Caption: {caption_preview}\n"
-            report += f"   - Date: {pd.to_datetime(row['timestamp']).strftime('%Y-%m-%d') if pd.notna(row['timestamp']) else 'N/A'}\n"
-        
-        report += f"""
-
-## 📝 Content Analysis
-
-### Content Types Distribution
-"""
-        for content_type, count in content['types'].items():
-            percentage = round(count / engagement['total_posts'] * 100, 1)
-            report += f"- **{content_type}**: {count} posts ({percentage}%)\n"
-        
-        report += f"""
-- **Carousel Posts**: {content['carousel_count']} (avg engagement: {content['carousel_avg_engagement']})
-
-### Caption Analysis
-- **Average Caption Length**: {captions['avg_length']:.0f} characters
-- **Language Distribution**:
-"""
-        for lang, count in captions['language_distribution'].items():
-            report += f"  - {lang}: {count} posts\n"
-        
-        report += f"""
-
-### Caption Length vs Engagement
-"""
-        for length, eng in captions['length_vs_engagement'].items():
-            report += f"- **{length}**: {eng:.1f} avg engagement\n"
-        
-        report += f"""
-
-## #️⃣ Hashtag Analysis
-
-- **Total Unique Hashtags**: {hashtags['total_unique']}
-
-### Most Used Hashtags
-"""
-        for tag, count in hashtags['top_used'][:10]:
-            report += f"1. #{tag} - used {count} times\n"
-        
-        report += """
-
-### Best Performing Hashtags (by avg engagement)
-"""
-        for tag, avg_eng in hashtags['top_performing']:
-            report += f"1. #{tag} - {avg_eng} avg engagement\n"
+    def prepare_sections(self, keys):
+        """Build the derived columns, side tables and trends the given sections declare"""
+        for key in keys:
+            _, features, tables = SECTIONS[key]
+            self.ensure_features(*features)
+            for name in tables:
+                self.trends() if name == 'trends' else self.side_table(name)
+    
+    def compute_sections(self, workers=1):
+        """Run every analysis section over the loaded posts.
+
+        With workers > 1 the sections run in a thread pool once their inputs
+        are built; per-section profiler stages are only recorded serially.
+        """
+        self.prepare_sections(SECTIONS)
+        if workers <= 1:
+            sections = {}
+            for key, (method, _, _) in SECTIONS.items():
+                with self.profiler.stage(method, rows=len(self.df)):
+                    sections[key] = getattr(self, method)()
+            return sections
+        
+        with self.profiler.stage('compute_sections', rows=len(self.df)):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(getattr(self, method)) for key, (method, _, _) in SECTIONS.items()}
+                return {key: future.result() for key, future in futures.items()}
+    
+    def generate_report(self, output_file='instagram_analysis.md', sections=None):
+        """Generate comprehensive markdown report.
+
+        sections defaults to compute_sections(); pass AnalysisState.sections()
+        to render the report from persisted aggregates instead.
+        """
+        sections = sections or self.compute_sections()
+        return ''.join(render_report(sections, self.account_name, self.full_name))
+    
+    def save_report(self, output_file='instagram_analysis.md', sections=None, json_file=None, workers=1):
+        """Stream the report to file; with json_file the same sections are also exported as JSON"""
+        with self.profiler.stage('generate_report'):
+            sections = sections or self.compute_sections(workers)
+            with self.profiler.stage('write_report'):
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.writelines(render_report(sections, self.account_name, self.full_name))
+        print(f"Report saved to {output_file}")
+        if json_file:
+            with self.profiler.stage('export_sections_json'):
+                save_sections_json(sections, json_file, self.account_name, self.full_name)
+            print(f"Report sections exported to {json_file}")
         
-        report += f"""
-
-## 📅 Posting Patterns
-
-- **Posts per Week**: {patterns['posts_per_week']}
+    def export_data_summary(self, output_file='instagram_data_summary.csv'):
+        """Export summary data to CSV for further analysis"""
+        self.ensure_features('timestamp', 'engagement', 'caption_length', 'language', 'day_of_week', 'hour')
+        with self.profiler.stage('export_data_summary', rows=len(self.df)):
+            summary_df = self.df[['timestamp', 'type', 'likesCount', 'commentsCount', 'engagement', 
+                                 'caption_length', 'language', 'day_of_week', 'hour']]
+            summary_df.to_csv(output_file, index=False, encoding='utf-8')
+        print(f"Data summary exported to {output_file}")
 
-### Best Posting Times (by engagement)
-"""
-        for hour, stats in patterns['best_hours'].iterrows():
-            report += f"- **{hour}:00**: {stats['mean']:.1f} avg engagement ({int(stats['count'])} posts)\n"
-        
-        report += """
 
-### Best Days of Week
-"""
-        for day, eng in patterns['best_days'].items():
-            report += f"- **{day}**: {eng:.1f} avg engagement\n"
+    def summary(self):
+        """One-row account summary used for cross-account comparison"""
+        self.ensure_features('engagement', 'timestamp', 'is_carousel')
+        engagement = self.df['engagement']
+        timestamps = self.df['timestamp']
+        date_range = (timestamps.max() - timestamps.min()).days if len(timestamps) else 0
+        hashtags = self.hashtags['hashtag']
+        total_posts = len(self.df)
         
-        report += f"""
-
-## 💬 Comment Analysis
+        return {
+            'account': self.account_name,
+            'full_name': self.full_name,
+            'total_posts': total_posts,
+            'total_likes': int(self.df['likesCount'].sum()),
+            'total_comments': int(self.df['commentsCount'].sum()),
+            'avg_engagement': round(engagement.mean(), 2) if total_posts else 0,
+            'posts_per_week': round(total_posts / (date_range / 7), 2) if date_range > 0 else 0,
+            'carousel_share': round(self.df['is_carousel'].mean() * 100, 2) if total_posts else 0,
+            'comment_rate': round((self.df['commentsCount'] > 0).mean() * 100, 2) if total_posts else 0,
+            'top_hashtag': hashtags.value_counts().index[0] if len(hashtags) else ''
+        }
 
-- **Total Comments**: {comments['total_comments']}
-- **Posts with Comments**: {comments['posts_with_comments']} ({comments['comment_rate']}%)
-- **Questions in Comments**: {comments['total_questions']}
 
-### Sample Questions from Audience
-"""
-        for i, question in enumerate(comments['sample_questions'], 1):
-            report += f"{i}. {question}\n"
-        
-        report += """
-
-## 🎯 Key Insights & Recommendations
-
-### Strengths
-1. **Consistent Posting Schedule** - {:.1f} posts per week shows good consistency
-2. **High-Quality Content** - Average engagement of {:.0f} indicates resonating content
-3. **Strategic Hashtag Use** - {} unique hashtags shows diverse reach strategies
-
-### Areas for Improvement
-1. **Increase Comment Rate** - Only {:.1f}% of posts receive comments
-2. **Optimize Posting Times** - Focus on peak engagement hours
-3. **Content Diversification** - Experiment with different content types
-
-### Action Items
-- [ ] Create more carousel posts (higher engagement)
-- [ ] Respond to all questions in comments to boost engagement
-- [ ] Test posting during peak hours: {}:00-{}:00
-- [ ] Use top-performing hashtags more consistently
-- [ ] Increase caption length for better storytelling
-
----
-*Note: This analysis is based on public data. For complete insights including saves, shares, and reach, access to Instagram Insights is required.*
-""".format(
-            patterns['posts_per_week'],
-            engagement['avg_engagement'],
-            hashtags['total_unique'],
-            comments['comment_rate'],
-            patterns['best_hours'].index[0] if len(patterns['best_hours']) > 0 else 'N/A',
-            patterns['best_hours'].index[0] + 2 if len(patterns['best_hours']) > 0 else 'N/A'
-        )
-        
-        return report
+def find_account_files(pattern):
+    """Expand a directory or glob pattern into account dump files"""
+    path = Path(pattern)
+    if path.is_dir():
+        return sorted(list(path.glob('*.json')) + list(path.glob('*.jsonl')))
+    return sorted(Path(p) for p in glob.glob(pattern))
+
+
+def analyze_account(json_file, output_dir):
+    """Analyze one account dump, write its report and CSV, and return its summary row"""
+    analyzer = InstagramAnalyzer(json_file)
+    account_name = analyzer.account_name.replace('@', '')
+    output_file = str(Path(output_dir) / f"{account_name}_analysis.md")
+    analyzer.save_report(output_file)
+    analyzer.export_data_summary(output_file.replace('.md', '_data.csv'))
+    row = analyzer.summary()
+    row['source_file'] = str(json_file)
+    row['report_file'] = output_file
+    return row
+
+
+def analyze_accounts(json_files, output_dir='.', workers=None):
+    """Analyze many account dumps in a process pool.
+
+    Reports are written by the workers as each account finishes; the combined
+    cross-account summary is written to output_dir once all are done.
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    rows = []
+    failures = []
     
-    def save_report(self, output_file='instagram_analysis.md'):
-        """Save the report to file"""
-        report = self.generate_report()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_account, json_file, output_dir): json_file for json_file in json_files}
+        for future in as_completed(futures):
+            json_file = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"Error analyzing {json_file}: {e}")
+                failures.append(str(json_file))
+                continue
+            rows.append(row)
+            print(f"[{len(rows) + len(failures)}/{len(futures)}] @{row['account']} done")
+    
+    if rows:
+        summary_df = pd.DataFrame(rows).sort_values('avg_engagement', ascending=False)
+        summary_csv = Path(output_dir) / 'accounts_summary.csv'
+        summary_df.to_csv(summary_csv, index=False, encoding='utf-8')
+        save_summary_markdown(summary_df, Path(output_dir) / 'accounts_summary.md')
+        print(f"Cross-account summary saved to {summary_csv}")
+    
+    return rows, failures
+
+
+def save_summary_markdown(summary_df, output_file):
+    """Write the cross-account summary as a markdown table"""
+    columns = ['account', 'total_posts', 'avg_engagement', 'posts_per_week',
+               'carousel_share', 'comment_rate', 'top_hashtag']
+    lines = [
+        "# Cross-Account Instagram Summary",
+        "",
+        f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}*",
+        "",
+        "| " + " | ".join(columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for _, row in summary_df.iterrows():
+        lines.append("| " + " | ".join(str(row[column]) for column in columns) + " |")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def report_from_state(json_file, state_db, output_file=None, sections_file=None, profiler=DISABLED):
+    """Merge a dump into the stored state and write the report from the merged aggregates.
+
+    Only new and changed posts are analyzed; the per-post CSV summary is not
+    written, since the state keeps aggregates rather than the dump's posts.
+    """
+    from analysis_state import AnalysisState
+    first = peek_first_post(json_file) or {}
+    account = first.get('ownerUsername', 'Unknown')
+    full_name = first.get('ownerFullName', 'Unknown')
+    state = AnalysisState(state_db, account)
+    try:
+        with profiler.stage('state_merge'):
+            counts = state.merge(iter_posts(json_file))
+        print(f"State updated: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged']} unchanged posts")
+        with profiler.stage('state_sections'):
+            sections = state.sections()
+    finally:
+        state.close()
+
+    output_file = output_file or f"{account.replace('@', '')}_analysis.md"
+    with profiler.stage('write_report'):
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
-        print(f"Report saved to {output_file}")
-        
-    def export_data_summary(self, output_file='instagram_data_summary.csv'):
-        """Export summary data to CSV for further analysis"""
-        summary_df = self.df[['timestamp', 'type', 'likesCount', 'commentsCount', 'engagement', 
-                             'caption_length', 'language', 'day_of_week', 'hour']]
-        summary_df.to_csv(output_file, index=False, encoding='utf-8')
-        print(f"Data summary exported to {output_file}")
+            f.writelines(render_report(sections, account, full_name))
+    print(f"Report saved to {output_file}")
+    if sections_file:
+        with profiler.stage('export_sections_json'):
+            save_sections_json(sections, sections_file, account, full_name)
+        print(f"Report sections exported to {sections_file}")
 
 
 def main():
     """Main execution function"""
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_instagram.py <json_file> [output_file]")
+    args = sys.argv[1:]
+    profiler = StageProfiler.from_args(args, 'analysis_profile.json')
+    workers = None
+    if '--workers' in args:
+        idx = args.index('--workers')
+        workers = int(args[idx + 1])
+        del args[idx:idx + 2]
+    state_db = None
+    if '--state' in args:
+        idx = args.index('--state')
+        state_db = args[idx + 1]
+        del args[idx:idx + 2]
+    sections_file = None
+    if '--json' in args:
+        idx = args.index('--json')
+        sections_file = args[idx + 1]
+        del args[idx:idx + 2]
+    
+    if not args:
+        print("Usage: python analyze_instagram.py <json_file> [output_file] [--state <db_file>] [--json sections.json]")
+        print("       [--workers N]  (threads for the report sections)")
+        print("       python analyze_instagram.py <directory|glob> [output_dir] [--workers N]")
+        print("       [--profile report.json] [--profile-stage stage]")
         sys.exit(1)
     
-    json_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    json_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
+    
+    # Batch mode: a directory or a glob of account dumps
+    if Path(json_file).is_dir() or glob.has_magic(json_file):
+        json_files = find_account_files(json_file)
+        if not json_files:
+            print(f"Error: No account files match {json_file}")
+            sys.exit(1)
+        with profiler.stage('analyze_accounts', rows=len(json_files)):
+            _, failures = analyze_accounts(json_files, output_file or '.', workers)
+        profiler.save()
+        sys.exit(1 if failures else 0)
     
     if not Path(json_file).exists():
         print(f"Error: File {json_file} not found")
         sys.exit(1)
     
     try:
-        analyzer = InstagramAnalyzer(json_file)
+        # Incremental mode: merge this scrape into the stored aggregates and report from them
+        if state_db:
+            report_from_state(json_file, state_db, output_file, sections_file, profiler)
+            profiler.save()
+            return
+        
+        analyzer = InstagramAnalyzer(json_file, profiler=profiler)
         
-        if output_file:
-            analyzer.save_report(output_file)
-        else:
+        if not output_file:
             # Auto-generate filename based on account name
             account_name = analyzer.account_name.replace('@', '')
             output_file = f"{account_name}_analysis.md"
-            analyzer.save_report(output_file)
+        analyzer.save_report(output_file, json_file=sections_file, workers=workers or 1)
         
         # Also export CSV summary
         csv_file = output_file.replace('.md', '_data.csv')
         analyzer.export_data_summary(csv_file)
         
+        profiler.save()
+        
     except Exception as e:
         print(f"Error analyzing data: {e}")
         sys.exit(1)
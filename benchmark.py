@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmarks
+Times CLI startup, converter formats, analyzer sections and competitor reports
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_instagram_data import generate_search_results, write_dataset
+from pipeline_profiler import peak_rss_mb
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+SUITES = ['startup', 'convert', 'analyze', 'competitors']
+CONVERTER_FORMATS = {
+    'csv': 'to_flat_csv',
+    'detailed': 'to_detailed_csv',
+    'parquet': 'to_parquet',
+    'dataset': 'to_parquet_dataset',
+    'archive': 'to_archive',
+    'sqlite': 'to_sqlite',
+    'warehouse': 'to_warehouse',
+    'all': 'create_analysis_package',
+}
+ANALYZER_SECTIONS = [
+    'load', 'analyze_engagement', 'analyze_content_types', 'analyze_hashtags',
+    'analyze_posting_patterns', 'analyze_captions', 'analyze_comments', 'generate_report',
+]
+# Cold-start cases: fresh interpreter running this code from the repo directory
+STARTUP_CASES = {
+    'interpreter': 'pass',
+    'main --help': "import main\ntry:\n    main.main(['--help'])\nexcept SystemExit:\n    pass",
+    'import convert_instagram_data': 'import convert_instagram_data',
+    'import analyze_competitors': 'import analyze_competitors',
+    'import analyze_instagram': 'import analyze_instagram',
+}
+STARTUP_RUNS = 5
+# One crawl result per this many posts, so competitor runs scale with the size
+POSTS_PER_SEARCH_RESULT = 10
+# A case regresses when it is this much slower than the baseline and by more than the noise floor
+REGRESSION_THRESHOLD = 1.25
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def prepare_case(suite, case, json_file, size, work_dir):
+    """Build everything a case needs and return (callable to time, rows processed)"""
+    if suite == 'convert':
+        from convert_instagram_data import InstagramDataConverter
+        converter = InstagramDataConverter(json_file)
+        target = str(Path(work_dir) / f"{case}_{size}")
+        return lambda: getattr(converter, CONVERTER_FORMATS[case])(target), size
+
+    if suite == 'analyze':
+        from analyze_instagram import InstagramAnalyzer
+        if case == 'load':
+            return lambda: InstagramAnalyzer(json_file), size
+        analyzer = InstagramAnalyzer(json_file)
+        if case == 'generate_report':
+            report_file = str(Path(work_dir) / f"report_{size}.md")
+            return lambda: analyzer.generate_report(report_file), size
+        return getattr(analyzer, case), size
+
+    if suite == 'competitors':
+        from analyze_competitors import process_search_results
+        n_results = max(1, size // POSTS_PER_SEARCH_RESULT)
+        results = list(generate_search_results(n_results))
+        return lambda: process_search_results(results, 'Benchmark'), n_results
+
+    raise ValueError(f"Unknown suite: {suite}")
+
+
+def run_case(suite, case, json_file, size, work_dir):
+    """Run one case (in its own process) and return its measurements"""
+    measurement = {'suite': suite, 'case': case, 'posts': size}
+    try:
+        with redirect_stdout(io.StringIO()):
+            call, rows = prepare_case(suite, case, json_file, size, work_dir)
+            rss_before = peak_rss_mb()
+            start = time.perf_counter()
+            call()
+            measurement['wall_s'] = round(time.perf_counter() - start, 4)
+    except Exception as e:
+        measurement['error'] = f"{type(e).__name__}: {e}"
+        return measurement
+
+    peak = peak_rss_mb()
+    measurement['rows'] = rows
+    measurement['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+    measurement['rss_growth_mb'] = round(peak - rss_before, 1) if peak is not None else None
+    return measurement
+
+
+def run_startup(runs=STARTUP_RUNS):
+    """Time cold starts of the CLI and script imports; the best of several runs is kept"""
+    results = []
+    repo_dir = Path(__file__).resolve().parent
+    check = "\nimport sys\nsys.stderr.write(str('pandas' in sys.modules))"
+    for case, code in STARTUP_CASES.items():
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, '-c', code + check], cwd=repo_dir,
+                                       capture_output=True, text=True)
+            timings.append(time.perf_counter() - start)
+        measurement = {'suite': 'startup', 'case': case, 'posts': 0}
+        if completed.returncode:
+            measurement['error'] = completed.stderr.strip().splitlines()[-1]
+        else:
+            measurement.update({
+                'wall_s': round(min(timings), 4),
+                'rows': 0,
+                'peak_rss_mb': None,
+                'rss_growth_mb': None,
+                'imports_pandas': completed.stderr.strip().endswith('True'),
+            })
+        print_measurement(measurement)
+        results.append(measurement)
+    return results
+
+
+def iter_cases(suites):
+    """(suite, case) pairs in run order"""
+    for suite in suites:
+        if suite == 'startup':
+            continue
+        if suite == 'convert':
+            cases = CONVERTER_FORMATS
+        elif suite == 'analyze':
+            cases = ANALYZER_SECTIONS
+        else:
+            cases = ['process_search_results']
+        for case in cases:
+            yield suite, case
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, suites=SUITES, repeat=1, data_dir=None):
+    """Run every case at every size; each run gets a fresh process so peak RSS is its own.
+
+    With repeat > 1 the fastest wall time and the highest peak are kept.
+    Generated datasets are reused from data_dir when given.
+    """
+    results = run_startup() if 'startup' in suites else []
+    sizes = sizes if any(suite != 'startup' for suite in suites) else []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(data_dir or tmp_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+        for size in sizes:
+            json_file = data_dir / f"synthetic_{size}.json"
+            if not json_file.exists():
+                print(f"📝 Generating {size:,} posts...")
+                write_dataset(json_file, size)
+
+            for suite, case in iter_cases(suites):
+                best = None
+                for _ in range(repeat):
+                    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+                        with ProcessPoolExecutor(max_workers=1) as pool:
+                            measurement = pool.submit(run_case, suite, case, str(json_file), size,
+                                                      work_dir).result()
+                    if 'error' in measurement or best is None:
+                        best = measurement
+                    else:
+                        best['wall_s'] = min(best['wall_s'], measurement['wall_s'])
+                        if measurement['peak_rss_mb'] is not None:
+                            best['peak_rss_mb'] = max(best['peak_rss_mb'], measurement['peak_rss_mb'])
+                            best['rss_growth_mb'] = max(best['rss_growth_mb'], measurement['rss_growth_mb'])
+                    if 'error' in best:
+                        break
+                print_measurement(best)
+                results.append(best)
+    return results
+
+
+def print_measurement(m):
+    label = f"{m['suite']:<12}{m['case']:<28}{m['posts']:>10,}"
+    if 'error' in m:
+        print(f"{label}  ❌ {m['error']}")
+        return
+    peak = f"{m['peak_rss_mb']:>9.1f} MB" if m['peak_rss_mb'] is not None else ''
+    pandas_note = '  (imports pandas)' if m.get('imports_pandas') else ''
+    print(f"{label}{m['wall_s']:>10.3f} s{peak}{pandas_note}")
+
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Cases that got slower than the baseline run by more than threshold"""
+    previous = {(m['suite'], m['case'], m['posts']): m for m in baseline if 'wall_s' in m}
+    regressions = []
+    for m in results:
+        old = previous.get((m['suite'], m['case'], m['posts']))
+        if old is None or 'wall_s' not in m:
+            continue
+        if m['wall_s'] > old['wall_s'] * threshold and m['wall_s'] - old['wall_s'] > NOISE_FLOOR_SECONDS:
+            regressions.append({**m, 'baseline_wall_s': old['wall_s'],
+                                'slowdown': round(m['wall_s'] / old['wall_s'], 2)})
+    return regressions
+
+
+def save_results(results, output_file, sizes):
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': sizes,
+        'results': results,
+    }
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output_file}")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {}
+    for flag in ['--sizes', '--suites', '--repeat', '--output', '--compare', '--data-dir']:
+        if flag in args:
+            idx = args.index(flag)
+            options[flag] = args[idx + 1]
+            del args[idx:idx + 2]
+    if args:
+        print("Usage: python benchmark.py [--sizes 1000,10000,100000] [--suites startup,convert,analyze,competitors]")
+        print("       [--repeat N] [--output benchmark_results.json] [--compare baseline.json] [--data-dir DIR]")
+        sys.exit(1)
+
+    sizes = [int(size) for size in options.get('--sizes', ','.join(map(str, DEFAULT_SIZES))).split(',')]
+    suites = options.get('--suites', ','.join(SUITES)).split(',')
+    unknown = [suite for suite in suites if suite not in SUITES]
+    if unknown:
+        print(f"Unknown suites: {', '.join(unknown)}")
+        print(f"Available suites: {', '.join(SUITES)}")
+        sys.exit(1)
+
+    print(f"{'suite':<12}{'case':<28}{'posts':>10}{'wall':>12}{'peak RSS':>12}")
+    results = run_benchmarks(sizes, suites, int(options.get('--repeat', 1)), options.get('--data-dir'))
+    save_results(results, options.get('--output', 'benchmark_results.json'), sizes)
+
+    if '--compare' in options:
+        with open(options['--compare'], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regression(s) against {options['--compare']}:")
+            for m in regressions:
+                print(f"   {m['suite']} {m['case']} @ {m['posts']:,}: "
+                      f"{m['baseline_wall_s']:.3f} s → {m['wall_s']:.3f} s ({m['slowdown']}x)")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {options['--compare']}")
+
+
+if __name__ == "__main__":
+    main()
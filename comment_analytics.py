@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Instagram Comment Analytics
+Question and complaint detection, per-post and per-commenter aggregates and
+response-latency distributions over the analyzer's flat comment tables
+"""
+
+import numpy as np
+import pandas as pd
+
+# Patterns are kept to the syntax shared by Python re and RE2, so pandas can
+# run them inside pyarrow on Arrow-backed string columns
+LEADING_MENTIONS = r'^(?:\s*@[A-Za-z0-9_.]+)*\s*'
+QUESTION_WORDS = [
+    # Russian
+    'где', 'как', 'какой', 'какая', 'какие', 'сколько', 'когда', 'почему', 'зачем', 'можно',
+    'есть ли', 'подскажите', 'скажите',
+    # Uzbek (Latin and Cyrillic)
+    'qayerda', 'qayerdan', 'qancha', 'qanday', 'qachon', 'nega', 'nima', 'necha', 'qaysi',
+    'қаерда', 'қанча', 'қандай', 'нега', 'нима', 'қайси',
+    # English
+    'where', 'how', 'what', 'when', 'why', 'which', 'can i', 'is there',
+]
+# Stems match at the start of a word ('аллерги' covers аллергия, аллергии).
+# RE2's \b only knows ASCII letters, so the word start is spelled out.
+WORD_START = r"(?:^|[^0-9a-zа-яёўқғҳʻ'‘’`_])"
+COMPLAINT_STEMS = [
+    # Russian
+    'не работает', 'не могу найти', 'нет в наличии', 'плохо', 'ужас', 'жалоб', 'верните', 'обман',
+    'брак(?:а|е|у|ом)?(?:$|[^а-яё])', 'бракован', 'просроч', 'разочаров',  # not бракосочетание
+    # Uzbek
+    'yomon', 'shikoyat', 'topilmayapti', 'noqulay', 'noquley', 'sifatsiz', 'aldash', 'ёмон',
+    # English
+    'worst', 'terrible', 'refund', 'complaint', 'expired', 'broken',
+]
+# Symptoms also appear in thank-you notes ("rahmat, toshma o'tib ketdi"),
+# so they only count as complaints in comments without thanks
+SYMPTOM_STEMS = [
+    'аллерги', 'сыпь', 'запор', 'вздути',
+    'allergiya', 'toshma', 'qabziyat',
+    'allerg',
+]
+THANKS_STEMS = ['спасибо', 'благодар', 'rahmat', 'raxmat', 'рахмат', 'раҳмат', 'thank']
+
+
+def stem_pattern(stems):
+    """Case-insensitive pattern matching any of the stems at the start of a word"""
+    return '(?i)' + WORD_START + '(?:' + '|'.join(stems) + ')'
+
+
+QUESTION_PATTERN = (r'(?i)\?|' + LEADING_MENTIONS + '(?:' + '|'.join(QUESTION_WORDS) + r')(?:[\s,.!:]|$)')
+COMPLAINT_PATTERN = stem_pattern(COMPLAINT_STEMS)
+SYMPTOM_PATTERN = stem_pattern(SYMPTOM_STEMS)
+THANKS_PATTERN = stem_pattern(THANKS_STEMS)
+
+# Response time buckets in hours
+LATENCY_BUCKETS = [0, 1, 6, 24, 72, np.inf]
+LATENCY_LABELS = ['<1h', '1-6h', '6-24h', '1-3d', '>3d']
+TOP_COMMENTERS = 10
+
+
+def classify_comments(comments):
+    """Add is_question and is_complaint columns to a comments or replies table (in place).
+
+    A question is a question mark anywhere or a comment opening with a question
+    word (after any @mentions); the original report only looked for '?'. A
+    complaint has a complaint stem, or a symptom stem without thanks.
+    """
+    texts = comments['text']
+
+    def contains(pattern):
+        return texts.str.contains(pattern, regex=True, na=False).astype(bool)
+
+    comments['is_question'] = contains(QUESTION_PATTERN)
+    comments['is_complaint'] = contains(COMPLAINT_PATTERN) | (contains(SYMPTOM_PATTERN) & ~contains(THANKS_PATTERN))
+    return comments
+
+
+def post_comment_stats(comments, n_posts):
+    """Per-post aggregates indexed by post row: comments, commenters, questions, complaints, likes"""
+    stats = comments.groupby('post').agg(
+        comments=('post', 'size'),
+        commenters=('ownerUsername', 'nunique'),
+        questions=('is_question', 'sum'),
+        complaints=('is_complaint', 'sum'),
+        likes=('likesCount', 'sum'),
+    )
+    return stats.reindex(range(n_posts), fill_value=0).astype('int64')
+
+
+def commenter_stats(comments):
+    """Per-commenter aggregates, most active first"""
+    stats = comments.groupby('ownerUsername', observed=True, sort=False).agg(
+        comments=('post', 'size'),
+        posts=('post', 'nunique'),
+        questions=('is_question', 'sum'),
+        complaints=('is_complaint', 'sum'),
+        likes=('likesCount', 'sum'),
+        first_comment=('timestamp', 'min'),
+        last_comment=('timestamp', 'max'),
+    )
+    stats.index = stats.index.astype(object)
+    stats.index.name = 'commenter'
+    return stats.sort_values('comments', ascending=False, kind='stable')
+
+
+def latency_distribution(hours):
+    """Count, median, 90th percentile and bucket counts of response times in hours"""
+    hours = pd.Series(hours, dtype=float).dropna()
+    hours = hours[hours >= 0]
+    buckets = pd.cut(hours, bins=LATENCY_BUCKETS, labels=LATENCY_LABELS, right=False)
+    return {
+        'count': len(hours),
+        'median_hours': round(float(hours.median()), 1) if len(hours) else None,
+        'p90_hours': round(float(hours.quantile(0.9)), 1) if len(hours) else None,
+        'buckets': buckets.value_counts(sort=False).to_dict(),
+    }
+
+
+def utc_values(timestamps):
+    """datetime64 values of a (possibly tz-aware) timestamp column"""
+    if getattr(timestamps.dt, 'tz', None) is not None:
+        timestamps = timestamps.dt.tz_convert(None)
+    return timestamps.to_numpy()
+
+
+def comment_delays(comments, post_timestamps):
+    """Hours from publication to each comment"""
+    published = utc_values(post_timestamps)[comments['post'].to_numpy()]
+    return (utc_values(comments['timestamp']) - published) / np.timedelta64(1, 'h')
+
+
+def reply_latencies(comments, replies, account):
+    """Hours until the account's first reply, for audience comments it answered.
+
+    Returns (latencies, audience comment count).
+    """
+    audience = comments['ownerUsername'].astype(object) != account
+    own_replies = replies[replies['ownerUsername'].astype(object) == account]
+    first_reply = own_replies.groupby('comment')['timestamp'].min()
+    first_reply = first_reply[audience.to_numpy()[first_reply.index.to_numpy()]]
+    asked = utc_values(comments['timestamp'])[first_reply.index.to_numpy()]
+    latencies = (utc_values(first_reply) - asked) / np.timedelta64(1, 'h')
+    return latencies, int(audience.sum())
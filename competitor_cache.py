@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Кэш извлечения для результатов поиска конкурентов
+и поиск почти одинаковых текстов
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from instagram_io import iter_batches
+
+# Предел размера кэша (сумма размеров записей в байтах); при превышении
+# удаляются давно не использованные записи, пока кэш не сократится до EVICT_TO
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+EVICT_TO = 0.9
+# Результатов в одном обращении к кэшу
+CACHE_BATCH_SIZE = 1024
+
+# Отпечаток текста - 64-битный SimHash по шинглам из SHINGLE_BYTES байт.
+# В отпечаток идет примерно каждый 2**(64 - SAMPLE_SHIFT)-й шингл, причем
+# выбор зависит только от содержимого шингла, поэтому у похожих текстов
+# выбираются одни и те же шинглы.
+SHINGLE_BYTES = 16
+SAMPLE_SHIFT = 61
+HASH_BASE = 0x100000001b3
+HASH_MIX = 0xff51afd7ed558ccd
+# Тексты, отпечатки которых различаются не более чем в стольких битах, - дубликаты
+NEAR_DUPLICATE_BITS = 3
+
+CACHE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS extractions (
+        url TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        version TEXT NOT NULL,
+        extracted TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_used INTEGER NOT NULL,
+        PRIMARY KEY (url, content_hash)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions (last_used)',
+    'CREATE TEMP TABLE IF NOT EXISTS incoming_keys (url TEXT, content_hash TEXT, PRIMARY KEY (url, content_hash))',
+]
+
+_hash_powers = None
+
+
+def _powers(size: int):
+    """Степени основания хэша и обратного к нему по модулю 2**64 (не короче size)"""
+    global _hash_powers
+    if _hash_powers is None or len(_hash_powers[0]) < size:
+        import numpy as np
+        length = max(size, 2 * len(_hash_powers[0]) if _hash_powers else 4096)
+        tables = []
+        for base in (HASH_BASE, pow(HASH_BASE, -1, 2 ** 64)):
+            powers = np.ones(length, dtype=np.uint64)
+            np.cumprod(np.full(length - 1, base, dtype=np.uint64), out=powers[1:])
+            tables.append(powers)
+        _hash_powers = tuple(tables)
+    return _hash_powers
+
+
+def text_fingerprint(text: str):
+    """SimHash текста (int) или None, если текст короче одного шингла.
+
+    Хэши всех шинглов считаются разом через префиксные суммы
+    полиномиального хэша, без цикла по словам.
+    """
+    import numpy as np
+    data = np.frombuffer(text.lower().encode('utf-8'), dtype=np.uint8)
+    count = len(data) - SHINGLE_BYTES + 1
+    if count <= 0:
+        return None
+    powers, inverse = _powers(len(data))
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data * powers[:len(data)], out=prefix[1:])
+    # Хэш шингла, начинающегося с i: (prefix[i + K] - prefix[i]) / base**i
+    hashes = (prefix[SHINGLE_BYTES:] - prefix[:count]) * inverse[:count]
+    sampled = hashes[hashes >> np.uint64(SAMPLE_SHIFT) == 0]
+    hashes = (sampled if len(sampled) else hashes) * np.uint64(HASH_MIX)
+    hashes ^= hashes >> np.uint64(33)
+    votes = np.unpackbits(hashes.astype('<u8', copy=False).view(np.uint8)).reshape(-1, 64).sum(axis=0)
+    return int.from_bytes(np.packbits(votes * 2 > len(hashes)).tobytes(), 'big')
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, str]:
+    """Ключ кэша результата: (url, хэш текста)"""
+    text = result.get('text') or ''
+    return result.get('url', ''), hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class DuplicateIndex:
+    """Поиск почти одинаковых текстов по отпечаткам.
+
+    Отпечаток делится на max_bits + 1 полос: у отпечатков, различающихся
+    не более чем в max_bits битах, хотя бы одна полоса совпадает, поэтому
+    сравниваются только отпечатки с общей полосой.
+    """
+
+    def __init__(self, max_bits: int = NEAR_DUPLICATE_BITS):
+        self.max_bits = max_bits
+        bands = max_bits + 1
+        bounds = [64 * i // bands for i in range(bands + 1)]
+        self.bands = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        self.tables = [{} for _ in self.bands]
+
+    def find_or_add(self, fingerprint, item):
+        """Возвращает item ранее добавленного похожего текста; иначе запоминает этот и возвращает None"""
+        if fingerprint is None:
+            return None
+        keys = [(fingerprint >> start) & mask for start, mask in self.bands]
+        for table, key in zip(self.tables, keys):
+            for other, other_item in table.get(key, ()):
+                if (other ^ fingerprint).bit_count() <= self.max_bits:
+                    return other_item
+        for table, key in zip(self.tables, keys):
+            table.setdefault(key, []).append((fingerprint, item))
+        return None
+
+
+class ExtractionCache:
+    """Извлеченные данные результатов поиска, сохраненные в SQLite.
+
+    Записи ищутся по (url, хэш текста) и действительны только для той же
+    версии настроек извлечения. Каждое обращение помечает записи номером
+    пачки; при превышении max_bytes удаляются записи с самыми старыми
+    номерами (LRU).
+    """
+
+    def __init__(self, db_file: str, version: str, max_bytes: int = DEFAULT_CACHE_BYTES,
+                 batch_size: int = CACHE_BATCH_SIZE):
+        import sqlite3
+        from instagram_writers import SQLITE_PRAGMAS
+        self.db_file = db_file
+        self.version = version
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(db_file, isolation_level=None)
+        for pragma in SQLITE_PRAGMAS:
+            self.conn.execute(pragma)
+        for statement in CACHE_SCHEMA:
+            self.conn.execute(statement)
+        self.size, self.tick = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM extractions'
+        ).fetchone()
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Найденные в кэше записи по ключам; найденные помечаются как использованные"""
+        conn = self.conn
+        self.tick += 1
+        conn.execute('BEGIN')
+        try:
+            conn.execute('DELETE FROM incoming_keys')
+            conn.executemany('INSERT OR IGNORE INTO incoming_keys VALUES (?, ?)', keys)
+            rows = conn.execute(
+                'SELECT e.url, e.content_hash, e.extracted FROM extractions e '
+                'JOIN incoming_keys i ON e.url = i.url AND e.content_hash = i.content_hash '
+                'WHERE e.version = ?', (self.version,)
+            ).fetchall()
+            conn.executemany('UPDATE extractions SET last_used = ? WHERE url = ? AND content_hash = ?',
+                             ((self.tick, url, content_hash) for url, content_hash, _ in rows))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return {(url, content_hash): json.loads(extracted) for url, content_hash, extracted in rows}
+
+    def put_many(self, entries: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Сохраняет извлеченные данные; при превышении предела вытесняет старые записи"""
+        rows = []
+        for (url, content_hash), extracted in entries.items():
+            data = json.dumps(extracted, ensure_ascii=False)
+            rows.append((url, content_hash, self.version, data, len(data.encode('utf-8')), self.tick))
+        conn = self.conn
+        conn.execute('BEGIN')
+        try:
+            # Записи другой версии настроек заменяются; их размер больше не учитывается
+            replaced = 0
+            for url, content_hash, *_ in rows:
+                old = conn.execute('SELECT size FROM extractions WHERE url = ? AND content_hash = ?',
+                                   (url, content_hash)).fetchone()
+                if old:
+                    replaced += old[0]
+            conn.executemany('INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.size += sum(row[4] for row in rows) - replaced
+        if self.max_bytes and self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока кэш не сократится до EVICT_TO от предела.
+
+        Записи текущей пачки не удаляются, даже если одна пачка больше предела.
+        """
+        conn = self.conn
+        # Записи от самых свежих к старым; удаляются те, на которых накопленный размер превышает цель
+        conn.execute(
+            'DELETE FROM extractions WHERE last_used < ? AND rowid IN ('
+            '    SELECT rowid FROM ('
+            '        SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC, rowid DESC) AS kept FROM extractions'
+            '    ) WHERE kept > ?'
+            ')',
+            (self.tick, int(self.max_bytes * EVICT_TO))
+        )
+        self.size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM extractions').fetchone()[0]
+
+    def iter_extracted(self, results: Iterable[Dict[str, Any]],
+                       extract: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+        """Извлеченные данные в порядке результатов; extract получает только промахи кэша.
+
+        Повторы одной страницы внутри пачки извлекаются один раз.
+        """
+        for batch in iter_batches(results, self.batch_size):
+            keys = [result_key(result) for result in batch]
+            found = self.get_many(keys)
+            missing = {}
+            for key, result in zip(keys, batch):
+                if key not in found:
+                    missing.setdefault(key, result)
+            if missing:
+                fresh = dict(zip(missing, extract(list(missing.values()))))
+                self.put_many(fresh)
+                found.update(fresh)
+            self.misses += len(missing)
+            self.hits += len(batch) - len(missing)
+            for key in keys:
+                yield found[key]
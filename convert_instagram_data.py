@@ -4,262 +4,369 @@ Instagram Data Converter
 Converts Instagram JSON data to multiple formats for different analysis needs
 """
 
-import json
-import pandas as pd
-import sqlite3
 from pathlib import Path
 from datetime import datetime
+import os
+import shutil
 import sys
+import uuid
+
+from instagram_io import ARCHIVE_INDEX_SUFFIX, DEFAULT_BATCH_SIZE, iter_posts, peek_first_post
+from instagram_tables import iter_normalized
+from instagram_writers import (
+    ARCHIVE_EXTENSIONS, DEFAULT_ROW_GROUP_SIZE, DetailedCSVWriter, FlatCSVWriter, ParquetDatasetWriter,
+    ParquetWriter, RawArchiveWriter, RawJSONWriter, SQLiteWarehouseWriter, SQLiteWriter
+)
+from pipeline_profiler import DISABLED, StageProfiler
+
+# Analysis package artifacts: writer class, path inside the package, writer options
+PACKAGE_WRITERS = [
+    (RawJSONWriter, 'raw_data.json', {}),
+    (FlatCSVWriter, 'metrics.csv', {}),
+    (DetailedCSVWriter, 'detailed', {}),
+    (ParquetWriter, 'data.parquet', {}),
+    (SQLiteWriter, 'data.db', {}),
+]
+
+
+def package_writers(archive=None):
+    """Package writers; archive='gzip'/'zstd' replaces raw_data.json with a compressed archive"""
+    if not archive:
+        return PACKAGE_WRITERS
+    raw = (RawArchiveWriter, f"raw_data{ARCHIVE_EXTENSIONS[archive]}", {'compression': archive})
+    return [raw] + PACKAGE_WRITERS[1:]
+
+
+# Batches queued per writer thread ahead of the slowest writer
+PENDING_BATCHES = 4
+
+
+def copy_artifact(source, target):
+    """Copy a package file or directory"""
+    if Path(source).is_dir():
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+
+def remove_artifact(path):
+    if Path(path).is_dir():
+        shutil.rmtree(path)
+    elif Path(path).exists():
+        os.remove(path)
+
+
+def remove_package(path, name):
+    """Delete a replaced package: a directory, or a symlink and the versioned directory it points to"""
+    if path.is_symlink():
+        target = path.parent / os.readlink(path)
+        os.remove(path)
+        if target.name.startswith(f".{name}.v-"):
+            shutil.rmtree(target, ignore_errors=True)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def replace_directory(staging_dir, output_dir, symlink=False):
+    """Publish a finished staging directory at output_dir.
+
+    The old package is renamed aside and the staging directory renamed into
+    its place. Each rename is atomic, so readers see the complete old or
+    new package; output_dir is missing only between the two renames.
+
+    With symlink=True, output_dir is instead a symlink to a versioned
+    sibling directory (.<name>.v-<id>), and a new symlink is renamed over
+    it, so output_dir never goes missing. This needs symlink support (on
+    Windows, the symlink privilege).
+    """
+    output_dir = Path(output_dir)
+    previous = None
+    if symlink:
+        version_dir = output_dir.with_name(f".{output_dir.name}.v-{uuid.uuid4().hex[:8]}")
+        os.replace(staging_dir, version_dir)
+        if output_dir.is_symlink():
+            target = output_dir.parent / os.readlink(output_dir)
+            if target.name.startswith(f".{output_dir.name}.v-"):
+                previous = target
+        elif output_dir.exists():
+            # A plain directory has to be moved aside once before the first link
+            previous = output_dir.with_name(f".{output_dir.name}.old-{uuid.uuid4().hex[:8]}")
+            os.replace(output_dir, previous)
+        link = output_dir.with_name(f".{output_dir.name}.link-{uuid.uuid4().hex[:8]}")
+        os.symlink(version_dir.name, link)
+        os.replace(link, output_dir)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+        return
+    if output_dir.exists() or output_dir.is_symlink():
+        previous = output_dir.with_name(f".{output_dir.name}.old-{uuid.uuid4().hex[:8]}")
+        os.replace(output_dir, previous)
+    os.replace(staging_dir, output_dir)
+    if previous:
+        remove_package(previous, output_dir.name)
+
 
 class InstagramDataConverter:
-    def __init__(self, json_file):
-        """Initialize with JSON data"""
-        with open(json_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
-        self.account_name = self.data[0]['ownerUsername'] if self.data else 'unknown'
+    def __init__(self, json_file, batch_size=DEFAULT_BATCH_SIZE, profiler=None):
+        """Initialize with a JSON or JSON Lines dump; posts are streamed on demand"""
+        self.json_file = json_file
+        self.batch_size = batch_size
+        self.profiler = profiler or DISABLED
+        first_post = peek_first_post(json_file)
+        self.account_name = (first_post.get('ownerUsername') if first_post else None) or 'unknown'
+
+    def iter_posts(self):
+        """Stream raw posts from the source dump"""
+        return iter_posts(self.json_file)
+
+    def iter_normalized(self):
+        """Stream the dump as normalized posts/hashtags/comments/child_posts batches"""
+        return iter_normalized(self.iter_posts(), self.batch_size)
+
+    def write(self, writers, optional=()):
+        """Feed every writer from one pass over the data.
+
+        Failures of writers listed in optional are reported and that writer is
+        dropped; the remaining writers keep going. Returns {writer name: error}
+        for the dropped writers.
+        """
+        writers = list(writers)
+        failures = {}
+        profiler = self.profiler
+        batches = self.iter_normalized()
+        while True:
+            # JSON parsing and normalization happen while pulling the next batch
+            with profiler.stage('read_normalize') as stage:
+                batch = next(batches, None)
+                if batch is not None:
+                    stage.add_rows(len(batch))
+            if batch is None:
+                break
+            for writer in list(writers):
+                try:
+                    with profiler.stage(f"write:{writer.name}", rows=len(batch)):
+                        writer.write(batch)
+                except Exception as e:
+                    if writer not in optional:
+                        for other in writers:
+                            if hasattr(other, 'abort'):
+                                other.abort()
+                        raise
+                    if not writer.quiet:
+                        print(f"⚠️  {writer.name} creation skipped: {e}")
+                    failures[writer.name] = e
+                    if hasattr(writer, 'abort'):
+                        writer.abort()
+                    writers.remove(writer)
+        for writer in writers:
+            with profiler.stage(f"write:{writer.name}"):
+                writer.close()
+        return failures
+
+    def write_threaded(self, writers, optional=()):
+        """Like write(), but every writer consumes the batches in its own thread.
+
+        The dump is still parsed and normalized once in this thread; batches
+        are handed to the writers through bounded queues, so writers overlap
+        with parsing and with each other wherever they release the GIL
+        (compression, SQLite, Arrow). Writers are closed here once all
+        batches are written.
+        """
+        import queue
+        import threading
+
+        writers = list(writers)
+        errors = {}
+
+        def consume(writer, batches):
+            try:
+                while (batch := batches.get()) is not None:
+                    writer.write(batch)
+            except Exception as e:
+                errors[writer] = e
+                # Keep draining so the reader never blocks on this queue
+                while batches.get() is not None:
+                    pass
+
+        queues = {writer: queue.Queue(maxsize=PENDING_BATCHES) for writer in writers}
+        threads = [threading.Thread(target=consume, args=item, daemon=True) for item in queues.items()]
+        for thread in threads:
+            thread.start()
+        try:
+            batches = self.iter_normalized()
+            while True:
+                with self.profiler.stage('read_normalize') as stage:
+                    batch = next(batches, None)
+                    if batch is not None:
+                        stage.add_rows(len(batch))
+                if batch is None:
+                    break
+                for writer, pending in queues.items():
+                    if writer not in errors:
+                        pending.put(batch)
+        finally:
+            for pending in queues.values():
+                pending.put(None)
+            for thread in threads:
+                thread.join()
+
+        failures = {}
+        for writer, error in errors.items():
+            if writer not in optional:
+                for other in writers:
+                    if hasattr(other, 'abort'):
+                        other.abort()
+                raise error
+        for writer, error in errors.items():
+            if not writer.quiet:
+                print(f"⚠️  {writer.name} creation skipped: {error}")
+            failures[writer.name] = error
+            if hasattr(writer, 'abort'):
+                writer.abort()
+            writers.remove(writer)
+        for writer in writers:
+            with self.profiler.stage(f"write:{writer.name}"):
+                writer.close()
+        return failures
         
     def to_flat_csv(self, output_file=None):
         """Convert to flat CSV for basic metrics analysis"""
         if not output_file:
             output_file = f"{self.account_name}_metrics.csv"
-            
-        # Extract flat data
-        flat_data = []
-        for post in self.data:
-            flat_data.append({
-                'post_id': post['id'],
-                'timestamp': post['timestamp'],
-                'type': post['type'],
-                'likes': post['likesCount'],
-                'comments': post['commentsCount'],
-                'engagement': post['likesCount'] + post['commentsCount'],
-                'caption_length': len(post['caption']),
-                'hashtag_count': len(post['hashtags']),
-                'is_carousel': len(post.get('childPosts', [])) > 0,
-                'url': post['url']
-            })
         
-        df = pd.DataFrame(flat_data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.to_csv(output_file, index=False, encoding='utf-8')
-        print(f"✅ Flat CSV saved to: {output_file}")
-        return df
+        writer = FlatCSVWriter(output_file, keep_frame=True)
+        self.write([writer])
+        return writer.frame()
     
-    def to_detailed_csv(self, output_dir=None):
-        """Convert to multiple CSV files preserving relationships"""
+    def to_detailed_csv(self, output_dir=None, compression=None, shard_rows=None):
+        """Convert to multiple CSV files preserving relationships.
+
+        compression='gzip'/'zstd' compresses every table; shard_rows splits
+        each table into files of at most that many rows.
+        """
         if not output_dir:
             output_dir = f"{self.account_name}_detailed"
         
-        Path(output_dir).mkdir(exist_ok=True)
-        
-        # 1. Posts table
-        posts_data = []
-        for post in self.data:
-            posts_data.append({
-                'post_id': post['id'],
-                'shortcode': post['shortCode'],
-                'timestamp': post['timestamp'],
-                'type': post['type'],
-                'caption': post['caption'],
-                'likes': post['likesCount'],
-                'comments': post['commentsCount'],
-                'url': post['url'],
-                'is_sponsored': post.get('isSponsored', False),
-                'comments_disabled': post.get('isCommentsDisabled', False)
-            })
-        
-        posts_df = pd.DataFrame(posts_data)
-        posts_df.to_csv(f"{output_dir}/posts.csv", index=False, encoding='utf-8')
-        
-        # 2. Hashtags table
-        hashtags_data = []
-        for post in self.data:
-            for tag in post.get('hashtags', []):
-                hashtags_data.append({
-                    'post_id': post['id'],
-                    'hashtag': tag
-                })
+        self.write([DetailedCSVWriter(output_dir, compression=compression, shard_rows=shard_rows)])
         
-        if hashtags_data:
-            hashtags_df = pd.DataFrame(hashtags_data)
-            hashtags_df.to_csv(f"{output_dir}/hashtags.csv", index=False, encoding='utf-8')
-        
-        # 3. Comments table
-        comments_data = []
-        for post in self.data:
-            for comment in post.get('latestComments', []):
-                comments_data.append({
-                    'post_id': post['id'],
-                    'comment_id': comment.get('id', ''),
-                    'username': comment.get('ownerUsername', ''),
-                    'text': comment.get('text', ''),
-                    'timestamp': comment.get('timestamp', ''),
-                    'likes': comment.get('likesCount', 0)
-                })
-        
-        if comments_data:
-            comments_df = pd.DataFrame(comments_data)
-            comments_df.to_csv(f"{output_dir}/comments.csv", index=False, encoding='utf-8')
-        
-        print(f"✅ Detailed CSVs saved to: {output_dir}/")
-        
-    def to_parquet(self, output_file=None):
+    def to_parquet(self, output_file=None, compression='snappy', row_group_size=DEFAULT_ROW_GROUP_SIZE):
         """Convert to Parquet for efficient storage and analysis"""
         if not output_file:
             output_file = f"{self.account_name}_data.parquet"
         
-        # Create comprehensive dataframe
-        df = pd.DataFrame(self.data)
+        self.write([ParquetWriter(output_file, compression=compression, row_group_size=row_group_size)])
         
-        # Convert timestamp to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    def to_parquet_dataset(self, dataset_dir='instagram_dataset', compression='zstd',
+                           row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """Append this account to a Parquet dataset partitioned by account and month"""
+        self.write([ParquetDatasetWriter(dataset_dir, compression=compression,
+                                         row_group_size=row_group_size, account=self.account_name)])
         
-        # Add calculated fields
-        df['engagement'] = df['likesCount'] + df['commentsCount']
-        df['caption_length'] = df['caption'].str.len()
-        df['hashtag_count'] = df['hashtags'].apply(len)
-        df['is_carousel'] = df['childPosts'].apply(lambda x: len(x) > 0)
+    def to_archive(self, output_file=None, compression='gzip'):
+        """Archive raw posts as compressed JSON Lines with an offset index"""
+        if not output_file:
+            output_file = f"{self.account_name}_raw{ARCHIVE_EXTENSIONS[compression]}"
         
-        # Save to parquet
-        df.to_parquet(output_file, engine='auto', compression='snappy')
-        print(f"✅ Parquet file saved to: {output_file}")
+        self.write([RawArchiveWriter(output_file, compression=compression)])
         
     def to_sqlite(self, output_file=None):
         """Convert to SQLite database for complex queries"""
         if not output_file:
             output_file = f"{self.account_name}_data.db"
         
-        conn = sqlite3.connect(output_file)
-        
-        # 1. Create posts table
-        posts_data = []
-        for post in self.data:
-            posts_data.append({
-                'post_id': post['id'],
-                'shortcode': post['shortCode'],
-                'timestamp': post['timestamp'],
-                'type': post['type'],
-                'caption': post['caption'],
-                'likes': post['likesCount'],
-                'comments': post['commentsCount'],
-                'engagement': post['likesCount'] + post['commentsCount'],
-                'url': post['url'],
-                'is_sponsored': post.get('isSponsored', False),
-                'comments_disabled': post.get('isCommentsDisabled', False)
-            })
-        
-        posts_df = pd.DataFrame(posts_data)
-        posts_df.to_sql('posts', conn, if_exists='replace', index=False)
-        
-        # 2. Create hashtags table
-        hashtags_data = []
-        for post in self.data:
-            for tag in post.get('hashtags', []):
-                hashtags_data.append({
-                    'post_id': post['id'],
-                    'hashtag': tag
-                })
-        
-        if hashtags_data:
-            hashtags_df = pd.DataFrame(hashtags_data)
-            hashtags_df.to_sql('hashtags', conn, if_exists='replace', index=False)
-        
-        # 3. Create comments table
-        comments_data = []
-        for post in self.data:
-            for comment in post.get('latestComments', []):
-                comments_data.append({
-                    'post_id': post['id'],
-                    'comment_id': comment.get('id', ''),
-                    'username': comment.get('ownerUsername', ''),
-                    'text': comment.get('text', ''),
-                    'timestamp': comment.get('timestamp', ''),
-                    'likes': comment.get('likesCount', 0)
-                })
-        
-        if comments_data:
-            comments_df = pd.DataFrame(comments_data)
-            comments_df.to_sql('comments', conn, if_exists='replace', index=False)
-        
-        # Create indexes for better performance
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp)')
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_posts_engagement ON posts(engagement)')
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_hashtags_tag ON hashtags(hashtag)')
-        
-        # Create useful views
-        conn.execute('''
-            CREATE VIEW IF NOT EXISTS post_performance AS
-            SELECT 
-                DATE(timestamp) as date,
-                COUNT(*) as posts,
-                AVG(likes) as avg_likes,
-                AVG(comments) as avg_comments,
-                AVG(engagement) as avg_engagement
-            FROM posts
-            GROUP BY DATE(timestamp)
-        ''')
-        
-        conn.execute('''
-            CREATE VIEW IF NOT EXISTS hashtag_performance AS
-            SELECT 
-                h.hashtag,
-                COUNT(DISTINCT h.post_id) as usage_count,
-                AVG(p.engagement) as avg_engagement
-            FROM hashtags h
-            JOIN posts p ON h.post_id = p.post_id
-            GROUP BY h.hashtag
-            ORDER BY avg_engagement DESC
-        ''')
-        
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ SQLite database saved to: {output_file}")
-        print("   Sample queries:")
-        print("   - SELECT * FROM posts ORDER BY engagement DESC LIMIT 10;")
-        print("   - SELECT * FROM hashtag_performance LIMIT 20;")
-        print("   - SELECT * FROM post_performance ORDER BY date;")
+        self.write([SQLiteWriter(output_file)])
+    
+    def to_warehouse(self, output_file='instagram_warehouse.db'):
+        """Upsert this account into a shared multi-account SQLite warehouse"""
+        self.write([SQLiteWarehouseWriter(output_file, account=self.account_name)])
+    
+    def _write_package(self, staging_dir, writer_specs, workers=1):
+        """Feed every package writer from one pass over the dump; returns {writer name: error}"""
+        failures = {}
+        writers = []
+        for writer_class, name, options in writer_specs:
+            try:
+                writer = writer_class(str(staging_dir / name), **options)
+            except Exception as e:
+                failures[writer_class.name] = e
+                continue
+            # create_analysis_package reports every artifact itself
+            writer.quiet = True
+            writers.append(writer)
+        write = self.write_threaded if workers > 1 else self.write
+        failures.update(write(writers, optional=writers))
+        return failures
     
-    def create_analysis_package(self, output_dir=None):
-        """Create a complete analysis package with all formats"""
+    def create_analysis_package(self, output_dir=None, workers=None, archive=None, symlink=False):
+        """Create a complete analysis package with all formats.
+
+        The dump is parsed once and every writer runs in its own thread
+        (workers defaults to one per writer, capped by the CPU count;
+        workers=1 feeds the writers in turn). Everything is written to a
+        staging directory that replaces output_dir only once complete (see
+        replace_directory; symlink=True publishes it through a symlink
+        swap). Every file, data.db included,
+        reflects only the current dump. A failing writer is reported and the
+        previous package's copy of its file is kept. archive='gzip' or
+        'zstd' stores the raw posts as a compressed, indexed JSON Lines
+        archive instead of raw_data.json.
+        """
         if not output_dir:
             output_dir = f"{self.account_name}_analysis_package"
-        
-        Path(output_dir).mkdir(exist_ok=True)
+        output_dir = Path(output_dir)
+        staging_dir = output_dir.with_name(f".{output_dir.name}.tmp-{uuid.uuid4().hex[:8]}")
+        staging_dir.mkdir(parents=True)
+        writer_specs = package_writers(archive)
+        raw_name = writer_specs[0][1]
+        if workers is None:
+            workers = min(len(writer_specs), os.cpu_count() or 1)
         
         print(f"\n📦 Creating complete analysis package for @{self.account_name}...\n")
         
-        # 1. Keep original JSON
-        json_file = f"{output_dir}/raw_data.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
-        print(f"✅ JSON preserved: {json_file}")
-        
-        # 2. Create flat CSV for quick analysis
-        self.to_flat_csv(f"{output_dir}/metrics.csv")
-        
-        # 3. Create detailed CSVs
-        self.to_detailed_csv(f"{output_dir}/detailed")
-        
-        # 4. Create Parquet for efficient processing
         try:
-            self.to_parquet(f"{output_dir}/data.parquet")
-        except Exception as e:
-            print(f"⚠️  Parquet creation skipped (install pyarrow if needed): {e}")
-        
-        # 5. Create SQLite for complex queries
-        self.to_sqlite(f"{output_dir}/data.db")
-        
-        # 6. Create README
-        readme_content = f"""# Instagram Analysis Package: @{self.account_name}
+            # 1. Keep original JSON
+            # 2. Create flat CSV for quick analysis
+            # 3. Create detailed CSVs
+            # 4. Create Parquet for efficient processing
+            # 5. Create SQLite for complex queries
+            with self.profiler.stage('write_package'):
+                failures = self._write_package(staging_dir, writer_specs, workers)
+            
+            for writer_class, name, _ in writer_specs:
+                error = failures.get(writer_class.name)
+                if error is None:
+                    print(f"✅ {writer_class.name} saved to: {output_dir / name}")
+                    continue
+                missing_pyarrow = writer_class is ParquetWriter and isinstance(error, ImportError)
+                hint = ' (install pyarrow if needed)' if missing_pyarrow else ''
+                print(f"⚠️  {writer_class.name} creation skipped{hint}: {error}")
+                # An artifact may have companions, e.g. the archive index
+                for path in staging_dir.glob(f"{name}*"):
+                    remove_artifact(path)
+                previous = list(output_dir.glob(f"{name}*"))
+                for path in previous:
+                    copy_artifact(path, staging_dir / path.name)
+                if previous:
+                    print(f"   Keeping the previous {name}")
+            
+            # 6. Create README
+            if archive:
+                raw_section = f"""### 1. {raw_name}
+- Original complete data as {archive}-compressed JSON Lines, one post per line
+- {raw_name}{ARCHIVE_INDEX_SUFFIX}: offset index for reading single posts by id
+- Use for: Custom analysis, archiving (zcat/zstdcat, or instagram_io.read_archived_post)"""
+            else:
+                raw_section = """### 1. raw_data.json
+- Original complete data
+- Use for: Custom analysis, archiving"""
+            
+            readme_content = f"""# Instagram Analysis Package: @{self.account_name}
 
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 
 ## 📁 Files Included:
 
-### 1. raw_data.json
-- Original complete data
-- Use for: Custom analysis, archiving
+{raw_section}
 
 ### 2. metrics.csv
 - Flat file with key metrics
@@ -270,17 +377,19 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 - posts.csv: All posts with captions
 - hashtags.csv: Post-hashtag relationships
 - comments.csv: All comments data
+- child_posts.csv: Carousel items per post
 - Use for: Relational analysis, pivot tables
 
 ### 4. data.parquet
-- Compressed columnar format
+- Compressed columnar format: every scraper field plus engagement,
+  caption_length, hashtag_count and is_carousel
 - Use for: Python/Pandas analysis, big data tools
 - 70-90% smaller than CSV
 
 ### 5. data.db
 - SQLite database with indexed tables
 - Use for: SQL queries, complex analysis
-- Tables: posts, hashtags, comments
+- Tables: posts, hashtags, comments, child_posts
 - Views: post_performance, hashtag_performance
 
 ## 🔍 Quick Start Queries:
@@ -315,40 +424,84 @@ ORDER BY avg_eng DESC;
 - **Quick View**: Excel, Google Sheets → metrics.csv
 - **Deep Analysis**: Python, R → data.parquet
 - **BI Tools**: Tableau, Power BI → data.db or metrics.csv
-- **Custom Apps**: Any language → raw_data.json
+- **Custom Apps**: Any language → {raw_name}
 """
-        
-        with open(f"{output_dir}/README.md", 'w', encoding='utf-8') as f:
-            f.write(readme_content)
+            
+            with open(staging_dir / 'README.md', 'w', encoding='utf-8') as f:
+                f.write(readme_content)
+            
+            replace_directory(staging_dir, output_dir, symlink=symlink)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
         
         print(f"\n✅ Complete analysis package created in: {output_dir}/")
         print("   Check README.md for usage instructions")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python convert_instagram_data.py <json_file> [format]")
-        print("Formats: csv, detailed, parquet, sqlite, all")
+    args = sys.argv[1:]
+    profiler = StageProfiler.from_args(args, 'convert_profile.json')
+    workers = None
+    if '--workers' in args:
+        idx = args.index('--workers')
+        workers = int(args[idx + 1])
+        del args[idx:idx + 2]
+    symlink = '--symlink' in args
+    if symlink:
+        args.remove('--symlink')
+    archive = None
+    if '--archive' in args:
+        idx = args.index('--archive')
+        archive = args[idx + 1]
+        del args[idx:idx + 2]
+    compression = None
+    if '--compression' in args:
+        idx = args.index('--compression')
+        compression = args[idx + 1]
+        del args[idx:idx + 2]
+    shard_rows = None
+    if '--shard-rows' in args:
+        idx = args.index('--shard-rows')
+        shard_rows = int(args[idx + 1])
+        del args[idx:idx + 2]
+    
+    if not args:
+        print("Usage: python convert_instagram_data.py <json_file> [format] [dataset_dir|warehouse_db]")
+        print("       [--workers N] [--archive gzip|zstd] [--symlink] [--profile report.json] [--profile-stage stage]")
+        print("       (package: one writer thread per format up to the CPU count, --workers 1 writes them in turn;")
+        print("       --symlink publishes the package through a symlink swap)")
+        print("       [--compression gzip|zstd] [--shard-rows N]  (detailed CSVs)")
+        print("Formats: csv, detailed, parquet, dataset, archive, sqlite, warehouse, all")
         sys.exit(1)
     
-    json_file = sys.argv[1]
-    format_type = sys.argv[2] if len(sys.argv) > 2 else 'all'
+    json_file = args[0]
+    format_type = args[1] if len(args) > 1 else 'all'
     
-    converter = InstagramDataConverter(json_file)
+    converter = InstagramDataConverter(json_file, profiler=profiler)
     
     if format_type == 'csv':
         converter.to_flat_csv()
     elif format_type == 'detailed':
-        converter.to_detailed_csv()
+        converter.to_detailed_csv(compression=compression, shard_rows=shard_rows)
     elif format_type == 'parquet':
         converter.to_parquet()
+    elif format_type == 'dataset':
+        converter.to_parquet_dataset(args[2] if len(args) > 2 else 'instagram_dataset')
+    elif format_type == 'archive':
+        converter.to_archive(compression=archive or 'gzip')
     elif format_type == 'sqlite':
         converter.to_sqlite()
+    elif format_type == 'warehouse':
+        converter.to_warehouse(*args[2:3])
     elif format_type == 'all':
-        converter.create_analysis_package()
+        converter.create_analysis_package(workers=workers, archive=archive, symlink=symlink)
     else:
         print(f"Unknown format: {format_type}")
-        print("Available formats: csv, detailed, parquet, sqlite, all")
+        print("Available formats: csv, detailed, parquet, dataset, archive, sqlite, warehouse, all")
+        sys.exit(1)
+    
+    profiler.save()
 
 
 if __name__ == "__main__":
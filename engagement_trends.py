@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Instagram Engagement Trends
+Daily, weekly and monthly engagement rollups, rolling windows and week-over-week deltas
+"""
+
+import pandas as pd
+
+# Rollup period -> pandas frequency (weeks start on Monday, months on the 1st)
+PERIODS = {
+    'daily': 'D',
+    'weekly': 'W-MON',
+    'monthly': 'MS',
+}
+SUM_COLUMNS = ['posts', 'likes', 'comments', 'engagement']
+DEFAULT_WINDOWS = [7, 28, 90]
+DEFAULT_PERCENTILES = [0.5, 0.9]
+
+
+def daily_sums(df, account=None):
+    """Per-account, per-day post counts and like, comment and engagement sums (UTC days).
+
+    df needs timestamp, likesCount and commentsCount columns; the account
+    comes from ownerUsername unless given.
+    """
+    timestamps = pd.to_datetime(df['timestamp'], utc=True)
+    likes = df['likesCount'].fillna(0).astype('int64')
+    comments = df['commentsCount'].fillna(0).astype('int64')
+    posts = pd.DataFrame({
+        'account': account if account is not None else df['ownerUsername'].astype(object),
+        'date': timestamps.dt.floor('D'),
+        'posts': 1,
+        'likes': likes,
+        'comments': comments,
+        'engagement': likes + comments,
+    }).dropna(subset=['date'])
+    return posts.groupby(['account', 'date'], sort=True)[SUM_COLUMNS].sum()
+
+
+def with_averages(frame):
+    frame['avg_engagement'] = (frame['engagement'] / frame['posts'].where(frame['posts'] > 0)).round(2)
+    return frame
+
+
+class EngagementTrends:
+    """Engagement time series for one or many accounts.
+
+    Only per-account daily sums are stored; every rollup, rolling window and
+    delta is derived from them, so extend() with newly scraped posts costs
+    as much as the new posts rather than the account history.
+    """
+
+    def __init__(self, daily=None):
+        if daily is None:
+            index = pd.MultiIndex.from_arrays([pd.Index([], dtype=object),
+                                               pd.DatetimeIndex([], tz='UTC')], names=['account', 'date'])
+            daily = pd.DataFrame({column: pd.Series(dtype='int64') for column in SUM_COLUMNS}, index=index)
+        self.daily = daily
+
+    @classmethod
+    def from_posts(cls, df, account=None):
+        return cls(daily_sums(df, account))
+
+    def extend(self, df, account=None):
+        """Add new posts; posts already counted must not be passed again"""
+        new = daily_sums(df, account)
+        self.daily = (pd.concat([self.daily, new]).groupby(level=['account', 'date'], sort=True).sum()
+                      if len(self.daily) else new)
+        return self
+
+    @property
+    def accounts(self):
+        return self.daily.index.get_level_values('account').unique().tolist()
+
+    def rollup(self, period='weekly'):
+        """Sums and average engagement per account and period; periods without posts are included"""
+        daily = self.daily.reset_index('account')
+        if not len(daily):
+            return with_averages(self.daily.copy())
+        rolled = daily.groupby('account', sort=True)[SUM_COLUMNS].resample(
+            PERIODS[period], label='left', closed='left').sum()
+        rolled.index.names = ['account', 'date']
+        return with_averages(rolled)
+
+    def rolling(self, windows=DEFAULT_WINDOWS, percentiles=DEFAULT_PERCENTILES):
+        """Trailing day windows over the daily series.
+
+        For each window of N days: average engagement per post, and
+        percentiles of the daily average engagement among days with posts.
+        """
+        daily = with_averages(self.daily.copy())
+        grouped = daily.reset_index('account').groupby('account', sort=True)
+        result = daily[['posts', 'engagement', 'avg_engagement']].copy()
+        for window in windows:
+            trailing = grouped.rolling(f"{window}D")
+            sums = trailing[['posts', 'engagement']].sum()
+            result[f'posts_{window}d'] = sums['posts'].astype('int64')
+            result[f'avg_engagement_{window}d'] = (sums['engagement'] / sums['posts']).round(2)
+            for q in percentiles:
+                result[f'p{round(q * 100)}_engagement_{window}d'] = trailing['avg_engagement'].quantile(q).round(2)
+        return result
+
+    def week_over_week(self):
+        """Weekly rollup with absolute and percentage changes against the previous week"""
+        weekly = self.rollup('weekly')
+        previous = weekly.groupby(level='account')[['posts', 'engagement', 'avg_engagement']].shift(1)
+        for column in ['posts', 'engagement', 'avg_engagement']:
+            weekly[f'{column}_delta'] = weekly[column] - previous[column]
+            weekly[f'{column}_change_pct'] = (
+                weekly[f'{column}_delta'] / previous[column].where(previous[column] != 0) * 100
+            ).round(1)
+        return weekly
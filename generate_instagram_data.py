@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Synthetic Instagram Data Generator
+Writes deterministic scraper-shaped dumps for benchmarks and load testing
+"""
+
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+import json
+import random
+import sys
+
+CAPTION_WORDS = [
+    # Russian
+    'малыш', 'мама', 'питание', 'смесь', 'здоровье', 'развитие', 'рецепт', 'совет', 'вопрос',
+    'купить', 'сегодня', 'ребенок', 'забота', 'любовь', 'утро', 'прогулка',
+    # Uzbek (Latin)
+    'bolangiz', 'onalar', 'farzand', 'sogʻlom', 'oʻyin', 'maslahat', 'yozib', 'qoldiring',
+    'bilan', 'uchun', 'kuni', 'yaxshi',
+    # English
+    'baby', 'nutrition', 'healthy', 'family', 'care', 'growth', 'tips', 'love',
+]
+COMMENT_TEXTS = [
+    'Спасибо!', 'Где купить?', 'Сколько стоит?', 'Rahmat!', 'Qayerdan olsa boʻladi?',
+    'Super 😍', 'Nice', 'Подскажите, с какого возраста?', '👍', 'Zoʻr!',
+]
+POST_TYPES = ['Image', 'Video', 'Sidecar']
+HASHTAG_VOCABULARY = 2000
+START_TIME = datetime(2023, 1, 1, tzinfo=timezone.utc)
+TIME_SPAN = timedelta(days=730)
+
+
+def format_timestamp(moment):
+    """Scraper timestamp format, e.g. 2025-07-30T07:00:30.000Z"""
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def generate_posts(n_posts, hashtags_per_post=5, comments_per_post=3, carousel_depth=3,
+                   caption_length=300, account='synthetic_account', seed=42):
+    """Yield n_posts scraper-shaped posts; the same arguments always give the same posts.
+
+    Posts span about two years whatever their number, counts per post vary
+    around the requested averages, hashtags follow a long-tailed popularity
+    curve, and Sidecar posts carry up to carousel_depth child posts.
+    """
+    rng = random.Random(seed)
+    hashtags = [f"{account}_{i}" if i < 20 else f"tag{i}" for i in range(HASHTAG_VOCABULARY)]
+    hashtag_weights = list(accumulate(1 / (rank + 1) for rank in range(HASHTAG_VOCABULARY)))
+    owner_id = str(rng.randrange(10 ** 10, 10 ** 11))
+    average_gap = TIME_SPAN.total_seconds() / max(n_posts, 1)
+    moment = START_TIME
+
+    for i in range(n_posts):
+        moment += timedelta(seconds=int(average_gap * rng.uniform(0.5, 1.5)))
+        post_id = str(3 * 10 ** 18 + i)
+        short_code = f"S{seed:x}{i:09x}"
+        post_type = rng.choice(POST_TYPES)
+
+        words = []
+        length = 0
+        target_length = rng.randint(caption_length // 2, caption_length * 3 // 2) if caption_length else 0
+        while length < target_length:
+            word = rng.choice(CAPTION_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        if words and rng.random() < 0.3:
+            words[-1] += '?'
+        caption = ' '.join(words)[:target_length] if target_length else ''
+
+        n_tags = rng.randint(0, hashtags_per_post * 2) if hashtags_per_post else 0
+        post_hashtags = list(dict.fromkeys(rng.choices(hashtags, cum_weights=hashtag_weights, k=n_tags)))
+        if post_hashtags:
+            caption += '\n\n' + ' '.join(f"#{tag}" for tag in post_hashtags)
+
+        likes = int(rng.paretovariate(1.5) * 10)
+        n_comments = rng.randint(0, comments_per_post * 2) if comments_per_post else 0
+        latest_comments = []
+        for k in range(n_comments):
+            comment_time = moment + timedelta(minutes=rng.randint(1, 60 * 48))
+            latest_comments.append({
+                'id': f"{post_id}{k:03d}",
+                'text': rng.choice(COMMENT_TEXTS),
+                'ownerUsername': f"user{rng.randrange(50000)}",
+                'ownerProfilePicUrl': '',
+                'timestamp': format_timestamp(comment_time),
+                'repliesCount': 0,
+                'replies': [],
+                'likesCount': rng.randint(0, 5),
+            })
+
+        child_posts = []
+        if post_type == 'Sidecar' and carousel_depth:
+            for position in range(rng.randint(2, max(2, carousel_depth))):
+                child_posts.append({
+                    'id': f"{post_id}{position:02d}",
+                    'type': rng.choice(['Image', 'Video']),
+                    'shortCode': f"{short_code}c{position}",
+                    'url': f"https://www.instagram.com/p/{short_code}c{position}/",
+                    'displayUrl': f"https://cdn.example.com/{post_id}_{position}.jpg",
+                })
+
+        post = {
+            'inputUrl': f"https://www.instagram.com/{account}",
+            'id': post_id,
+            'type': post_type,
+            'shortCode': short_code,
+            'caption': caption,
+            'hashtags': post_hashtags,
+            'mentions': [],
+            'url': f"https://www.instagram.com/p/{short_code}/",
+            'commentsCount': n_comments + rng.randint(0, 3),
+            'firstComment': latest_comments[0]['text'] if latest_comments else '',
+            'latestComments': latest_comments,
+            'dimensionsHeight': 1350,
+            'dimensionsWidth': 1080,
+            'displayUrl': f"https://cdn.example.com/{post_id}.jpg",
+            'images': [],
+            'alt': None,
+            'likesCount': likes,
+            'timestamp': format_timestamp(moment),
+            'childPosts': child_posts,
+            'ownerFullName': account.replace('_', ' ').title(),
+            'ownerUsername': account,
+            'ownerId': owner_id,
+            'isSponsored': rng.random() < 0.05,
+            'isCommentsDisabled': rng.random() < 0.02,
+        }
+        if post_type == 'Video':
+            post['videoViewCount'] = likes * rng.randint(5, 30)
+            post['videoDuration'] = round(rng.uniform(5, 90), 3)
+        yield post
+
+
+def write_dataset(output_file, n_posts, jsonl=False, **options):
+    """Stream generated posts to a JSON array (or JSON Lines) file"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        if jsonl:
+            for post in generate_posts(n_posts, **options):
+                f.write(json.dumps(post, ensure_ascii=False))
+                f.write('\n')
+            return output_file
+
+        f.write('[')
+        for i, post in enumerate(generate_posts(n_posts, **options)):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(post, ensure_ascii=False))
+        f.write(']\n')
+    return output_file
+
+
+def generate_search_results(n_results, text_length=2000, brand='nutrilak', seed=42):
+    """Synthetic crawl results ({'url', 'text'}) for analyze_competitors"""
+    rng = random.Random(seed)
+    snippets = [
+        f"@{brand}_uz", f"instagram.com/{brand}_uz", f"t.me/{brand}_channel", '45K подписчиков',
+        '1.2М followers', 'блогер Анна Иванова', 'видео', 'reels', 'карусель', 'рецепт', 'совет',
+        'развитие', 'отзыв', 'конкурс', 'скидка',
+    ]
+    filler = CAPTION_WORDS + ['и', 'в', 'на', 'для', 'the', 'and', 'with']
+    for i in range(n_results):
+        words = []
+        length = 0
+        while length < text_length:
+            word = rng.choice(snippets) if rng.random() < 0.02 else rng.choice(filler)
+            words.append(word)
+            length += len(word) + 1
+        yield {'url': f"https://example.com/{brand}/{i}", 'text': ' '.join(words)}
+
+
+def main():
+    args = sys.argv[1:]
+    options = {}
+    flags = {
+        '--hashtags': 'hashtags_per_post',
+        '--comments': 'comments_per_post',
+        '--carousel': 'carousel_depth',
+        '--caption': 'caption_length',
+        '--seed': 'seed',
+    }
+    for flag, option in flags.items():
+        if flag in args:
+            idx = args.index(flag)
+            options[option] = int(args[idx + 1])
+            del args[idx:idx + 2]
+    if '--account' in args:
+        idx = args.index('--account')
+        options['account'] = args[idx + 1]
+        del args[idx:idx + 2]
+    jsonl = '--jsonl' in args
+    if jsonl:
+        args.remove('--jsonl')
+
+    if len(args) < 2:
+        print("Usage: python generate_instagram_data.py <output_file> <n_posts> [--hashtags N] "
+              "[--comments N] [--carousel N] [--caption N] [--seed N] [--account NAME] [--jsonl]")
+        sys.exit(1)
+
+    output_file, n_posts = args[0], int(args[1])
+    write_dataset(output_file, n_posts, jsonl=jsonl, **options)
+    print(f"✅ {n_posts:,} synthetic posts written to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
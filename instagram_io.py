@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Instagram Data Reader
+Streams posts from scraper dumps (JSON array or JSON Lines, optionally gzip/zstd compressed)
+"""
+
+import io
+import json
+import os
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 1 << 20
+WHITESPACE = ' \t\r\n'
+
+# File suffix -> compression of dumps and raw archives
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+# The offset index of a raw archive lives next to it under this suffix
+ARCHIVE_INDEX_SUFFIX = '.index.json'
+
+
+def load_zstd():
+    """Return (module, flavour) for zstd support: the stdlib module (Python 3.14+) or zstandard"""
+    try:
+        from compression import zstd
+        return zstd, 'stdlib'
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard, 'zstandard'
+    except ImportError:
+        raise ImportError("zstd compression needs Python 3.14+ or the zstandard package") from None
+
+
+def compress_block(data, compression, level=None):
+    """Compress bytes as one self-contained gzip member or zstd frame"""
+    if compression == 'gzip':
+        import gzip
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    if compression == 'zstd':
+        zstd, flavour = load_zstd()
+        level = 3 if level is None else level
+        if flavour == 'stdlib':
+            return zstd.compress(data, level=level)
+        return zstd.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def decompress_block(data, compression):
+    """Inverse of compress_block"""
+    if compression == 'gzip':
+        import gzip
+        return gzip.decompress(data)
+    if compression == 'zstd':
+        zstd, flavour = load_zstd()
+        if flavour == 'stdlib':
+            return zstd.decompress(data)
+        return zstd.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def open_text(path):
+    """Open a dump for reading text, decompressing .gz/.zst files on the fly"""
+    compression = COMPRESSION_SUFFIXES.get(os.path.splitext(str(path))[1])
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if compression == 'zstd':
+        zstd, flavour = load_zstd()
+        if flavour == 'stdlib':
+            return zstd.open(path, 'rt', encoding='utf-8')
+        reader = zstd.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                       closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_posts(json_file, chunk_size=READ_CHUNK_SIZE):
+    """Yield posts one by one from a JSON array or JSON Lines file.
+
+    Only the current read chunk and the post being decoded are kept in
+    memory, so gigabyte-sized dumps can be processed with a flat footprint.
+    """
+    decoder = json.JSONDecoder()
+    with open_text(json_file) as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        in_array = None
+
+        while True:
+            # Skip whitespace (and commas between array items)
+            while True:
+                while pos < len(buffer) and (buffer[pos] in WHITESPACE or (in_array and buffer[pos] == ',')):
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer = f.read(chunk_size)
+                pos = 0
+                eof = not buffer
+
+            if pos >= len(buffer):
+                if in_array:
+                    raise ValueError(f"Unexpected end of file in {json_file}: JSON array is not closed")
+                return
+
+            if in_array is None:
+                # The first significant character tells a JSON array from JSON Lines
+                in_array = buffer[pos] == '['
+                if in_array:
+                    pos += 1
+                continue
+
+            if in_array and buffer[pos] == ']':
+                return
+
+            # Decode the next value, reading more data until it is complete
+            while True:
+                try:
+                    post, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    chunk = f.read(chunk_size)
+                    eof = not chunk
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+
+            pos = end
+            if not isinstance(post, dict):
+                raise ValueError(f"Expected a post object in {json_file}, got {type(post).__name__}")
+            yield post
+
+            # Drop the consumed prefix so the buffer never grows past one chunk plus one post
+            if pos > chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+
+
+def iter_batches(items, batch_size=DEFAULT_BATCH_SIZE):
+    """Group an iterable into lists of at most batch_size items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def peek_first_post(json_file):
+    """Return the first post of a dump without reading the rest of it"""
+    return next(iter_posts(json_file), None)
+
+
+def load_archive_index(archive_file):
+    """Load the offset index written next to a raw archive"""
+    with open(f"{archive_file}{ARCHIVE_INDEX_SUFFIX}", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_archived_posts(archive_file, post_ids, index=None):
+    """Read posts by id from a raw archive, decompressing only the blocks that hold them"""
+    index = index or load_archive_index(archive_file)
+    wanted = {str(post_id) for post_id in post_ids}
+    posts = {}
+    with open(archive_file, 'rb') as f:
+        for block in index['blocks']:
+            lines = [line_no for line_no, post_id in enumerate(block['ids']) if post_id in wanted]
+            if not lines:
+                continue
+            f.seek(block['offset'])
+            text = decompress_block(f.read(block['length']), index['compression']).decode('utf-8')
+            # JSON escapes newlines inside strings, so '\n' only separates posts
+            block_lines = text.split('\n')
+            for line_no in lines:
+                posts[block['ids'][line_no]] = json.loads(block_lines[line_no])
+    return posts
+
+
+def read_archived_post(archive_file, post_id, index=None):
+    """Read a single post by id from a raw archive, or None if it is not there"""
+    return read_archived_posts(archive_file, [post_id], index).get(str(post_id))
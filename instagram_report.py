@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Instagram Report Rendering
+Markdown and JSON output for the analyzer's report sections
+"""
+
+from datetime import datetime
+import json
+
+import pandas as pd
+
+# Weeks shown in the report's weekly trend table
+TREND_WEEKS = 8
+CAPTION_PREVIEW_CHARS = 100
+# Tables that grow with the posts, commenters or hashtags: (section, key) -> column ranked on.
+# The JSON export keeps only their top JSON_TABLE_ROWS rows
+JSON_TABLE_ROWS = 100
+JSON_BULK_TABLES = {
+    ('comments', 'per_post'): 'comments',
+    ('comments', 'commenters'): 'comments',
+    ('hashtags', 'stats'): 'count',
+}
+
+# Templates are filled with str.format; row templates take one table row each
+HEADER_TEMPLATE = """# Instagram Analysis Report: @{account}
+
+*Generated: {generated}*
+*Account: {full_name} (@{account})*
+
+## 📊 Executive Summary
+
+- **Total Posts Analyzed**: {total_posts}
+- **Date Range**: {date_range_days} days
+- **Average Engagement**: {avg_engagement} interactions per post
+- **Posting Frequency**: {posts_per_week} posts per week
+
+## 💹 Engagement Metrics
+
+### Overall Performance
+- **Total Likes**: {total_likes:,}
+- **Total Comments**: {total_comments:,}
+- **Average Likes per Post**: {avg_likes}
+- **Average Comments per Post**: {avg_comments}
+- **Engagement Rate**: ~{engagement_rate}% (assuming ~10K followers)
+
+### Top 5 Performing Posts
+"""
+TOP_POST_ROW = """
+{rank}. **{engagement} interactions** ({likes} likes, {comments} comments)
+   - Caption: {caption}
+   - Date: {date}
+"""
+
+CONTENT_TEMPLATE = """
+
+## 📝 Content Analysis
+
+### Content Types Distribution
+"""
+CONTENT_TYPE_ROW = "- **{}**: {} posts ({}%)\n"
+CAPTIONS_TEMPLATE = """
+- **Carousel Posts**: {carousel_count} (avg engagement: {carousel_avg_engagement})
+
+### Caption Analysis
+- **Average Caption Length**: {avg_length:.0f} characters
+- **Language Distribution**:
+"""
+LANGUAGE_ROW = "  - {}: {} posts\n"
+CAPTION_LENGTH_TEMPLATE = """
+
+### Caption Length vs Engagement
+"""
+CAPTION_LENGTH_ROW = "- **{}**: {:.1f} avg engagement\n"
+
+HASHTAGS_TEMPLATE = """
+
+## #️⃣ Hashtag Analysis
+
+- **Total Unique Hashtags**: {total_unique}
+
+### Most Used Hashtags
+"""
+HASHTAG_USED_ROW = "1. #{} - used {} times\n"
+HASHTAG_PERFORMING_TEMPLATE = """
+
+### Best Performing Hashtags (by avg engagement)
+"""
+HASHTAG_PERFORMING_ROW = "1. #{} - {} avg engagement\n"
+
+PATTERNS_TEMPLATE = """
+
+## 📅 Posting Patterns
+
+- **Posts per Week**: {posts_per_week}
+
+### Best Posting Times (by engagement)
+"""
+HOUR_ROW = "- **{}:00**: {:.1f} avg engagement ({} posts)\n"
+DAYS_TEMPLATE = """
+
+### Best Days of Week
+"""
+DAY_ROW = "- **{}**: {:.1f} avg engagement\n"
+WEEKLY_TEMPLATE = f"""
+### Weekly Trend (last {TREND_WEEKS} weeks)
+| Week of | Posts | Avg engagement | Change vs previous week |
+|---|---|---|---|
+"""
+WEEK_ROW = "| {} | {} | {} | {} |\n"
+
+COMMENTS_TEMPLATE = """
+
+## 💬 Comment Analysis
+
+- **Total Comments**: {total_comments}
+- **Posts with Comments**: {posts_with_comments} ({comment_rate}%)
+- **Questions in Comments**: {total_questions}
+
+### Sample Questions from Audience
+"""
+NUMBERED_ROW = "{}. {}\n"
+COMPLAINTS_TEMPLATE = """
+### Complaints
+- **Complaints in Comments**: {total_complaints}
+"""
+COMMENTERS_TEMPLATE = """
+### Top Commenters
+- **Unique Commenters**: {unique_commenters}
+"""
+COMMENTER_ROW = "1. @{} - {} comments\n"
+RESPONSE_TEMPLATE = """
+### Response Times
+- **Comments Answered by @{account}**: {count} ({answered_rate}%)
+"""
+LATENCY_ROW = "- **{}**: median {}h, 90th percentile {}h ({})\n"
+
+INSIGHTS_TEMPLATE = """
+
+## 🎯 Key Insights & Recommendations
+
+### Strengths
+1. **Consistent Posting Schedule** - {posts_per_week:.1f} posts per week shows good consistency
+2. **High-Quality Content** - Average engagement of {avg_engagement:.0f} indicates resonating content
+3. **Strategic Hashtag Use** - {total_unique} unique hashtags shows diverse reach strategies
+
+### Areas for Improvement
+1. **Increase Comment Rate** - Only {comment_rate:.1f}% of posts receive comments
+2. **Optimize Posting Times** - Focus on peak engagement hours
+3. **Content Diversification** - Experiment with different content types
+
+### Action Items
+- [ ] Create more carousel posts (higher engagement)
+- [ ] Respond to all questions in comments to boost engagement
+- [ ] Test posting during peak hours: {peak_start}:00-{peak_end}:00
+- [ ] Use top-performing hashtags more consistently
+- [ ] Increase caption length for better storytelling
+
+---
+*Note: This analysis is based on public data. For complete insights including saves, shares, and reach, access to Instagram Insights is required.*
+"""
+
+
+def post_dates(timestamps):
+    """YYYY-MM-DD dates of a timestamp column, parsed once for the whole column"""
+    return pd.to_datetime(timestamps, utc=True).dt.strftime('%Y-%m-%d').fillna('N/A')
+
+
+def render_header(sections, account, full_name):
+    engagement = sections['engagement']
+    patterns = sections['patterns']
+    yield HEADER_TEMPLATE.format(
+        account=account,
+        full_name=full_name,
+        generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+        date_range_days=patterns['date_range_days'],
+        posts_per_week=patterns['posts_per_week'],
+        engagement_rate=round((engagement['avg_engagement'] / 10000) * 100, 2),
+        **{key: engagement[key] for key in ['total_posts', 'avg_engagement', 'total_likes',
+                                             'total_comments', 'avg_likes', 'avg_comments']},
+    )
+    top_posts = engagement['top_posts']
+    rows = zip(top_posts['caption'], top_posts['engagement'], top_posts['likesCount'],
+               top_posts['commentsCount'], post_dates(top_posts['timestamp']))
+    for rank, (caption, total, likes, comments, date) in enumerate(rows, 1):
+        if len(caption) > CAPTION_PREVIEW_CHARS:
+            caption = caption[:CAPTION_PREVIEW_CHARS] + '...'
+        yield TOP_POST_ROW.format(rank=rank, engagement=int(total), likes=int(likes),
+                                  comments=int(comments), caption=caption, date=date)
+
+
+def render_content(sections, account, full_name):
+    content = sections['content']
+    captions = sections['captions']
+    total_posts = sections['engagement']['total_posts']
+    yield CONTENT_TEMPLATE
+    for content_type, count in content['types'].items():
+        yield CONTENT_TYPE_ROW.format(content_type, count, round(count / total_posts * 100, 1))
+    yield CAPTIONS_TEMPLATE.format(avg_length=captions['avg_length'], **content)
+    for lang, count in captions['language_distribution'].items():
+        yield LANGUAGE_ROW.format(lang, count)
+    yield CAPTION_LENGTH_TEMPLATE
+    for length, eng in captions['length_vs_engagement'].items():
+        yield CAPTION_LENGTH_ROW.format(length, eng)
+
+
+def render_hashtags(sections, account, full_name):
+    hashtags = sections['hashtags']
+    yield HASHTAGS_TEMPLATE.format(total_unique=hashtags['total_unique'])
+    for tag, count in hashtags['top_used'][:10]:
+        yield HASHTAG_USED_ROW.format(tag, count)
+    yield HASHTAG_PERFORMING_TEMPLATE
+    for tag, avg_eng in hashtags['top_performing']:
+        yield HASHTAG_PERFORMING_ROW.format(tag, avg_eng)
+
+
+def render_patterns(sections, account, full_name):
+    patterns = sections['patterns']
+    yield PATTERNS_TEMPLATE.format(posts_per_week=patterns['posts_per_week'])
+    best_hours = patterns['best_hours']
+    for hour, mean, count in zip(best_hours.index, best_hours['mean'], best_hours['count']):
+        yield HOUR_ROW.format(hour, mean, int(count))
+    yield DAYS_TEMPLATE
+    for day, eng in patterns['best_days'].items():
+        yield DAY_ROW.format(day, eng)
+    weekly = patterns['weekly_trend']
+    yield WEEKLY_TEMPLATE
+    for week, posts, avg, change in zip(weekly.index, weekly['posts'], weekly['avg_engagement'],
+                                        weekly['avg_engagement_change_pct']):
+        yield WEEK_ROW.format(week.strftime('%Y-%m-%d'), int(posts),
+                              f"{avg:.1f}" if pd.notna(avg) else '—',
+                              f"{change:+.1f}%" if pd.notna(change) else '—')
+
+
+def render_comments(sections, account, full_name):
+    comments = sections['comments']
+    yield COMMENTS_TEMPLATE.format(**comments)
+    for i, question in enumerate(comments['sample_questions'], 1):
+        yield NUMBERED_ROW.format(i, question)
+    yield COMPLAINTS_TEMPLATE.format(**comments)
+    for i, complaint in enumerate(comments['sample_complaints'], 1):
+        yield NUMBERED_ROW.format(i, complaint)
+    yield COMMENTERS_TEMPLATE.format(**comments)
+    for commenter, count in comments['top_commenters']:
+        yield COMMENTER_ROW.format(commenter, count)
+    # Sections rebuilt from stored state keep no per-comment timings
+    if 'reply_latency' not in comments:
+        return
+    reply_latency = comments['reply_latency']
+    yield RESPONSE_TEMPLATE.format(account=account, **reply_latency)
+    for label, distribution in [('Reply time', reply_latency), ('Comment delay after posting', comments['comment_delay'])]:
+        if distribution['count']:
+            buckets = ', '.join(f"{bucket}: {count}" for bucket, count in distribution['buckets'].items())
+            yield LATENCY_ROW.format(label, distribution['median_hours'], distribution['p90_hours'], buckets)
+
+
+def render_insights(sections, account, full_name):
+    best_hours = sections['patterns']['best_hours']
+    peak = best_hours.index[0] if len(best_hours) > 0 else None
+    yield INSIGHTS_TEMPLATE.format(
+        posts_per_week=sections['patterns']['posts_per_week'],
+        avg_engagement=sections['engagement']['avg_engagement'],
+        total_unique=sections['hashtags']['total_unique'],
+        comment_rate=sections['comments']['comment_rate'],
+        peak_start=peak if peak is not None else 'N/A',
+        peak_end=peak + 2 if peak is not None else 'N/A',
+    )
+
+
+# Report parts in output order
+REPORT_PARTS = [render_header, render_content, render_hashtags, render_patterns, render_comments, render_insights]
+
+
+def render_report(sections, account, full_name):
+    """Yield the markdown report piece by piece, in file order"""
+    for render in REPORT_PARTS:
+        yield from render(sections, account, full_name)
+
+
+def to_json_value(value):
+    """Plain JSON value of a section entry (frames become lists of records)"""
+    if isinstance(value, pd.DataFrame):
+        frame = value if isinstance(value.index, pd.RangeIndex) and value.index.name is None else value.reset_index()
+        return json.loads(frame.to_json(orient='records', date_format='iso', force_ascii=False))
+    if isinstance(value, pd.Series):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if hasattr(value, 'isoformat'):
+        return value.isoformat() if pd.notna(value) else None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def save_sections_json(sections, output_file, account, full_name):
+    """Write the computed report sections as one JSON document"""
+    sections = {key: dict(section) for key, section in sections.items()}
+    for (key, table), column in JSON_BULK_TABLES.items():
+        if table in sections.get(key, {}):
+            frame = sections[key][table]
+            sections[key][table] = frame.sort_values(column, ascending=False, kind='stable').head(JSON_TABLE_ROWS)
+    document = {
+        'account': account,
+        'full_name': full_name,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'sections': {key: to_json_value(section) for key, section in sections.items()},
+    }
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
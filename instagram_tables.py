@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Instagram Data Normalization
+Turns raw scraper posts into columnar posts, hashtags, comments and child_posts tables
+"""
+
+from instagram_io import DEFAULT_BATCH_SIZE, iter_batches
+
+POSTS_COLUMNS = [
+    'post_id', 'shortcode', 'timestamp', 'type', 'caption', 'likes', 'comments', 'engagement',
+    'caption_length', 'hashtag_count', 'is_carousel', 'url', 'is_sponsored', 'comments_disabled',
+    'owner_username'
+]
+HASHTAGS_COLUMNS = ['post_id', 'hashtag']
+COMMENTS_COLUMNS = ['post_id', 'comment_id', 'username', 'text', 'timestamp', 'likes']
+CHILD_POSTS_COLUMNS = ['post_id', 'child_id', 'position', 'type', 'shortcode', 'url', 'display_url']
+
+TABLE_COLUMNS = {
+    'posts': POSTS_COLUMNS,
+    'hashtags': HASHTAGS_COLUMNS,
+    'comments': COMMENTS_COLUMNS,
+    'child_posts': CHILD_POSTS_COLUMNS,
+}
+
+
+class NormalizedBatch:
+    """Columnar tables for one batch of posts, keyed by table name then column name"""
+
+    def __init__(self, raw_posts=None):
+        self.raw_posts = raw_posts if raw_posts is not None else []
+        self.tables = {
+            name: {column: [] for column in columns}
+            for name, columns in TABLE_COLUMNS.items()
+        }
+
+    def __len__(self):
+        return len(self.tables['posts']['post_id'])
+
+    def row_count(self, table):
+        """Number of rows in one table"""
+        return len(self.tables[table][TABLE_COLUMNS[table][0]])
+
+    def columns(self, table, columns=None):
+        """Return {column: values} for a table, optionally restricted to some columns"""
+        data = self.tables[table]
+        return {column: data[column] for column in (columns or TABLE_COLUMNS[table])}
+
+    def rows(self, table, columns=None):
+        """Iterate over a table as row tuples"""
+        return zip(*self.columns(table, columns).values())
+
+    def to_frame(self, table, columns=None):
+        """Build a DataFrame for a table"""
+        import pandas as pd
+        return pd.DataFrame(self.columns(table, columns))
+
+
+def normalize_posts(posts):
+    """Normalize raw posts into every table in a single pass"""
+    batch = NormalizedBatch(posts)
+    p = batch.tables['posts']
+    h = batch.tables['hashtags']
+    c = batch.tables['comments']
+    cp = batch.tables['child_posts']
+
+    for post in posts:
+        post_id = post['id']
+        caption = post.get('caption')
+        hashtags = post.get('hashtags') or []
+        child_posts = post.get('childPosts') or []
+        likes = post.get('likesCount')
+        comments = post.get('commentsCount')
+
+        p['post_id'].append(post_id)
+        p['shortcode'].append(post.get('shortCode'))
+        p['timestamp'].append(post.get('timestamp'))
+        p['type'].append(post.get('type'))
+        p['caption'].append(caption)
+        p['likes'].append(likes)
+        p['comments'].append(comments)
+        p['engagement'].append((likes or 0) + (comments or 0))
+        p['caption_length'].append(len(caption) if caption is not None else 0)
+        p['hashtag_count'].append(len(hashtags))
+        p['is_carousel'].append(len(child_posts) > 0)
+        p['url'].append(post.get('url'))
+        p['is_sponsored'].append(post.get('isSponsored', False))
+        p['comments_disabled'].append(post.get('isCommentsDisabled', False))
+        p['owner_username'].append(post.get('ownerUsername'))
+
+        for tag in hashtags:
+            h['post_id'].append(post_id)
+            h['hashtag'].append(tag)
+
+        for comment in post.get('latestComments') or []:
+            c['post_id'].append(post_id)
+            c['comment_id'].append(comment.get('id', ''))
+            c['username'].append(comment.get('ownerUsername', ''))
+            c['text'].append(comment.get('text', ''))
+            c['timestamp'].append(comment.get('timestamp', ''))
+            c['likes'].append(comment.get('likesCount', 0))
+
+        for position, child in enumerate(child_posts):
+            cp['post_id'].append(post_id)
+            cp['child_id'].append(child.get('id'))
+            cp['position'].append(position)
+            cp['type'].append(child.get('type'))
+            cp['shortcode'].append(child.get('shortCode'))
+            cp['url'].append(child.get('url'))
+            cp['display_url'].append(child.get('displayUrl'))
+
+    return batch
+
+
+def iter_normalized(posts, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream posts as NormalizedBatch objects of at most batch_size posts"""
+    for raw_batch in iter_batches(posts, batch_size):
+        yield normalize_posts(raw_batch)
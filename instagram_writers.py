@@ -0,0 +1,1136 @@
+#!/usr/bin/env python3
+"""
+Instagram Data Writers
+Output sinks fed with NormalizedBatch objects, so every format shares one pass over the data
+"""
+
+import csv
+import io
+import json
+import os
+import textwrap
+import uuid
+from datetime import datetime
+from itertools import accumulate
+from pathlib import Path
+
+from instagram_io import ARCHIVE_INDEX_SUFFIX, compress_block, load_zstd
+
+FLAT_COLUMNS = [
+    'post_id', 'timestamp', 'type', 'likes', 'comments', 'engagement',
+    'caption_length', 'hashtag_count', 'is_carousel', 'url'
+]
+DETAILED_POSTS_COLUMNS = [
+    'post_id', 'shortcode', 'timestamp', 'type', 'caption', 'likes', 'comments',
+    'url', 'is_sponsored', 'comments_disabled'
+]
+SQLITE_POSTS_COLUMNS = [
+    'post_id', 'shortcode', 'timestamp', 'type', 'caption', 'likes', 'comments',
+    'engagement', 'url', 'is_sponsored', 'comments_disabled'
+]
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+# Posts per independently compressed archive block: the unit read back by id
+DEFAULT_ARCHIVE_BLOCK_SIZE = 256
+ARCHIVE_EXTENSIONS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+# Fast levels: the archive is written on every run, and JSON compresses well even at these
+ARCHIVE_LEVELS = {'gzip': 1, 'zstd': 3}
+CSV_EXTENSIONS = {None: '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+
+class RawJSONWriter:
+    """Copy raw posts to a JSON array laid out like json.dump(indent=2)"""
+    name = 'JSON'
+    # Set by callers that report results themselves, e.g. the package builder
+    quiet = False
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.file = open(output_file, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.post_count = 0
+
+    def write(self, batch):
+        for post in batch.raw_posts:
+            self.file.write(',\n' if self.post_count else '\n')
+            self.file.write(textwrap.indent(json.dumps(post, ensure_ascii=False, indent=2), '  '))
+            self.post_count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.post_count else ']')
+        self.file.close()
+        if not self.quiet:
+            print(f"✅ JSON preserved: {self.output_file}")
+
+
+class RawArchiveWriter:
+    """Raw posts as compressed JSON Lines with an offset index.
+
+    Posts are compressed in blocks, each a self-contained gzip member or zstd
+    frame; concatenated they still form one valid stream, so the archive
+    reads back with zcat/zstdcat or iter_posts. The index next to it maps
+    every post id to its block, so single posts can be read without
+    decompressing the rest (see instagram_io.read_archived_post).
+    """
+    name = 'JSON archive'
+    quiet = False
+
+    def __init__(self, output_file, compression='gzip', block_size=DEFAULT_ARCHIVE_BLOCK_SIZE, level=None):
+        if compression not in ARCHIVE_EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        if compression == 'zstd':
+            load_zstd()
+        self.output_file = output_file
+        self.index_file = f"{output_file}{ARCHIVE_INDEX_SUFFIX}"
+        self.compression = compression
+        self.block_size = block_size
+        self.level = ARCHIVE_LEVELS[compression] if level is None else level
+        self.file = open(output_file, 'wb')
+        self.lines = []
+        self.ids = []
+        self.blocks = []
+        self.offset = 0
+        self.post_count = 0
+
+    def write(self, batch):
+        for post in batch.raw_posts:
+            self.lines.append(json.dumps(post, ensure_ascii=False))
+            self.ids.append(str(post.get('id')))
+            if len(self.lines) >= self.block_size:
+                self._flush()
+
+    def _flush(self):
+        if not self.lines:
+            return
+        data = compress_block(('\n'.join(self.lines) + '\n').encode('utf-8'), self.compression, self.level)
+        self.file.write(data)
+        self.blocks.append({'offset': self.offset, 'length': len(data), 'ids': self.ids})
+        self.offset += len(data)
+        self.post_count += len(self.lines)
+        self.lines = []
+        self.ids = []
+
+    def abort(self):
+        self.file.close()
+        for path in [self.output_file, self.index_file]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        self._flush()
+        self.file.close()
+        index = {
+            'version': 1,
+            'format': 'jsonl',
+            'compression': self.compression,
+            'posts': self.post_count,
+            'blocks': self.blocks,
+        }
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        if not self.quiet:
+            print(f"✅ JSON archive saved to: {self.output_file} ({self.post_count} posts, index: {self.index_file})")
+
+
+class FlatCSVWriter:
+    """Flat CSV with one row of key metrics per post"""
+    name = 'Flat CSV'
+    quiet = False
+
+    def __init__(self, output_file, keep_frame=False):
+        self.output_file = output_file
+        self.frames = [] if keep_frame else None
+        self.started = False
+
+    def write(self, batch):
+        import pandas as pd
+        df = batch.to_frame('posts', FLAT_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df.to_csv(self.output_file, mode='a' if self.started else 'w', header=not self.started,
+                  index=False, encoding='utf-8')
+        self.started = True
+        if self.frames is not None:
+            self.frames.append(df)
+
+    def close(self):
+        import pandas as pd
+        if not self.started:
+            pd.DataFrame(columns=FLAT_COLUMNS).to_csv(self.output_file, index=False, encoding='utf-8')
+        if not self.quiet:
+            print(f"✅ Flat CSV saved to: {self.output_file}")
+
+    def frame(self):
+        """Return the collected flat table (only when created with keep_frame=True)"""
+        import pandas as pd
+        if not self.frames:
+            return pd.DataFrame(columns=FLAT_COLUMNS)
+        return pd.concat(self.frames, ignore_index=True)
+
+
+class CSVTableWriter:
+    """One table of the detailed export, streamed to CSV in per-batch blocks.
+
+    With compression every block is a self-contained gzip member or zstd
+    frame, so the file still reads back as one stream (pandas, zcat,
+    instagram_io.open_text). With shard_rows a new file with its own header
+    is started every shard_rows rows: {table}-00001.csv, {table}-00002.csv, ...
+    """
+
+    def __init__(self, path_base, columns=None, compression=None, shard_rows=None, level=None):
+        self.path_base = path_base
+        self.columns = columns
+        self.compression = compression
+        self.shard_rows = shard_rows
+        self.level = ARCHIVE_LEVELS[compression] if compression and level is None else level
+        self.files = []
+        self.file = None
+        self.shard_count = 0
+        self.rows = 0
+
+    def _open_shard(self):
+        if self.file:
+            self.file.close()
+        suffix = CSV_EXTENSIONS[self.compression]
+        path = f"{self.path_base}-{len(self.files) + 1:05d}{suffix}" if self.shard_rows else f"{self.path_base}{suffix}"
+        self.file = open(path, 'wb')
+        self.files.append(path)
+        self.shard_count = 0
+
+    def _write_block(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        data = buffer.getvalue().encode('utf-8')
+        self.file.write(compress_block(data, self.compression, self.level) if self.compression else data)
+
+    def write(self, columns):
+        """Append rows given as {column: values}"""
+        if self.columns is None:
+            self.columns = list(columns)
+        rows = list(zip(*columns.values()))
+        start = 0
+        while start < len(rows):
+            if self.file is None or (self.shard_rows and self.shard_count >= self.shard_rows):
+                self._open_shard()
+            take = len(rows) - start
+            if self.shard_rows:
+                take = min(take, self.shard_rows - self.shard_count)
+            block = rows[start:start + take]
+            self._write_block([self.columns] + block if not self.shard_count else block)
+            self.shard_count += take
+            self.rows += take
+            start += take
+
+    def abort(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        for path in self.files:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self, header_only=False):
+        """Close the current file; header_only writes a header-only file when no rows came"""
+        if self.file is None and header_only:
+            self._open_shard()
+            self._write_block([self.columns])
+        if self.file:
+            self.file.close()
+            self.file = None
+        return self.files
+
+
+class DetailedCSVWriter:
+    """posts, hashtags, comments and child_posts CSVs preserving relationships.
+
+    Rows are streamed batch by batch into one open file per table, optionally
+    gzip/zstd compressed and split into shards of shard_rows rows.
+    """
+    name = 'Detailed CSV'
+    quiet = False
+
+    TABLES = {
+        'posts': DETAILED_POSTS_COLUMNS,
+        'hashtags': None,
+        'comments': None,
+        'child_posts': None,
+    }
+
+    def __init__(self, output_dir, compression=None, shard_rows=None, level=None):
+        if compression not in CSV_EXTENSIONS:
+            raise ValueError(f"Unknown CSV compression: {compression}")
+        if compression == 'zstd':
+            load_zstd()
+        self.output_dir = output_dir
+        Path(output_dir).mkdir(exist_ok=True)
+        self.tables = {
+            table: CSVTableWriter(f"{output_dir}/{table}", columns, compression, shard_rows, level)
+            for table, columns in self.TABLES.items()
+        }
+
+    def write(self, batch):
+        # A file is only created once its table has rows
+        for table, writer in self.tables.items():
+            if batch.row_count(table):
+                writer.write(batch.columns(table, self.TABLES[table]))
+
+    def abort(self):
+        for writer in self.tables.values():
+            writer.abort()
+
+    def close(self):
+        files = 0
+        for table, writer in self.tables.items():
+            files += len(writer.close(header_only=table == 'posts'))
+        if not self.quiet:
+            print(f"✅ Detailed CSVs saved to: {self.output_dir}/ ({files} files)")
+
+
+def utc_timestamps(values):
+    """Arrow UTC timestamps from scraper timestamp strings (empty or missing -> null)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    strings = pa.array([value or None for value in values], pa.string())
+    return pc.cast(strings, pa.timestamp('us', tz='UTC'))
+
+
+def arrow_posts_schema():
+    """Arrow schema of the partitioned dataset's posts table, with nested hashtags, comments and carousel items"""
+    import pyarrow as pa
+
+    timestamp = pa.timestamp('us', tz='UTC')
+    comment = pa.struct([
+        ('comment_id', pa.string()),
+        ('username', pa.string()),
+        ('text', pa.string()),
+        ('timestamp', timestamp),
+        ('likes', pa.int64()),
+    ])
+    child_post = pa.struct([
+        ('child_id', pa.string()),
+        ('position', pa.int32()),
+        ('type', pa.string()),
+        ('shortcode', pa.string()),
+        ('url', pa.string()),
+        ('display_url', pa.string()),
+    ])
+    return pa.schema([
+        ('post_id', pa.string()),
+        ('shortcode', pa.string()),
+        ('timestamp', timestamp),
+        ('type', pa.string()),
+        ('caption', pa.string()),
+        ('likes', pa.int64()),
+        ('comments', pa.int64()),
+        ('engagement', pa.int64()),
+        ('caption_length', pa.int32()),
+        ('hashtag_count', pa.int32()),
+        ('is_carousel', pa.bool_()),
+        ('url', pa.string()),
+        ('is_sponsored', pa.bool_()),
+        ('comments_disabled', pa.bool_()),
+        ('owner_username', pa.string()),
+        ('hashtags', pa.list_(pa.string())),
+        ('latest_comments', pa.list_(comment)),
+        ('child_posts', pa.list_(child_post)),
+    ])
+
+
+def arrow_posts_table(batch, schema=None):
+    """Build a typed Arrow posts table for a batch, nesting its child tables per post"""
+    import pyarrow as pa
+
+    schema = schema or arrow_posts_schema()
+
+    def nested(table, field_name, raw_field):
+        # Child rows are emitted post by post, len(post[raw_field]) rows each
+        # (see normalize_posts), so offsets hold even when a post id repeats
+        offsets = [0, *accumulate(len(post.get(raw_field) or []) for post in batch.raw_posts)]
+        list_type = schema.field(field_name).type
+        item_type = list_type.value_type
+        if pa.types.is_struct(item_type):
+            data = batch.tables[table]
+            children = [
+                utc_timestamps(data[field.name]) if pa.types.is_timestamp(field.type)
+                else pa.array(data[field.name], field.type)
+                for field in item_type
+            ]
+            values = pa.StructArray.from_arrays(children, fields=list(item_type))
+        else:
+            values = pa.array(batch.tables[table]['hashtag'], item_type)
+        return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), values, type=list_type)
+
+    posts = batch.tables['posts']
+    columns = {}
+    for field in schema:
+        if field.name == 'timestamp':
+            columns[field.name] = utc_timestamps(posts['timestamp'])
+        elif field.name in posts:
+            columns[field.name] = pa.array(posts[field.name], field.type)
+    columns['hashtags'] = nested('hashtags', 'hashtags', 'hashtags')
+    columns['latest_comments'] = nested('comments', 'latest_comments', 'latestComments')
+    columns['child_posts'] = nested('child_posts', 'child_posts', 'childPosts')
+    return pa.table(columns, schema=schema)
+
+
+def raw_posts_schema():
+    """Arrow schema of data.parquet: scraper post fields in scraper order, then derived metrics.
+
+    Top-level strings are large_string and the timestamp is parsed to UTC,
+    as in the original DataFrame export; nested comments, replies and
+    carousel items are typed structs.
+    """
+    import pyarrow as pa
+
+    owner = pa.struct([
+        ('id', pa.string()),
+        ('is_verified', pa.bool_()),
+        ('profile_pic_url', pa.string()),
+        ('username', pa.string()),
+    ])
+    comment_fields = [
+        ('id', pa.string()),
+        ('text', pa.string()),
+        ('ownerUsername', pa.string()),
+        ('ownerProfilePicUrl', pa.string()),
+        ('timestamp', pa.string()),
+        ('repliesCount', pa.int64()),
+    ]
+    reply = pa.struct(comment_fields + [
+        ('replies', pa.list_(pa.null())),
+        ('likesCount', pa.int64()),
+        ('owner', owner),
+    ])
+    comment = pa.struct(comment_fields + [
+        ('replies', pa.list_(reply)),
+        ('likesCount', pa.int64()),
+        ('owner', owner),
+    ])
+    child_post = pa.struct([
+        ('id', pa.string()),
+        ('type', pa.string()),
+        ('shortCode', pa.string()),
+        ('caption', pa.string()),
+        ('hashtags', pa.list_(pa.string())),
+        ('mentions', pa.list_(pa.string())),
+        ('url', pa.string()),
+        ('commentsCount', pa.int64()),
+        ('firstComment', pa.string()),
+        ('latestComments', pa.list_(comment)),
+        ('dimensionsHeight', pa.int64()),
+        ('dimensionsWidth', pa.int64()),
+        ('displayUrl', pa.string()),
+        ('images', pa.list_(pa.string())),
+        ('alt', pa.string()),
+        ('likesCount', pa.int64()),
+        ('timestamp', pa.string()),
+        ('childPosts', pa.list_(pa.null())),
+        ('ownerId', pa.string()),
+    ])
+    music_info = pa.struct([
+        ('artist_name', pa.string()),
+        ('song_name', pa.string()),
+        ('uses_original_audio', pa.bool_()),
+        ('should_mute_audio', pa.bool_()),
+        ('should_mute_audio_reason', pa.string()),
+        ('audio_id', pa.string()),
+    ])
+    text = pa.large_string()
+    return pa.schema([
+        ('inputUrl', text),
+        ('id', text),
+        ('type', text),
+        ('shortCode', text),
+        ('caption', text),
+        ('hashtags', pa.list_(pa.string())),
+        ('mentions', pa.list_(pa.string())),
+        ('url', text),
+        ('commentsCount', pa.int64()),
+        ('firstComment', text),
+        ('latestComments', pa.list_(comment)),
+        ('dimensionsHeight', pa.int64()),
+        ('dimensionsWidth', pa.int64()),
+        ('displayUrl', text),
+        ('images', pa.list_(pa.string())),
+        ('alt', text),
+        ('likesCount', pa.int64()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('childPosts', pa.list_(child_post)),
+        ('ownerFullName', text),
+        ('ownerUsername', text),
+        ('ownerId', text),
+        ('isSponsored', pa.bool_()),
+        ('isCommentsDisabled', pa.bool_()),
+        ('videoUrl', text),
+        ('videoViewCount', pa.float64()),
+        ('videoPlayCount', pa.float64()),
+        ('productType', text),
+        ('videoDuration', pa.float64()),
+        ('musicInfo', music_info),
+        ('isPinned', pa.bool_()),
+        ('engagement', pa.int64()),
+        ('caption_length', pa.int64()),
+        ('hashtag_count', pa.int64()),
+        ('is_carousel', pa.bool_()),
+    ])
+
+
+class ParquetWriter:
+    """Raw scraper posts plus derived metrics, streamed to one Parquet file.
+
+    Keeps the columns of the original DataFrame export: every scraper field
+    under its own name, timestamp parsed to UTC, and engagement,
+    caption_length, hashtag_count and is_carousel appended. The schema is
+    fixed up front (raw_posts_schema), so every batch is written as it
+    arrives (row groups of at most row_group_size rows) and nothing is held
+    across batches. Fields a dump lacks are null columns; scraper fields
+    the schema does not know are skipped and reported at close.
+    """
+    name = 'Parquet'
+    quiet = False
+
+    DERIVED_COLUMNS = ['engagement', 'caption_length', 'hashtag_count', 'is_carousel']
+
+    def __init__(self, output_file, compression='snappy', row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.output_file = output_file
+        self.row_group_size = row_group_size
+        self.schema = raw_posts_schema()
+        self.raw_fields = [name for name in self.schema.names if name not in self.DERIVED_COLUMNS]
+        self.writer = pq.ParquetWriter(output_file, self.schema, compression=compression)
+        self.unknown_fields = set()
+
+    def write(self, batch):
+        pa = self.pa
+        raw_posts = batch.raw_posts
+        known = set(self.raw_fields)
+        for post in raw_posts:
+            if not known.issuperset(post):
+                self.unknown_fields.update(post.keys() - known)
+
+        columns = []
+        for field in self.schema:
+            if field.name == 'timestamp':
+                columns.append(utc_timestamps([post.get('timestamp') for post in raw_posts]))
+            elif field.name in self.DERIVED_COLUMNS:
+                columns.append(pa.array(batch.tables['posts'][field.name], field.type))
+            else:
+                columns.append(pa.array([post.get(field.name) for post in raw_posts], field.type))
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema),
+                                row_group_size=self.row_group_size)
+
+    def abort(self):
+        """Discard the partly written file"""
+        self.writer.close()
+        Path(self.output_file).unlink(missing_ok=True)
+
+    def close(self):
+        self.writer.close()
+        if self.unknown_fields:
+            print(f"⚠️  Parquet: fields not in the schema were skipped: {', '.join(sorted(self.unknown_fields))}")
+        if not self.quiet:
+            print(f"✅ Parquet file saved to: {self.output_file}")
+
+
+class ParquetDatasetWriter:
+    """Append posts to a Hive-partitioned Parquet dataset shared by many accounts.
+
+    Files are laid out as account=<username>/month=<YYYY-MM>/part-<run>.parquet.
+    A post is stored once per account: when a run carries a post, its
+    earlier rows are dropped from whichever month partition holds them, and
+    a post repeated within a run keeps its last copy. Rows are buffered per
+    partition and flushed in row groups of row_group_size.
+
+    Every affected partition is first written in full to a hidden staging
+    file; only when all of them are complete are they renamed into place
+    and the files they replace deleted, so a failed run leaves the dataset
+    as it was.
+    """
+    name = 'Parquet dataset'
+    quiet = False
+
+    def __init__(self, dataset_dir, compression='zstd', row_group_size=DEFAULT_ROW_GROUP_SIZE, account=None):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.pc = pc
+        self.pq = pq
+        self.dataset_dir = Path(dataset_dir)
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.account = account
+        self.schema = arrow_posts_schema()
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.partitions = {}
+        # (account, post_id) -> (partition key, row in that partition) of the last copy in this run
+        self.latest = {}
+
+    def _partition(self, account, month):
+        key = (account, month)
+        if key not in self.partitions:
+            directory = self.dataset_dir / f"account={account}" / f"month={month}"
+            self.partitions[key] = {
+                'directory': directory,
+                'path': directory / f"part-{self.run_id}.parquet",
+                # Dot-prefixed files are ignored by dataset readers until renamed
+                'tmp_path': directory / f".part-{self.run_id}.parquet.tmp",
+                'old_files': sorted(directory.glob('*.parquet')),
+                'writer': None,
+                'buffer': [],
+                'buffered_rows': 0,
+                'post_ids': [],
+                'rows': 0,
+            }
+        return self.partitions[key]
+
+    def _flush(self, partition):
+        if not partition['buffer']:
+            return
+        if partition['writer'] is None:
+            partition['directory'].mkdir(parents=True, exist_ok=True)
+            partition['writer'] = self.pq.ParquetWriter(partition['tmp_path'], self.schema,
+                                                        compression=self.compression)
+        table = self.pa.concat_tables(partition['buffer'])
+        partition['writer'].write_table(table, row_group_size=self.row_group_size)
+        partition['rows'] += len(table)
+        partition['buffer'] = []
+        partition['buffered_rows'] = 0
+
+    def write(self, batch):
+        table = arrow_posts_table(batch, self.schema)
+        months = self.pc.strftime(table['timestamp'], format='%Y-%m').to_pylist()
+        accounts = table['owner_username'].to_pylist()
+
+        rows_by_partition = {}
+        for idx, (account, month) in enumerate(zip(accounts, months)):
+            key = (account or self.account or 'unknown', month or 'unknown')
+            rows_by_partition.setdefault(key, []).append(idx)
+
+        for key, indices in rows_by_partition.items():
+            partition = self._partition(*key)
+            rows = table.take(self.pa.array(indices))
+            for post_id in rows['post_id'].to_pylist():
+                self.latest[(key[0], post_id)] = (key, len(partition['post_ids']))
+                partition['post_ids'].append(post_id)
+            partition['buffer'].append(rows)
+            partition['buffered_rows'] += len(indices)
+            if partition['buffered_rows'] >= self.row_group_size:
+                self._flush(partition)
+
+    def _add_partitions_with_stored_copies(self, run_ids):
+        """Also rewrite untouched partitions that hold earlier copies of this run's posts"""
+        for account, post_ids in run_ids.items():
+            value_set = self.pa.array(list(post_ids), self.pa.string())
+            for directory in sorted((self.dataset_dir / f"account={account}").glob('month=*')):
+                month = directory.name.split('=', 1)[1]
+                if (account, month) in self.partitions:
+                    continue
+                for stored_file in directory.glob('*.parquet'):
+                    stored = self.pq.read_table(stored_file, columns=['post_id'])['post_id']
+                    if self.pc.any(self.pc.is_in(stored, value_set=value_set)).as_py():
+                        self._partition(account, month)
+                        break
+
+    def _stage(self, partition, key, run_ids):
+        """Write the partition's complete new contents to its staging file"""
+        # Stored posts of this partition that the run did not bring again
+        fresh_ids = self.pa.array(list(run_ids.get(key[0], ())), self.pa.string())
+        for old_file in partition['old_files']:
+            old = self.pq.read_table(old_file).select(self.schema.names).cast(self.schema)
+            keep = self.pc.invert(self.pc.is_in(old['post_id'], value_set=fresh_ids))
+            partition['buffer'].append(old.filter(keep))
+        run_rows = len(partition['post_ids'])
+        self._flush(partition)
+        if partition['writer'] is None:
+            return
+        partition['writer'].close()
+        partition['writer'] = None
+
+        # Drop rows of posts repeated later in the run (rare, so the file is only rewritten then)
+        keep = [self.latest[(key[0], post_id)] == (key, row) for row, post_id in enumerate(partition['post_ids'])]
+        if not all(keep):
+            table = self.pq.read_table(partition['tmp_path'])
+            mask = self.pa.array(keep + [True] * (len(table) - run_rows))
+            table = table.filter(mask)
+            self.pq.write_table(table, partition['tmp_path'], compression=self.compression,
+                                row_group_size=self.row_group_size)
+            partition['rows'] = len(table)
+
+    def abort(self):
+        """Discard this run's files and leave the dataset untouched"""
+        for partition in self.partitions.values():
+            if partition['writer'] is not None:
+                partition['writer'].close()
+                partition['writer'] = None
+            partition['tmp_path'].unlink(missing_ok=True)
+
+    def close(self):
+        run_ids = {}
+        for account, post_id in self.latest:
+            run_ids.setdefault(account, set()).add(post_id)
+        try:
+            self._add_partitions_with_stored_copies(run_ids)
+            for key, partition in self.partitions.items():
+                self._stage(partition, key, run_ids)
+        except Exception:
+            self.abort()
+            raise
+
+        # Every partition is staged; swap them in
+        for partition in self.partitions.values():
+            if partition['rows']:
+                partition['tmp_path'].replace(partition['path'])
+            else:
+                partition['tmp_path'].unlink(missing_ok=True)
+            for old_file in partition['old_files']:
+                old_file.unlink(missing_ok=True)
+            if not partition['rows'] and partition['directory'].exists() and not any(partition['directory'].iterdir()):
+                partition['directory'].rmdir()
+
+        if not self.quiet:
+            print(f"✅ Parquet dataset updated: {self.dataset_dir}/ "
+                  f"({len(self.latest)} posts in {len(self.partitions)} partitions)")
+
+
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+]
+
+SQLITE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS posts (
+        post_id TEXT PRIMARY KEY,
+        shortcode TEXT,
+        timestamp TEXT,
+        type TEXT,
+        caption TEXT,
+        likes INTEGER,
+        comments INTEGER,
+        engagement INTEGER,
+        url TEXT,
+        is_sponsored INTEGER,
+        comments_disabled INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS hashtags (
+        post_id TEXT NOT NULL,
+        hashtag TEXT NOT NULL,
+        PRIMARY KEY (post_id, hashtag)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS comments (
+        comment_id TEXT NOT NULL PRIMARY KEY,
+        post_id TEXT NOT NULL,
+        username TEXT,
+        text TEXT,
+        timestamp TEXT,
+        likes INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS child_posts (
+        post_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        child_id TEXT,
+        type TEXT,
+        shortcode TEXT,
+        url TEXT,
+        display_url TEXT,
+        PRIMARY KEY (post_id, position)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_posts_engagement ON posts(engagement)',
+    'CREATE INDEX IF NOT EXISTS idx_hashtags_tag ON hashtags(hashtag)',
+    'CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id)',
+    '''
+    CREATE VIEW IF NOT EXISTS post_performance AS
+    SELECT
+        DATE(timestamp) as date,
+        COUNT(*) as posts,
+        AVG(likes) as avg_likes,
+        AVG(comments) as avg_comments,
+        AVG(engagement) as avg_engagement
+    FROM posts
+    GROUP BY DATE(timestamp)
+    ''',
+    '''
+    CREATE VIEW IF NOT EXISTS hashtag_performance AS
+    SELECT
+        h.hashtag,
+        COUNT(DISTINCT h.post_id) as usage_count,
+        AVG(p.engagement) as avg_engagement
+    FROM hashtags h
+    JOIN posts p ON h.post_id = p.post_id
+    GROUP BY h.hashtag
+    ORDER BY avg_engagement DESC
+    ''',
+]
+
+# New posts are inserted; known posts get fresh counts and metadata. A missing
+# count in a new scrape (hidden likes) keeps the last known value.
+UPSERT_POST_SQL = '''
+    INSERT INTO posts (post_id, shortcode, timestamp, type, caption, likes, comments,
+                       engagement, url, is_sponsored, comments_disabled)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(post_id) DO UPDATE SET
+        shortcode = excluded.shortcode,
+        timestamp = excluded.timestamp,
+        type = excluded.type,
+        caption = excluded.caption,
+        likes = COALESCE(excluded.likes, posts.likes),
+        comments = COALESCE(excluded.comments, posts.comments),
+        engagement = COALESCE(excluded.likes, posts.likes, 0) + COALESCE(excluded.comments, posts.comments, 0),
+        url = excluded.url,
+        is_sponsored = excluded.is_sponsored,
+        comments_disabled = excluded.comments_disabled
+'''
+
+# latestComments is only a window of recent comments, so comments accumulate
+# across scrapes and known ones get refreshed text and likes. Comments scraped
+# without an id are keyed by comment_key() so re-runs update them too.
+UPSERT_COMMENT_SQL = '''
+    INSERT INTO comments (comment_id, post_id, username, text, timestamp, likes)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(comment_id) DO UPDATE SET
+        text = excluded.text,
+        likes = excluded.likes
+'''
+
+
+def comment_key(post_id, comment_id, username, timestamp):
+    """Comment id, or a deterministic key from post, timestamp and author when the scrape has none"""
+    return comment_id or f"{post_id}:{timestamp or ''}:{username or ''}"
+
+
+class SQLiteWriter:
+    """SQLite database loaded with executemany upserts inside one transaction.
+
+    Re-running against an existing database appends new posts and refreshes
+    counts of known ones instead of rebuilding the tables.
+    """
+    name = 'SQLite'
+    quiet = False
+
+    def __init__(self, output_file):
+        import sqlite3
+        self.output_file = output_file
+        # Package builds may hand the writer to a writer thread; it is used by one thread at a time
+        self.conn = sqlite3.connect(output_file, isolation_level=None, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            self.conn.execute(pragma)
+        self._drop_legacy_tables()
+        for statement in SQLITE_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute('BEGIN')
+        self.post_count = 0
+
+    def _drop_legacy_tables(self):
+        """Drop tables created by the old DataFrame.to_sql loader, which have no primary keys"""
+        columns = self.conn.execute('PRAGMA table_info(posts)').fetchall()
+        if columns and not any(column[5] for column in columns):
+            print(f"⚠️  Rebuilding {self.output_file}: tables without primary keys cannot be upserted")
+            for table in ('posts', 'hashtags', 'comments', 'child_posts'):
+                self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def write(self, batch):
+        conn = self.conn
+        post_ids = [(post_id,) for post_id in batch.tables['posts']['post_id']]
+
+        conn.executemany(UPSERT_POST_SQL, batch.rows('posts', SQLITE_POSTS_COLUMNS))
+
+        # Hashtags and carousel items belong to the current version of a post
+        conn.executemany('DELETE FROM hashtags WHERE post_id = ?', post_ids)
+        conn.executemany('INSERT OR IGNORE INTO hashtags (post_id, hashtag) VALUES (?, ?)',
+                         batch.rows('hashtags'))
+        conn.executemany('DELETE FROM child_posts WHERE post_id = ?', post_ids)
+        conn.executemany(
+            'INSERT INTO child_posts (post_id, position, child_id, type, shortcode, url, display_url) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            batch.rows('child_posts', ['post_id', 'position', 'child_id', 'type', 'shortcode', 'url', 'display_url'])
+        )
+
+        conn.executemany(UPSERT_COMMENT_SQL, (
+            (comment_key(post_id, comment_id, username, timestamp), post_id, username, text, timestamp, likes)
+            for post_id, comment_id, username, text, timestamp, likes in batch.rows('comments')
+        ))
+        self.post_count += len(batch)
+
+    def abort(self):
+        """Roll back everything loaded by this writer"""
+        self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+    def close(self):
+        self.conn.execute('COMMIT')
+        self.conn.execute('PRAGMA optimize')
+        self.conn.close()
+
+        if not self.quiet:
+            print(f"✅ SQLite database saved to: {self.output_file} ({self.post_count} posts upserted)")
+            print("   Sample queries:")
+            print("   - SELECT * FROM posts ORDER BY engagement DESC LIMIT 10;")
+            print("   - SELECT * FROM hashtag_performance LIMIT 20;")
+            print("   - SELECT * FROM post_performance ORDER BY date;")
+
+
+# Shared multi-account database: every table is keyed by account, and the
+# summary tables are maintained incrementally instead of being views
+WAREHOUSE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS posts (
+        account TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        shortcode TEXT,
+        timestamp TEXT,
+        type TEXT,
+        caption TEXT,
+        likes INTEGER,
+        comments INTEGER,
+        engagement INTEGER,
+        url TEXT,
+        is_sponsored INTEGER,
+        comments_disabled INTEGER,
+        PRIMARY KEY (account, post_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS hashtags (
+        account TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        hashtag TEXT NOT NULL,
+        PRIMARY KEY (account, post_id, hashtag)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS comments (
+        account TEXT NOT NULL,
+        comment_id TEXT NOT NULL,
+        post_id TEXT NOT NULL,
+        username TEXT,
+        text TEXT,
+        timestamp TEXT,
+        likes INTEGER,
+        PRIMARY KEY (account, comment_id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_posts_account_timestamp ON posts(account, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_posts_account_engagement ON posts(account, engagement)',
+    'CREATE INDEX IF NOT EXISTS idx_hashtags_hashtag_account ON hashtags(hashtag, account)',
+    'CREATE INDEX IF NOT EXISTS idx_comments_account_post ON comments(account, post_id)',
+    '''
+    CREATE TABLE IF NOT EXISTS account_daily (
+        account TEXT NOT NULL,
+        date TEXT NOT NULL,
+        posts INTEGER NOT NULL,
+        likes INTEGER NOT NULL,
+        comments INTEGER NOT NULL,
+        engagement INTEGER NOT NULL,
+        PRIMARY KEY (account, date)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS account_summary (
+        account TEXT PRIMARY KEY,
+        posts INTEGER NOT NULL,
+        likes INTEGER NOT NULL,
+        comments INTEGER NOT NULL,
+        engagement INTEGER NOT NULL,
+        avg_engagement REAL,
+        first_post TEXT,
+        last_post TEXT,
+        refreshed_at TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS hashtag_summary (
+        hashtag TEXT NOT NULL,
+        account TEXT NOT NULL,
+        usage_count INTEGER NOT NULL,
+        engagement_sum INTEGER NOT NULL,
+        avg_engagement REAL,
+        PRIMARY KEY (hashtag, account)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_hashtag_summary_account ON hashtag_summary(account, usage_count)',
+]
+
+# Summary keys touched by the current load; the summaries are rebuilt for these keys only
+WAREHOUSE_TEMP_SCHEMA = [
+    'CREATE TEMP TABLE IF NOT EXISTS batch_posts (account TEXT, post_id TEXT, PRIMARY KEY (account, post_id))',
+    'CREATE TEMP TABLE IF NOT EXISTS dirty_days (account TEXT, date TEXT, PRIMARY KEY (account, date))',
+    'CREATE TEMP TABLE IF NOT EXISTS dirty_hashtags (hashtag TEXT, account TEXT, PRIMARY KEY (hashtag, account))',
+    'CREATE TEMP TABLE IF NOT EXISTS dirty_accounts (account TEXT PRIMARY KEY)',
+]
+
+WAREHOUSE_UPSERT_POST_SQL = '''
+    INSERT INTO posts (account, post_id, shortcode, timestamp, type, caption, likes, comments,
+                       engagement, url, is_sponsored, comments_disabled)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(account, post_id) DO UPDATE SET
+        shortcode = excluded.shortcode,
+        timestamp = excluded.timestamp,
+        type = excluded.type,
+        caption = excluded.caption,
+        likes = COALESCE(excluded.likes, posts.likes),
+        comments = COALESCE(excluded.comments, posts.comments),
+        engagement = COALESCE(excluded.likes, posts.likes, 0) + COALESCE(excluded.comments, posts.comments, 0),
+        url = excluded.url,
+        is_sponsored = excluded.is_sponsored,
+        comments_disabled = excluded.comments_disabled
+'''
+
+WAREHOUSE_UPSERT_COMMENT_SQL = '''
+    INSERT INTO comments (account, comment_id, post_id, username, text, timestamp, likes)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(account, comment_id) DO UPDATE SET
+        text = excluded.text,
+        likes = excluded.likes
+'''
+
+# Days and hashtags of the posts in batch_posts, run before and after the
+# upsert so both the old and the new contribution of a post get refreshed.
+# CROSS JOIN pins the small key table as the outer loop and INDEXED BY the
+# composite indexes; without statistics SQLite may scan the large tables instead.
+MARK_DIRTY_SQL = [
+    '''INSERT OR IGNORE INTO dirty_days
+       SELECT p.account, DATE(p.timestamp) FROM batch_posts b
+       CROSS JOIN posts p ON p.account = b.account AND p.post_id = b.post_id
+       WHERE p.timestamp IS NOT NULL''',
+    '''INSERT OR IGNORE INTO dirty_hashtags
+       SELECT h.hashtag, h.account FROM batch_posts b
+       CROSS JOIN hashtags h ON h.account = b.account AND h.post_id = b.post_id''',
+    'INSERT OR IGNORE INTO dirty_accounts SELECT DISTINCT account FROM batch_posts',
+]
+
+REFRESH_SUMMARIES_SQL = [
+    'DELETE FROM account_daily WHERE (account, date) IN (SELECT account, date FROM dirty_days)',
+    '''INSERT INTO account_daily (account, date, posts, likes, comments, engagement)
+       SELECT d.account, d.date, COUNT(*), COALESCE(SUM(p.likes), 0), COALESCE(SUM(p.comments), 0),
+              COALESCE(SUM(p.engagement), 0)
+       FROM dirty_days d
+       CROSS JOIN posts p INDEXED BY idx_posts_account_timestamp ON p.account = d.account AND p.timestamp >= d.date AND p.timestamp < DATE(d.date, '+1 day')
+       GROUP BY d.account, d.date''',
+    'DELETE FROM hashtag_summary WHERE (hashtag, account) IN (SELECT hashtag, account FROM dirty_hashtags)',
+    '''INSERT INTO hashtag_summary (hashtag, account, usage_count, engagement_sum, avg_engagement)
+       SELECT h.hashtag, h.account, COUNT(*), COALESCE(SUM(p.engagement), 0), AVG(p.engagement)
+       FROM dirty_hashtags d
+       CROSS JOIN hashtags h INDEXED BY idx_hashtags_hashtag_account ON h.hashtag = d.hashtag AND h.account = d.account
+       CROSS JOIN posts p ON p.account = h.account AND p.post_id = h.post_id
+       GROUP BY h.hashtag, h.account''',
+    'DELETE FROM account_summary WHERE account IN (SELECT account FROM dirty_accounts)',
+    # Posts without a timestamp have no day in account_daily but still count towards the account
+    '''INSERT INTO account_summary
+       SELECT account, SUM(posts), SUM(likes), SUM(comments), SUM(engagement),
+              ROUND(1.0 * SUM(engagement) / SUM(posts), 2), MIN(date), MAX(date), DATETIME('now')
+       FROM (
+           SELECT account, date, posts, likes, comments, engagement
+           FROM account_daily WHERE account IN (SELECT account FROM dirty_accounts)
+           UNION ALL
+           SELECT p.account, NULL, COUNT(*), COALESCE(SUM(p.likes), 0), COALESCE(SUM(p.comments), 0),
+                  COALESCE(SUM(p.engagement), 0)
+           FROM dirty_accounts a
+           CROSS JOIN posts p INDEXED BY idx_posts_account_timestamp ON p.account = a.account AND p.timestamp IS NULL
+           GROUP BY p.account
+       )
+       GROUP BY account''',
+    'DELETE FROM dirty_days',
+    'DELETE FROM dirty_hashtags',
+    'DELETE FROM dirty_accounts',
+]
+
+
+class SQLiteWarehouseWriter:
+    """Multi-account SQLite warehouse for cross-brand comparison.
+
+    Posts, hashtags and comments of any number of accounts share one
+    database, keyed by account. account_daily, account_summary and
+    hashtag_summary are plain tables; close() rebuilds only the days,
+    hashtags and accounts touched by this load, so dashboards read
+    precomputed rows instead of aggregating posts on every query.
+    Posts without ownerUsername are filed under account (the dump's account).
+    """
+    name = 'SQLite warehouse'
+    quiet = False
+
+    def __init__(self, output_file, account=None):
+        import sqlite3
+        self.output_file = output_file
+        self.account = account
+        self.conn = sqlite3.connect(output_file, isolation_level=None, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            self.conn.execute(pragma)
+        for statement in WAREHOUSE_SCHEMA + WAREHOUSE_TEMP_SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute('BEGIN')
+        self.post_count = 0
+        self.accounts = set()
+
+    def write(self, batch):
+        conn = self.conn
+        posts = batch.tables['posts']
+        accounts = [owner or self.account or 'unknown' for owner in posts['owner_username']]
+        account_of = dict(zip(posts['post_id'], accounts))
+        post_keys = list(zip(accounts, posts['post_id']))
+        self.accounts.update(accounts)
+
+        conn.execute('DELETE FROM batch_posts')
+        conn.executemany('INSERT OR IGNORE INTO batch_posts VALUES (?, ?)', post_keys)
+        for statement in MARK_DIRTY_SQL:
+            conn.execute(statement)
+
+        conn.executemany(WAREHOUSE_UPSERT_POST_SQL, (
+            (account_of[row[0]], *row) for row in batch.rows('posts', SQLITE_POSTS_COLUMNS)
+        ))
+        conn.executemany('DELETE FROM hashtags WHERE account = ? AND post_id = ?', post_keys)
+        conn.executemany('INSERT OR IGNORE INTO hashtags (account, post_id, hashtag) VALUES (?, ?, ?)', (
+            (account_of[post_id], post_id, hashtag) for post_id, hashtag in batch.rows('hashtags')
+        ))
+        conn.executemany(WAREHOUSE_UPSERT_COMMENT_SQL, (
+            (account_of[post_id], comment_key(post_id, comment_id, username, timestamp), post_id,
+             username, text, timestamp, likes)
+            for post_id, comment_id, username, text, timestamp, likes in batch.rows('comments')
+        ))
+
+        for statement in MARK_DIRTY_SQL:
+            conn.execute(statement)
+        self.post_count += len(batch)
+
+    def refresh(self, full=False):
+        """Rebuild summary rows for the touched keys (or, with full, for everything)"""
+        conn = self.conn
+        if full:
+            conn.execute('DELETE FROM batch_posts')
+            conn.execute('INSERT INTO batch_posts SELECT account, post_id FROM posts')
+            for statement in MARK_DIRTY_SQL:
+                conn.execute(statement)
+        for statement in REFRESH_SUMMARIES_SQL:
+            conn.execute(statement)
+
+    def abort(self):
+        """Roll back everything loaded by this writer"""
+        self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+    def close(self):
+        self.refresh()
+        self.conn.execute('COMMIT')
+        self.conn.execute('PRAGMA optimize')
+        self.conn.close()
+
+        if not self.quiet:
+            print(f"✅ SQLite warehouse saved to: {self.output_file} "
+                  f"({self.post_count} posts upserted for {', '.join(sorted(map(str, self.accounts)))})")
+            print("   Sample queries:")
+            print("   - SELECT * FROM account_summary ORDER BY avg_engagement DESC;")
+            print("   - SELECT * FROM hashtag_summary WHERE hashtag = 'nutrilak' ORDER BY usage_count DESC;")
+            print("   - SELECT * FROM account_daily WHERE account = 'nutrilak_uz' ORDER BY date;")
@@ -1,5 +1,49 @@
-def main():
-    print("Hello from nestle!")
+#!/usr/bin/env python3
+"""
+Nestle Analytics CLI
+Single entry point for the converter, the account analyzer and the competitor report
+"""
+
+import importlib
+import sys
+
+# Subcommand -> (module providing main(), description).
+# Modules are imported only when their subcommand runs, so heavy dependencies
+# (pandas, pyarrow, sqlite3) are loaded by the commands that need them.
+COMMANDS = {
+    'convert': ('convert_instagram_data', 'Convert an Instagram dump to CSV, Parquet or SQLite'),
+    'analyze': ('analyze_instagram', 'Markdown analysis report for one or many accounts'),
+    'competitors': ('analyze_competitors', 'Competitor report from crawl results'),
+    'rank': ('post_ranking', 'Top posts and engagement percentiles across account dumps'),
+}
+
+
+def print_usage():
+    print("Usage: python main.py <command> [args...]")
+    print()
+    print("Commands:")
+    for command, (_, description) in COMMANDS.items():
+        print(f"  {command:<13}{description}")
+    print()
+    print("Run a command without arguments to see its own usage.")
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else list(argv)
+    if not args or args[0] in ('-h', '--help', 'help'):
+        print_usage()
+        sys.exit(0 if args else 1)
+
+    command = args[0]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}")
+        print_usage()
+        sys.exit(1)
+
+    module = importlib.import_module(COMMANDS[command][0])
+    # Each script parses sys.argv itself
+    sys.argv = [f"{sys.argv[0]} {command}"] + args[1:]
+    module.main()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Profiler
+Records wall time, CPU time, peak RSS and row counts for each stage of a run
+"""
+
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Set to a report path (or 1 for the script's default) to profile without CLI flags
+PROFILE_ENV = 'PIPELINE_PROFILE'
+# Stage to run under cProfile
+PROFILE_STAGE_ENV = 'PIPELINE_PROFILE_STAGE'
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class StageTimer:
+    """One entry into a stage; repeated entries accumulate into the same record"""
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def add_rows(self, rows):
+        self.rows += rows
+
+    def __enter__(self):
+        profiler = self.profiler
+        record = profiler.stages.get(self.name)
+        if record is None:
+            record = {
+                'stage': self.name,
+                'parent': profiler.active[-1] if profiler.active else None,
+                'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0,
+                'peak_rss_mb': None, 'rss_growth_mb': 0.0,
+            }
+            profiler.stages[self.name] = record
+        self.record = record
+        profiler.active.append(self.name)
+        self.rss_before = peak_rss_mb()
+        if self.name == profiler.cprofile_stage:
+            profiler.cprofile.enable()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        profiler = self.profiler
+        if self.name == profiler.cprofile_stage:
+            profiler.cprofile.disable()
+        profiler.active.pop()
+
+        record = self.record
+        record['calls'] += 1
+        record['wall_s'] += wall
+        record['cpu_s'] += cpu
+        record['rows'] += self.rows
+        peak = peak_rss_mb()
+        if peak is not None:
+            record['peak_rss_mb'] = max(record['peak_rss_mb'] or 0, peak)
+            record['rss_growth_mb'] += peak - self.rss_before
+        return False
+
+
+class _NullStage:
+    """Stage stand-in used when profiling is off"""
+
+    def add_rows(self, rows):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class StageProfiler:
+    """Collects per-stage measurements and writes them as a JSON timing report.
+
+    Stages may nest; an outer stage's times include its inner stages, and each
+    record names the stage it was first entered from. CPU time covers this
+    process only, so work done in worker processes shows up as wall time.
+    """
+
+    def __init__(self, output_file=None, cprofile_stage=None, enabled=True):
+        self.enabled = enabled
+        self.output_file = output_file
+        self.cprofile_stage = cprofile_stage
+        self.cprofile = None
+        if cprofile_stage:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+        self.stages = {}
+        self.active = []
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    def stage(self, name, rows=0):
+        """Context manager measuring one stage; use .add_rows() on it when rows are known later"""
+        if not self.enabled:
+            return NULL_STAGE
+        return StageTimer(self, name, rows)
+
+    @classmethod
+    def from_args(cls, args, default_output):
+        """Build a profiler from --profile <report.json> / --profile-stage <stage> in args.
+
+        The flags are removed from args. PIPELINE_PROFILE and
+        PIPELINE_PROFILE_STAGE enable profiling the same way without flags.
+        """
+        output_file = os.environ.get(PROFILE_ENV)
+        if output_file in ('1', 'true', 'yes'):
+            output_file = default_output
+        cprofile_stage = os.environ.get(PROFILE_STAGE_ENV)
+        if '--profile' in args:
+            idx = args.index('--profile')
+            output_file = args[idx + 1]
+            del args[idx:idx + 2]
+        if '--profile-stage' in args:
+            idx = args.index('--profile-stage')
+            cprofile_stage = args[idx + 1]
+            del args[idx:idx + 2]
+        if cprofile_stage and not output_file:
+            output_file = default_output
+        if not output_file:
+            return DISABLED
+        return cls(output_file, cprofile_stage)
+
+    def report(self):
+        """Timing report as a JSON-serializable dict"""
+        peak = peak_rss_mb()
+        stages = []
+        for record in self.stages.values():
+            stage = dict(record)
+            stage['wall_s'] = round(stage['wall_s'], 4)
+            stage['cpu_s'] = round(stage['cpu_s'], 4)
+            stage['rss_growth_mb'] = round(stage['rss_growth_mb'], 1)
+            if stage['peak_rss_mb'] is not None:
+                stage['peak_rss_mb'] = round(stage['peak_rss_mb'], 1)
+            stages.append(stage)
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'command': sys.argv,
+            'total_wall_s': round(time.perf_counter() - self.started, 4),
+            'total_cpu_s': round(time.process_time() - self.cpu_started, 4),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'stages': stages,
+        }
+
+    def save(self):
+        """Write the timing report and, if a stage was chosen, its cProfile dump"""
+        if not self.enabled:
+            return None
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        print(f"⏱️  Timing report saved to {self.output_file}")
+
+        if self.cprofile_stage:
+            if self.cprofile_stage in self.stages:
+                stage_name = self.cprofile_stage.replace(':', '_').replace('/', '_')
+                prof_file = Path(self.output_file).with_suffix(f".{stage_name}.prof")
+                self.cprofile.dump_stats(str(prof_file))
+                print(f"⏱️  cProfile stats for '{self.cprofile_stage}' saved to {prof_file}")
+            else:
+                print(f"⚠️  Stage '{self.cprofile_stage}' never ran; available: {', '.join(self.stages)}")
+        return self.output_file
+
+
+DISABLED = StageProfiler(enabled=False)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Instagram Post Ranking
+Top-K and bottom-K posts by any metric, engagement percentiles and outlier flags,
+with mergeable quantile sketches for dumps that do not fit in memory
+"""
+
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from instagram_io import DEFAULT_BATCH_SIZE, iter_batches, iter_posts
+
+# Narrow projection used for ranking; captions and nested lists are never loaded
+RANK_COLUMNS = ['id', 'ownerUsername', 'type', 'timestamp', 'url', 'likesCount', 'commentsCount']
+DEFAULT_PERCENTILES = [0.25, 0.5, 0.75, 0.9, 0.99]
+# Tukey fences: outliers lie more than this many interquartile ranges outside the quartiles
+OUTLIER_FACTOR = 1.5
+# Relative error of sketch quantiles
+SKETCH_ACCURACY = 0.01
+ALL_POSTS = 'all'
+# Narrow rows buffered by PostRanker before they are merged into the candidates and sketches
+FLUSH_ROWS = 100000
+
+
+def ranking_frame(posts, with_hashtags=False):
+    """Narrow frame of raw posts, plus post-hashtag pairs (post row, hashtag) when asked"""
+    frame = pd.DataFrame({column: [post.get(column) for post in posts] for column in RANK_COLUMNS})
+    for column in ['likesCount', 'commentsCount']:
+        # Hidden counts come as -1 and rank like missing ones
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').fillna(0).clip(lower=0).astype('int64')
+    frame['engagement'] = frame['likesCount'] + frame['commentsCount']
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], utc=True, errors='coerce')
+    if not with_hashtags:
+        return frame, None
+    pairs = [(row, tag) for row, post in enumerate(posts) for tag in post.get('hashtags') or []]
+    hashtags = pd.DataFrame(pairs, columns=['post', 'hashtag']).astype({'post': 'int64', 'hashtag': object})
+    return frame, hashtags
+
+
+def _month(frame, hashtags):
+    timestamps = pd.to_datetime(frame['timestamp'], utc=True).dt.tz_localize(None)
+    return np.arange(len(frame)), timestamps.dt.to_period('M').astype(str).where(timestamps.notna())
+
+
+def _hashtag(frame, hashtags):
+    if hashtags is None:
+        raise ValueError("Grouping by hashtag needs the post-hashtag table")
+    return hashtags['post'].to_numpy(), hashtags['hashtag']
+
+
+# Derived groupings: name -> function(frame, hashtags) returning (row positions, group keys).
+# Any other name groups by the frame column of that name.
+GROUPINGS = {
+    'month': _month,
+    'hashtag': _hashtag,
+}
+
+
+def group_keys(frame, by=None, hashtags=None):
+    """Row positions and their group keys; a post appears once per group it belongs to"""
+    if by is None:
+        return np.arange(len(frame)), pd.Series(ALL_POSTS, index=frame.index)
+    if by in GROUPINGS:
+        return GROUPINGS[by](frame, hashtags)
+    return np.arange(len(frame)), frame[by]
+
+
+def top_k(frame, metric='engagement', k=5, by=None, hashtags=None, bottom=False):
+    """The k highest (or lowest) posts by metric, per group when by is given.
+
+    Returns the frame's rows with 'group' and 'rank' columns, ordered by group
+    and rank; ties keep frame order, like DataFrame.nlargest.
+    """
+    values = frame[metric]
+    if by is None:
+        best = values.nsmallest(k) if bottom else values.nlargest(k)
+        result = frame.loc[best.index]
+        return result.assign(group=ALL_POSTS, rank=np.arange(1, len(result) + 1))
+
+    positions, keys = group_keys(frame, by, hashtags)
+    candidates = pd.DataFrame({
+        'position': positions,
+        'group': np.asarray(keys, dtype=object),
+        'value': values.to_numpy()[positions],
+    }).dropna(subset=['group', 'value'])
+    candidates = candidates.sort_values('value', ascending=bottom, kind='stable')
+    candidates = candidates.groupby('group', sort=False).head(k)
+    candidates['rank'] = candidates.groupby('group', sort=False).cumcount() + 1
+    candidates = candidates.sort_values(['group', 'rank'], kind='stable')
+    result = frame.iloc[candidates['position'].to_numpy()]
+    return result.assign(group=candidates['group'].to_numpy(), rank=candidates['rank'].to_numpy())
+
+
+def percentiles(values, quantiles=DEFAULT_PERCENTILES):
+    """{'p50': ..., 'p90': ...} of a numeric column"""
+    values = pd.Series(values, dtype=float).dropna()
+    if not len(values):
+        return {f"p{quantile * 100:g}": None for quantile in quantiles}
+    return {f"p{quantile * 100:g}": round(float(value), 2)
+            for quantile, value in zip(quantiles, values.quantile(quantiles))}
+
+
+def score_posts(frame, metric='engagement', factor=OUTLIER_FACTOR):
+    """Percentile rank (0-100) and outlier flag ('low', 'normal', 'high') of every post"""
+    values = frame[metric].astype(float)
+    q1, q3 = values.quantile([0.25, 0.75])
+    spread = factor * (q3 - q1)
+    outlier = np.select([values < q1 - spread, values > q3 + spread], ['low', 'high'], default='normal')
+    return pd.DataFrame({
+        'percentile': (values.rank(pct=True) * 100).round(1),
+        'outlier': pd.Categorical(outlier, categories=['low', 'normal', 'high']),
+    }, index=frame.index)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch for non-negative values (log-spaced buckets).
+
+    Quantile estimates are within relative_accuracy of the exact value, and
+    the number of buckets grows with the log of the value range rather than
+    with the number of values, so accounts or shards can be sketched
+    separately and merged.
+    """
+
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _grow(self, low, high):
+        """Make room for bucket keys low..high"""
+        if not len(self.counts):
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_low = min(low, self.offset)
+        new_high = max(high, self.offset + len(self.counts) - 1)
+        if new_low == self.offset and new_high - new_low + 1 == len(self.counts):
+            return
+        counts = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        counts[self.offset - new_low:self.offset - new_low + len(self.counts)] = self.counts
+        self.counts = counts
+        self.offset = new_low
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        if values.min() < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zeros += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+            self._grow(int(keys.min()), int(keys.max()))
+            self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+        return self
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged")
+        if len(other.counts):
+            self._grow(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = int(q * (self.count - 1))
+        if rank < self.zeros:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank - self.zeros, side='right'))
+        estimate = 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+        return min(max(estimate, self.min), self.max)
+
+
+class PostRanker:
+    """Streaming top-K, bottom-K and quantiles over batches of posts.
+
+    Only the current K candidates and one quantile sketch per group are kept,
+    plus up to FLUSH_ROWS buffered rows, so ranking every competitor post
+    costs memory per group, not per post. Call flush() before reading
+    top, bottom or percentiles().
+    """
+
+    def __init__(self, metric='engagement', k=10, by=None, quantiles=DEFAULT_PERCENTILES,
+                 relative_accuracy=SKETCH_ACCURACY):
+        self.metric = metric
+        self.k = k
+        self.by = by
+        self.quantiles = quantiles
+        self.relative_accuracy = relative_accuracy
+        self.top = None
+        self.bottom = None
+        self.sketches = {}
+        self.posts = 0
+        self.pending = []
+        self.pending_rows = 0
+
+    def update(self, frame, hashtags=None):
+        """Add one batch (a ranking_frame() frame and, for by='hashtag', its hashtag pairs)"""
+        self.posts += len(frame)
+        positions, keys = group_keys(frame, self.by, hashtags)
+        batch = frame.iloc[positions].assign(group=np.asarray(keys, dtype=object))
+        batch = batch[batch['group'].notna()]
+        self.pending.append(batch)
+        self.pending_rows += len(batch)
+        if self.pending_rows >= FLUSH_ROWS:
+            self.flush()
+        return self
+
+    def flush(self):
+        """Merge the buffered batches into the candidates and sketches"""
+        if not self.pending:
+            return self
+        batch = pd.concat(self.pending)
+        self.pending = []
+        self.pending_rows = 0
+        if not len(batch):
+            return self
+        # Earlier candidates come first, so ties keep the first post seen
+        self.top = top_k(pd.concat([self.top, batch]) if self.top is not None else batch,
+                         self.metric, self.k, by='group')
+        self.bottom = top_k(pd.concat([self.bottom, batch]) if self.bottom is not None else batch,
+                            self.metric, self.k, by='group', bottom=True)
+        values = batch[self.metric].to_numpy()
+        for group, rows in batch.groupby('group', sort=False).indices.items():
+            if group not in self.sketches:
+                self.sketches[group] = QuantileSketch(self.relative_accuracy)
+            self.sketches[group].update(values[rows])
+        return self
+
+    def percentiles(self):
+        """Approximate metric percentiles per group, largest groups first"""
+        rows = {
+            group: {'posts': sketch.count,
+                    **{f"p{q * 100:g}": round(sketch.quantile(q), 2) for q in self.quantiles}}
+            for group, sketch in self.sketches.items()
+        }
+        table = pd.DataFrame.from_dict(rows, orient='index')
+        table.index.name = 'group'
+        return table.sort_values('posts', ascending=False, kind='stable') if len(table) else table
+
+
+def rank_files(json_files, metric='engagement', k=10, by=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream every post of the given dumps through one PostRanker"""
+    ranker = PostRanker(metric, k, by)
+    for json_file in json_files:
+        for batch in iter_batches(iter_posts(json_file), batch_size):
+            ranker.update(*ranking_frame(batch, with_hashtags=by == 'hashtag'))
+    return ranker.flush()
+
+
+def print_ranking(title, ranked, metric):
+    print(f"\n{title}")
+    for group, rows in ranked.groupby('group', sort=False):
+        if group != ALL_POSTS:
+            print(f"  {group}")
+        for row in rows.itertuples(index=False):
+            date = row.timestamp.strftime('%Y-%m-%d') if pd.notna(row.timestamp) else 'N/A'
+            print(f"    {row.rank}. @{row.ownerUsername} {getattr(row, metric):,} {metric} ({date}) {row.url or ''}")
+
+
+def main():
+    """Rank posts across one or many account dumps"""
+    import glob
+    args = sys.argv[1:]
+    options = {}
+    for flag in ['--metric', '--top', '--by', '--output']:
+        if flag in args:
+            idx = args.index(flag)
+            options[flag] = args[idx + 1]
+            del args[idx:idx + 2]
+    if not args:
+        print("Usage: python post_ranking.py <json_file|glob> [more files...] [--metric engagement]")
+        print("       [--top 10] [--by type|month|hashtag|ownerUsername] [--output percentiles.csv]")
+        sys.exit(1)
+
+    json_files = [path for pattern in args for path in (sorted(glob.glob(pattern)) or [pattern])]
+    metric = options.get('--metric', 'engagement')
+    ranker = rank_files(json_files, metric, int(options.get('--top', 10)), options.get('--by'))
+    if not ranker.posts:
+        print("No posts found")
+        sys.exit(1)
+
+    print(f"📊 Ranked {ranker.posts:,} posts from {len(json_files)} file(s) by {metric}")
+    print_ranking(f"🏆 Top {ranker.k}", ranker.top, metric)
+    print_ranking(f"📉 Bottom {ranker.k}", ranker.bottom, metric)
+    table = ranker.percentiles()
+    print(f"\n📈 Percentiles (±{SKETCH_ACCURACY:.0%})")
+    print(table.head(20).to_string())
+    if '--output' in options:
+        table.to_csv(options['--output'], encoding='utf-8')
+        print(f"\n💾 Percentiles saved to {options['--output']}")
+
+
+if __name__ == "__main__":
+    main()
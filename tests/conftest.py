@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from generate_instagram_data import generate_posts
+
+
+@pytest.fixture
+def dump_file(tmp_path):
+    """Write posts to a JSON array dump and return its path"""
+    def write(posts, name='dump.json'):
+        path = tmp_path / name
+        path.write_text(json.dumps(list(posts), ensure_ascii=False), encoding='utf-8')
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def sample_posts():
+    """Small deterministic set of scraper-shaped posts"""
+    return list(generate_posts(12, hashtags_per_post=3, comments_per_post=2, carousel_depth=2))
@@ -0,0 +1,119 @@
+import copy
+import re
+import sqlite3
+
+import pytest
+
+from analysis_state import AnalysisState
+from analyze_instagram import InstagramAnalyzer
+from instagram_io import iter_posts
+from instagram_report import render_report
+
+ACCOUNT = 'synthetic_account'
+
+
+def comment(comment_id, text, owner='alice'):
+    return {'id': comment_id, 'text': text, 'ownerUsername': owner, 'timestamp': '2023-06-01T10:00:00.000Z',
+            'replies': [], 'likesCount': 0}
+
+
+@pytest.fixture
+def scrapes(sample_posts):
+    """A first scrape and a later one where some posts gained likes or comments or lost them"""
+    first = copy.deepcopy(sample_posts)
+    first[0]['latestComments'] = [comment('q1', 'Есть в аптеках Самарканда?'), comment('c1', 'Товар с браком', 'bob')]
+    first[0]['commentsCount'] = 2
+    second = copy.deepcopy(first)
+    second[0]['latestComments'] = [comment('c1', 'Товар с браком', 'bob')]
+    second[0]['commentsCount'] = 1
+    second[1]['likesCount'] += 100
+    second[2]['latestComments'].append(comment('q2', 'Есть упаковка побольше?'))
+    second[2]['commentsCount'] += 1
+    return first, second
+
+
+def merge(db_file, *dumps):
+    state = AnalysisState(db_file, ACCOUNT)
+    counts = [state.merge(iter_posts(dump)) for dump in dumps]
+    sections = state.sections()
+    state.close()
+    return counts, sections
+
+
+def report(sections):
+    text = ''.join(render_report(sections, ACCOUNT, 'Synthetic'))
+    # Stored state keeps no per-comment timings, and changed posts move to the end of
+    # the sample questions and of equally active commenters
+    text = re.sub(r'### Response Times.*?\n\n', '', text, flags=re.S)
+    text = re.sub(r'(### Sample Questions from Audience\n)(\d+\. .*\n)*', r'\1', text)
+    return re.sub(r'^1\. @.*\n', '', text, flags=re.M)
+
+
+def test_merge_counts_new_changed_and_unchanged(tmp_path, dump_file, scrapes):
+    first, second = scrapes
+    counts, _ = merge(str(tmp_path / 'state.db'), dump_file(first, 'first.json'), dump_file(second, 'second.json'))
+    assert counts == [
+        {'new': 12, 'changed': 0, 'unchanged': 0},
+        {'new': 0, 'changed': 3, 'unchanged': 9},
+    ]
+
+
+def test_state_report_matches_full_recompute(tmp_path, dump_file, scrapes):
+    first, second = scrapes
+    second_file = dump_file(second, 'second.json')
+    _, sections = merge(str(tmp_path / 'state.db'), dump_file(first, 'first.json'), second_file)
+    live = InstagramAnalyzer(second_file).compute_sections()
+
+    assert report(sections) == report(live)
+    assert sections['comments']['sample_complaints'] == ['Товар с браком']
+    assert ([count for _, count in sections['comments']['top_commenters']]
+            == [count for _, count in live['comments']['top_commenters']])
+    assert sections['patterns']['weekly_trend'].equals(live['patterns']['weekly_trend'])
+
+
+def test_changed_post_replaces_its_stored_questions(tmp_path, dump_file, scrapes):
+    first, second = scrapes
+    db_file = str(tmp_path / 'state.db')
+    _, before = merge(db_file, dump_file(first, 'first.json'))
+    _, after = merge(db_file, dump_file(second, 'second.json'))
+    assert 'Есть в аптеках Самарканда?' in before['comments']['sample_questions']
+    assert 'Есть в аптеках Самарканда?' not in after['comments']['sample_questions']
+    assert after['comments']['total_questions'] == before['comments']['total_questions']
+
+
+def test_top_posts_numbered_by_rank(tmp_path, dump_file, sample_posts):
+    dump = dump_file(sample_posts)
+    _, sections = merge(str(tmp_path / 'state.db'), dump)
+    for text in (report(sections), report(InstagramAnalyzer(dump).compute_sections())):
+        ranks = re.findall(r'^(\d+)\. \*\*\d+ interactions', text, flags=re.M)
+        assert ranks == ['1', '2', '3', '4', '5']
+
+
+def test_unchanged_posts_are_not_analyzed(tmp_path, dump_file, sample_posts, monkeypatch):
+    dump = dump_file(sample_posts)
+    db_file = str(tmp_path / 'state.db')
+    merge(db_file, dump)
+    analyzed = []
+    original = InstagramAnalyzer.__init__
+
+    def spy(self, *args, posts=None, **kwargs):
+        analyzed.append(len(posts))
+        original(self, *args, posts=posts, **kwargs)
+
+    monkeypatch.setattr(InstagramAnalyzer, '__init__', spy)
+    changed = copy.deepcopy(sample_posts)
+    changed[5]['likesCount'] += 1
+    # Fields that do not feed the aggregates do not count as changes
+    changed[6]['displayUrl'] = 'https://cdn.example/other.jpg'
+    counts, _ = merge(db_file, dump_file(changed, 'changed.json'))
+    assert counts == [{'new': 0, 'changed': 1, 'unchanged': 11}]
+    assert analyzed == [1]
+
+
+def test_older_state_file_is_rejected(tmp_path):
+    db_file = str(tmp_path / 'state.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE state_posts (account TEXT, post_id TEXT)')
+    conn.close()
+    with pytest.raises(ValueError, match='older version'):
+        AnalysisState(db_file, ACCOUNT)
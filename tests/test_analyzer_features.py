@@ -0,0 +1,47 @@
+import pytest
+
+from analyze_instagram import FEATURES, SECTIONS, InstagramAnalyzer
+
+
+@pytest.fixture
+def analyzer(dump_file, sample_posts):
+    return InstagramAnalyzer(dump_file(sample_posts))
+
+
+@pytest.fixture
+def feature_calls(monkeypatch):
+    """Count how often each feature function runs"""
+    calls = {}
+    for column, (requires, compute, stage, columns) in list(FEATURES.items()):
+        def counted(df, compute=compute, stage=stage):
+            calls[stage] = calls.get(stage, 0) + 1
+            return compute(df)
+        monkeypatch.setitem(FEATURES, column, (requires, counted, stage, columns))
+    return calls
+
+
+def test_features_are_computed_once(analyzer, feature_calls):
+    analyzer.compute_sections()
+    analyzer.compute_sections()
+    analyzer.ensure_features('engagement', 'hour', 'language')
+    assert feature_calls and set(feature_calls.values()) == {1}
+
+
+def test_dependencies_are_resolved_first(analyzer, feature_calls):
+    df = analyzer.ensure_features('hour')
+    assert set(feature_calls) == {'timestamp', 'hour'}
+    assert 'timestamp' in analyzer.computed_features
+    assert df['hour'].tolist() == df['timestamp'].dt.hour.tolist()
+
+
+@pytest.mark.parametrize('key', list(SECTIONS))
+def test_each_section_runs_on_a_fresh_analyzer(dump_file, sample_posts, key):
+    # No section relies on another one having run first
+    expected = InstagramAnalyzer(dump_file(sample_posts)).compute_sections()[key]
+    fresh = InstagramAnalyzer(dump_file(sample_posts, 'again.json'))
+    assert getattr(fresh, SECTIONS[key][0])().keys() == expected.keys()
+
+
+def test_engagement_feature(analyzer):
+    df = analyzer.ensure_features('engagement')
+    assert (df['engagement'] == df['likesCount'] + df['commentsCount']).all()
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import analyze_instagram
+from analyze_instagram import POST_COLUMNS, InstagramAnalyzer
+
+
+@pytest.fixture
+def posts(sample_posts):
+    posts = [dict(post) for post in sample_posts]
+    # A post with a hidden like count keeps the column nullable
+    posts[3]['likesCount'] = None
+    return posts
+
+
+def test_frame_keeps_only_typed_analysis_columns(dump_file, posts):
+    df = InstagramAnalyzer(dump_file(posts)).df
+    assert list(df.columns) == POST_COLUMNS
+    assert isinstance(df['type'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['ownerUsername'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['caption'].dtype, pd.StringDtype)
+    assert str(df['commentsCount'].dtype) == 'int32'
+    assert str(df['likesCount'].dtype) == 'Int32'
+    assert pd.isna(df['likesCount'].iloc[3])
+    assert str(df['timestamp'].dt.tz) == 'UTC'
+    assert df['childPostsCount'].tolist() == [len(post.get('childPosts') or []) for post in posts]
+
+
+def test_categories_survive_batches(dump_file, posts):
+    df = InstagramAnalyzer(dump_file(posts), batch_size=5).df
+    assert isinstance(df['type'].dtype, pd.CategoricalDtype)
+    assert df['type'].astype(object).tolist() == [post['type'] for post in posts]
+
+
+def test_side_tables_are_built_on_first_use(dump_file, posts):
+    analyzer = InstagramAnalyzer(dump_file(posts), batch_size=5)
+    assert analyzer._side_tables == {}
+    comments = analyzer.comments
+    assert set(analyzer._side_tables) == {'comments'}
+    assert analyzer.comments is comments
+
+    expected = [(row, comment.get('text')) for row, post in enumerate(posts)
+                for comment in post.get('latestComments') or []]
+    assert list(zip(comments['post'].tolist(), comments['text'].tolist())) == expected
+    tags = [(row, tag) for row, post in enumerate(posts) for tag in post.get('hashtags') or []]
+    hashtags = analyzer.hashtags
+    assert list(zip(hashtags['post'].tolist(), hashtags['hashtag'].astype(object).tolist())) == tags
+
+
+def test_large_side_tables_are_compacted_while_streaming(dump_file, posts, monkeypatch):
+    monkeypatch.setattr(analyze_instagram, 'SIDE_TABLE_CHUNK_ROWS', 4)
+    analyzer = InstagramAnalyzer(dump_file(posts), batch_size=3)
+    pending = analyzer._nested['hashtags']
+    assert pending.chunks and len(pending.columns['post']) < 4
+    assert analyzer.hashtags['post'].tolist() == [row for row, post in enumerate(posts)
+                                                  for _ in post.get('hashtags') or []]
+
+
+def test_frame_is_smaller_than_the_raw_frame(dump_file, posts):
+    raw = pd.DataFrame(posts).memory_usage(deep=True).sum()
+    assert InstagramAnalyzer(dump_file(posts)).df.memory_usage(deep=True).sum() < raw / 2
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import instagram_io
+from instagram_io import iter_posts, load_archive_index, load_zstd, read_archived_post, read_archived_posts
+from instagram_tables import iter_normalized
+from instagram_writers import RawArchiveWriter
+
+
+def write_archive(path, posts, **options):
+    writer = RawArchiveWriter(str(path), **options)
+    writer.quiet = True
+    for batch in iter_normalized(posts, batch_size=4):
+        writer.write(batch)
+    writer.close()
+    return str(path)
+
+
+def zstd_available():
+    try:
+        load_zstd()
+    except ImportError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize('compression, suffix', [
+    ('gzip', '.jsonl.gz'),
+    pytest.param('zstd', '.jsonl.zst', marks=pytest.mark.skipif(not zstd_available(), reason='no zstd')),
+])
+def test_archive_reads_back_as_json_lines(tmp_path, sample_posts, compression, suffix):
+    archive = write_archive(tmp_path / f'raw{suffix}', sample_posts, compression=compression, block_size=5)
+    assert list(iter_posts(archive)) == sample_posts
+    index = load_archive_index(archive)
+    assert index['posts'] == len(sample_posts)
+    assert [len(block['ids']) for block in index['blocks']] == [5, 5, 2]
+
+
+def test_gzip_archive_is_a_plain_gzip_stream(tmp_path, sample_posts):
+    archive = write_archive(tmp_path / 'raw.jsonl.gz', sample_posts, block_size=5)
+    with gzip.open(archive, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == sample_posts
+
+
+def test_posts_are_read_by_id_from_their_block_only(tmp_path, sample_posts, monkeypatch):
+    archive = write_archive(tmp_path / 'raw.jsonl.gz', sample_posts, block_size=5)
+    decompressed = []
+    original = instagram_io.decompress_block
+
+    def counting(data, compression):
+        decompressed.append(len(data))
+        return original(data, compression)
+
+    monkeypatch.setattr(instagram_io, 'decompress_block', counting)
+    post = sample_posts[7]
+    assert read_archived_post(archive, post['id']) == post
+    assert len(decompressed) == 1
+    assert read_archived_post(archive, 'missing') is None
+
+    first, last = sample_posts[0], sample_posts[11]
+    assert read_archived_posts(archive, [first['id'], last['id']]) == {first['id']: first, last['id']: last}
+
+
+def test_archive_is_smaller_than_pretty_json(tmp_path, sample_posts):
+    archive = write_archive(tmp_path / 'raw.jsonl.gz', sample_posts * 10)
+    pretty = len(json.dumps(sample_posts * 10, ensure_ascii=False, indent=2).encode('utf-8'))
+    assert os.path.getsize(archive) < pretty / 4
+
+
+def test_abort_removes_partial_archive(tmp_path, sample_posts):
+    writer = RawArchiveWriter(str(tmp_path / 'raw.jsonl.gz'), block_size=5)
+    for batch in iter_normalized(sample_posts, batch_size=4):
+        writer.write(batch)
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        RawArchiveWriter(str(tmp_path / 'raw.jsonl.xz'), compression='xz')
@@ -0,0 +1,66 @@
+import re
+
+import pandas as pd
+import pytest
+
+import analyze_instagram
+from analyze_instagram import caption_stats, text_dtype
+from generate_instagram_data import generate_posts
+
+CAPTIONS = [
+    'Привет, мамы! 😍 #nutrilak @nutrilak_uz',
+    'Bolangiz bilan qayerga dam olishga borasiz? Oʻgʻil va qiz 🌞☀️',
+    'abc где',
+    '',
+    None,
+    '#один #two @три',
+]
+
+
+def detect_language(text):
+    """The per-caption regex version the vectorized stage replaced"""
+    if not text:
+        return 'unknown'
+    cyrillic = len(re.findall(r'[а-яА-ЯёЁ]', text))
+    latin = len(re.findall(r'[a-zA-Z]', text))
+    if cyrillic > latin:
+        return 'russian/uzbek_cyrillic'
+    elif latin > cyrillic:
+        return 'uzbek_latin/english'
+    return 'mixed'
+
+
+def captions(values):
+    return pd.Series(pd.array(values, dtype=text_dtype()))
+
+
+def test_caption_stats_counts():
+    stats = caption_stats(captions(CAPTIONS))
+    first = stats.iloc[0]
+    assert first['caption_length'] == len(CAPTIONS[0])
+    assert first['cyrillic_chars'] == len(re.findall(r'[а-яА-ЯёЁ]', CAPTIONS[0]))
+    assert first['latin_chars'] == len(re.findall(r'[a-zA-Z]', CAPTIONS[0]))
+    assert (first['emoji_count'], first['hashtag_count'], first['mention_count']) == (1, 1, 1)
+    assert stats['emoji_count'].iloc[1] == 2
+    assert stats['uzbek_latin_letters'].iloc[1] == 2
+    assert stats['hashtag_count'].iloc[5] == 2 and stats['mention_count'].iloc[5] == 0
+
+
+def test_language_matches_the_regex_version():
+    texts = CAPTIONS + [post['caption'] for post in generate_posts(200, seed=11)]
+    assert caption_stats(captions(texts))['language'].tolist() == [detect_language(text) for text in texts]
+
+
+def test_language_rules_run_before_the_script_comparison(monkeypatch):
+    monkeypatch.setattr(analyze_instagram, 'LANGUAGE_RULES',
+                        [('uzbek_latin', lambda stats: stats['uzbek_latin_letters'] >= 2)])
+    languages = caption_stats(captions(CAPTIONS))['language'].tolist()
+    assert languages[1] == 'uzbek_latin'
+    assert languages[:1] + languages[2:] == [detect_language(text) for text in CAPTIONS[:1] + CAPTIONS[2:]]
+
+
+@pytest.mark.parametrize('column', ['caption_length', 'language', 'emoji_count'])
+def test_caption_features_fill_every_column_in_one_stage(dump_file, sample_posts, column):
+    analyzer = analyze_instagram.InstagramAnalyzer(dump_file(sample_posts))
+    df = analyzer.ensure_features(column)
+    assert set(analyze_instagram.CAPTION_STAT_COLUMNS) <= set(df.columns)
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from comment_analytics import classify_comments
+
+CASES = [
+    ('Где купить?', True, False),
+    ('Qayerdan olsa boʻladi', True, False),
+    ('@mama подскажите размер', True, False),
+    ('Super 😍', False, False),
+    ('Товар с браком', False, True),
+    ('у малыша сыпь после смеси', False, True),
+    ('сыпь прошла, спасибо', False, False),
+    ('Rahmat, toshma yoʻq', False, False),
+    ('Спасибо! Было бракосочетание', False, False),
+]
+
+
+@pytest.mark.parametrize('text, is_question, is_complaint', CASES)
+def test_classify_comments(text, is_question, is_complaint):
+    comments = classify_comments(pd.DataFrame({'text': [text]}))
+    assert comments['is_question'].tolist() == [is_question]
+    assert comments['is_complaint'].tolist() == [is_complaint]
+
+
+def test_classify_comments_missing_text():
+    comments = classify_comments(pd.DataFrame({'text': [None]}))
+    assert not comments['is_question'].any()
+    assert not comments['is_complaint'].any()
@@ -0,0 +1,83 @@
+import random
+
+from competitor_cache import DuplicateIndex, ExtractionCache, result_key, text_fingerprint
+from generate_instagram_data import CAPTION_WORDS
+
+
+def page_text(seed, words=600):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(CAPTION_WORDS) for _ in range(words))
+
+
+def test_text_fingerprint():
+    assert text_fingerprint('short') is None
+    text = page_text(1)
+    assert text_fingerprint(text) == text_fingerprint(text.upper())
+    edited = text_fingerprint(text.replace(' ', ' малыш ', 1))
+    assert (edited ^ text_fingerprint(text)).bit_count() <= 3
+    assert (text_fingerprint(page_text(2)) ^ text_fingerprint(text)).bit_count() > 3
+
+
+def test_duplicate_index():
+    index = DuplicateIndex(max_bits=3)
+    base = 0x0123456789abcdef
+    assert index.find_or_add(base, 'first') is None
+    assert index.find_or_add(base ^ 0b111, 'near') == 'first'
+    assert index.find_or_add(base ^ 0b1111, 'far') is None
+    assert index.find_or_add(None, 'empty') is None
+    assert index.find_or_add(None, 'empty again') is None
+
+
+def extract_all(results):
+    return [{'url': result['url'], 'length': len(result['text'])} for result in results]
+
+
+def test_extraction_cache_reuses_entries(tmp_path):
+    results = [{'url': f'https://example.com/{i}', 'text': f'page {i}'} for i in range(10)]
+    db_file = str(tmp_path / 'cache.db')
+    cache = ExtractionCache(db_file, 'v1', batch_size=4)
+    first = list(cache.iter_extracted(results, extract_all))
+    cache.close()
+
+    calls = []
+    cache = ExtractionCache(db_file, 'v1', batch_size=4)
+    second = list(cache.iter_extracted(results, lambda batch: calls.append(batch) or extract_all(batch)))
+    assert second == first
+    assert calls == []
+    assert (cache.hits, cache.misses) == (10, 0)
+    cache.close()
+
+    cache = ExtractionCache(db_file, 'v2', batch_size=4)
+    list(cache.iter_extracted(results, extract_all))
+    assert (cache.hits, cache.misses) == (0, 10)
+    # Entries of the old version are replaced, not counted twice
+    assert cache.size == cache.conn.execute('SELECT SUM(size) FROM extractions').fetchone()[0]
+    assert cache.conn.execute('SELECT COUNT(*) FROM extractions').fetchone()[0] == 10
+    cache.close()
+
+
+def test_extraction_cache_eviction_keeps_current_batch(tmp_path):
+    results = [{'url': f'https://example.com/{i}', 'text': f'page {i}'} for i in range(12)]
+    cache = ExtractionCache(str(tmp_path / 'cache.db'), 'v1', max_bytes=100, batch_size=4)
+    list(cache.iter_extracted(results, extract_all))
+    kept = {row[0] for row in cache.conn.execute('SELECT url FROM extractions')}
+    assert {result['url'] for result in results[-4:]} <= kept
+    assert cache.size == cache.conn.execute('SELECT SUM(size) FROM extractions').fetchone()[0]
+    cache.close()
+
+
+def test_result_key_depends_on_text():
+    assert result_key({'url': 'u', 'text': 'a'}) != result_key({'url': 'u', 'text': 'b'})
+    assert result_key({'url': 'u'}) == result_key({'url': 'u', 'text': ''})
+
+
+def test_near_duplicate_pages_are_left_out_of_aggregates():
+    from analyze_competitors import process_search_results
+    text = 'Nutrilak instagram: @nutrilak_uz, Подписчики: 45K. ' + page_text(3)
+    results = [
+        {'url': 'https://example.com/a', 'title': 'A', 'text': text},
+        {'url': 'https://example.com/b', 'title': 'B', 'text': text.replace(' ', ' малыш ', 1)},
+    ]
+    report = process_search_results(results, 'Nutrilak')
+    assert 'Повторяет источник 1' in report
+    assert '**Дубликаты:** 1' in report
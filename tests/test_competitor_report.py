@@ -0,0 +1,73 @@
+import os
+import random
+
+from analyze_competitors import ReportPartWriter, iter_report_sections, process_search_results, save_report_sections
+from competitor_cache import ExtractionCache
+from generate_instagram_data import CAPTION_WORDS
+
+
+def crawl_results(count=8):
+    rng = random.Random(5)
+    return [
+        {'url': f'https://example.com/{i}',
+         'text': f'Бренд {i}: @brand_{i}, {10 + i}K подписчиков, ' + ' '.join(rng.choice(CAPTION_WORDS) for _ in range(80))}
+        for i in range(count)
+    ]
+
+
+def test_parallel_extraction_keeps_the_serial_order():
+    results = crawl_results()
+    serial = list(iter_report_sections(results, 'Nutrilak'))
+    assert list(iter_report_sections(results, 'Nutrilak', workers=2)) == serial
+    assert process_search_results(results, 'Nutrilak') == ''.join(serial)
+
+
+def test_sections_are_yielded_before_the_results_run_out():
+    consumed = []
+
+    def results():
+        for result in crawl_results(3):
+            consumed.append(result['url'])
+            yield result
+
+    sections = iter_report_sections(results(), 'Nutrilak')
+    next(sections)
+    first_source = next(sections)
+    assert 'https://example.com/0' in first_source
+    assert len(consumed) < 3
+
+
+def test_parts_roll_over_at_section_boundaries(tmp_path):
+    sections = list(iter_report_sections(crawl_results(), 'Nutrilak'))
+    base = str(tmp_path / 'report')
+    files = save_report_sections(sections, base, max_part_size=1000)
+    assert len(files) > 1
+    assert files == [f"{base}_part{n}.md" for n in range(1, len(files) + 1)]
+
+    parts = [open(path, encoding='utf-8').read() for path in files]
+    assert ''.join(parts) == ''.join(sections)
+    # Every part starts with a whole section and stays under the limit plus one section
+    longest = max(len(section) for section in sections)
+    for part in parts:
+        assert any(part.startswith(section) for section in sections)
+        assert len(part) < 1000 + longest
+
+
+def test_single_part_is_saved_without_suffix(tmp_path):
+    base = str(tmp_path / 'report')
+    writer = ReportPartWriter(base, max_part_size=0)
+    writer.write('# one\n')
+    writer.write('## two\n')
+    assert writer.close() == [f"{base}.md"]
+    assert os.listdir(tmp_path) == ['report.md']
+
+
+def test_parallel_extraction_with_cache(tmp_path):
+    results = crawl_results()
+    cache = ExtractionCache(str(tmp_path / 'cache.db'), 'test')
+    try:
+        first = list(iter_report_sections(results, 'Nutrilak', workers=2, cache=cache))
+        second = list(iter_report_sections(results, 'Nutrilak', workers=2, cache=cache))
+    finally:
+        cache.close()
+    assert first == second == list(iter_report_sections(results, 'Nutrilak'))
@@ -0,0 +1,74 @@
+import json
+import sys
+
+import pytest
+
+import analyze_competitors
+from analyze_competitors import (DEFAULT_SCANNER, analyze_content_strategy, extract_instagram_handle,
+                                 extract_key_metrics, extract_telegram_handle, metrics_from_scan,
+                                 parse_follower_count, strategy_from_scan)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('45K', 45000),
+    ('1.2М', 1200000),
+    ('1,2 млн', 1200000),
+    ('1.5 тыс', 1500),
+    ('120 тысяч', 120000),
+    ('2 тысячи', 2000),
+    ('1,5 миллиона', 1500000),
+    ('3 миллионов', 3000000),
+    ('12 345', 12345),
+    ('1,234', 1234),
+    ('', 0),
+    ('abc', 0),
+])
+def test_parse_follower_count(text, expected):
+    assert parse_follower_count(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Подписчики: 45K, публикаций 1 234, ER 3,5%',
+     {'followers': 45000.0, 'posts': 1234.0, 'likes': None, 'engagement_rate': 3.5}),
+    ('публикаций 1 234', {'followers': None, 'posts': 1234.0, 'likes': None, 'engagement_rate': None}),
+    ('у аккаунта 120 тысяч подписчиков',
+     {'followers': 120000.0, 'posts': None, 'likes': None, 'engagement_rate': None}),
+    ('1,5 миллиона подписчиков', {'followers': 1500000.0, 'posts': None, 'likes': None, 'engagement_rate': None}),
+    ('12.5K followers and 340 posts, engagement rate: 4.2%',
+     {'followers': 12500.0, 'posts': 340.0, 'likes': None, 'engagement_rate': 4.2}),
+    ('лайков: 1,2 млн', {'followers': None, 'posts': None, 'likes': 1200000.0, 'engagement_rate': None}),
+    ('2024 год, 15 минут', {'followers': None, 'posts': None, 'likes': None, 'engagement_rate': None}),
+])
+def test_parse_metrics(text, expected):
+    assert DEFAULT_SCANNER.parse_metrics(text) == expected
+
+
+PAGE = ('Nutrilak в Telegram t.me/nutrilak_news и в Instagram @nutrilak_uz: 45K подписчиков, '
+        'рецепты и видео с блогерами, отзывы мам')
+
+
+def test_targeted_extractors_match_full_scan():
+    scan = DEFAULT_SCANNER.scan(PAGE)
+    assert extract_instagram_handle(PAGE) == scan['instagram'] == 'nutrilak_uz'
+    assert extract_telegram_handle(PAGE) == scan['telegram'] == 'nutrilak_news'
+    assert extract_key_metrics(PAGE) == metrics_from_scan(scan)
+    assert extract_key_metrics(PAGE)['followers'] == 45000
+    assert analyze_content_strategy(PAGE) == strategy_from_scan(scan)
+
+
+def test_categories_flag_loads_custom_definitions(tmp_path, dump_file, monkeypatch):
+    categories = {
+        'content_types': {'Подкасты': 'подкаст'},
+        'key_themes': {'Сон малыша': 'сон'},
+        'ugc_mentions': {'UGC': 'отзыв'},
+    }
+    categories_file = tmp_path / 'categories.json'
+    categories_file.write_text(json.dumps(categories, ensure_ascii=False), encoding='utf-8')
+    results = dump_file([{'url': 'https://example.com/a', 'text': 'Выпуск подкаста про сон, видео и рецепты'}])
+    output_base = str(tmp_path / 'report')
+    monkeypatch.setattr(sys, 'argv', ['analyze_competitors.py', results, 'Nutrilak', output_base,
+                                      '--categories', str(categories_file)])
+    analyze_competitors.main()
+    report = (tmp_path / 'report.md').read_text(encoding='utf-8')
+    assert 'Подкасты' in report and 'Сон малыша' in report
+    assert 'Видео контент' not in report and 'Рецепты' not in report
@@ -0,0 +1,74 @@
+import os
+
+import pandas as pd
+import pytest
+
+from instagram_tables import iter_normalized
+from instagram_writers import DetailedCSVWriter
+
+
+def write_detailed(output_dir, posts, **options):
+    writer = DetailedCSVWriter(str(output_dir), **options)
+    writer.quiet = True
+    for batch in iter_normalized(posts, batch_size=5):
+        writer.write(batch)
+    writer.close()
+    return output_dir
+
+
+def read_table(output_dir, table):
+    """All shards of one table, in order, as one frame of strings"""
+    files = sorted(name for name in os.listdir(output_dir) if name.startswith(table))
+    return pd.concat([pd.read_csv(output_dir / name, dtype=str, keep_default_na=False) for name in files],
+                     ignore_index=True)
+
+
+@pytest.fixture
+def plain(tmp_path, sample_posts):
+    return write_detailed(tmp_path / 'plain', sample_posts)
+
+
+def test_tables_keep_post_relationships(plain, sample_posts):
+    assert sorted(os.listdir(plain)) == ['child_posts.csv', 'comments.csv', 'hashtags.csv', 'posts.csv']
+    posts = read_table(plain, 'posts')
+    assert posts['post_id'].tolist() == [post['id'] for post in sample_posts]
+    comments = read_table(plain, 'comments')
+    assert comments['post_id'].tolist() == [post['id'] for post in sample_posts for _ in post['latestComments']]
+    assert set(read_table(plain, 'hashtags')['post_id']) <= set(posts['post_id'])
+
+
+def test_gzip_output_matches_plain(tmp_path, plain, sample_posts):
+    compressed = write_detailed(tmp_path / 'gz', sample_posts, compression='gzip')
+    assert sorted(os.listdir(compressed)) == sorted(f"{name}.gz" for name in os.listdir(plain))
+    for table in ['posts', 'hashtags', 'comments', 'child_posts']:
+        pd.testing.assert_frame_equal(read_table(compressed, table), read_table(plain, table))
+
+
+def test_shards_have_headers_and_bounded_rows(tmp_path, plain, sample_posts):
+    sharded = write_detailed(tmp_path / 'sharded', sample_posts, shard_rows=4)
+    shards = sorted(name for name in os.listdir(sharded) if name.startswith('posts'))
+    assert shards == ['posts-00001.csv', 'posts-00002.csv', 'posts-00003.csv']
+    for name in os.listdir(sharded):
+        assert len(pd.read_csv(sharded / name, dtype=str)) <= 4
+    for table in ['posts', 'hashtags', 'comments', 'child_posts']:
+        pd.testing.assert_frame_equal(read_table(sharded, table), read_table(plain, table))
+
+
+def test_tables_without_rows(tmp_path):
+    output_dir = write_detailed(tmp_path / 'empty', [{'id': '1'}])
+    assert sorted(os.listdir(output_dir)) == ['posts.csv']
+    output_dir = write_detailed(tmp_path / 'none', [])
+    assert read_table(output_dir, 'posts').empty
+
+
+def test_abort_removes_written_files(tmp_path, sample_posts):
+    writer = DetailedCSVWriter(str(tmp_path / 'aborted'), shard_rows=4)
+    for batch in iter_normalized(sample_posts, batch_size=5):
+        writer.write(batch)
+    writer.abort()
+    assert os.listdir(tmp_path / 'aborted') == []
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DetailedCSVWriter(str(tmp_path / 'bad'), compression='xz')
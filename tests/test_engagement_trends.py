@@ -0,0 +1,64 @@
+import pandas as pd
+
+from engagement_trends import EngagementTrends, daily_sums
+
+
+def posts(rows):
+    """Frame of (account, timestamp, likes, comments) rows"""
+    return pd.DataFrame(rows, columns=['ownerUsername', 'timestamp', 'likesCount', 'commentsCount'])
+
+
+POSTS = posts([
+    ('a', '2024-01-01T10:00:00Z', 10, 0),
+    ('a', '2024-01-01T20:00:00Z', 20, 10),
+    ('a', '2024-01-03T08:00:00Z', 30, 0),
+    # no posts in the week of 2024-01-08
+    ('a', '2024-01-16T08:00:00Z', 60, 0),
+    ('b', '2024-01-02T08:00:00Z', 5, 5),
+    ('a', None, 100, 100),
+])
+
+
+def test_daily_sums_per_account_and_utc_day():
+    daily = daily_sums(POSTS)
+    assert daily.loc[('a', pd.Timestamp('2024-01-01', tz='UTC'))].tolist() == [2, 30, 10, 40]
+    assert daily['posts'].sum() == 5
+
+
+def test_weekly_rollup_includes_empty_weeks():
+    weekly = EngagementTrends.from_posts(POSTS).rollup('weekly').loc['a']
+    assert weekly['posts'].tolist() == [3, 0, 1]
+    assert weekly['avg_engagement'].iloc[0] == round(70 / 3, 2)
+    assert pd.isna(weekly['avg_engagement'].iloc[1])
+
+
+def test_week_over_week_deltas():
+    weekly = EngagementTrends.from_posts(POSTS).week_over_week().loc['a']
+    assert pd.isna(weekly['posts_delta'].iloc[0])
+    assert weekly['posts_delta'].tolist()[1:] == [-3, 1]
+    # No change percentage against a week without posts
+    assert pd.isna(weekly['posts_change_pct'].iloc[2])
+    assert weekly['posts_change_pct'].iloc[1] == -100.0
+
+
+def test_rolling_windows():
+    rolling = EngagementTrends.from_posts(POSTS).rolling(windows=[7], percentiles=[0.5]).loc['a']
+    last = rolling.iloc[-1]
+    # The 7-day window ending 2024-01-16 holds only that day's post
+    assert last['posts_7d'] == 1 and last['avg_engagement_7d'] == 60
+    # The window ending 2024-01-03 holds both earlier days
+    assert rolling['posts_7d'].iloc[1] == 3 and rolling['avg_engagement_7d'].iloc[1] == round(70 / 3, 2)
+
+
+def test_extend_matches_a_full_build():
+    full = EngagementTrends.from_posts(POSTS)
+    extended = EngagementTrends().extend(POSTS.iloc[:3]).extend(POSTS.iloc[3:])
+    pd.testing.assert_frame_equal(extended.daily, full.daily)
+    pd.testing.assert_frame_equal(extended.rollup('monthly'), full.rollup('monthly'))
+    assert extended.accounts == ['a', 'b']
+
+
+def test_empty_history():
+    trends = EngagementTrends()
+    assert trends.rollup('weekly').empty
+    assert trends.week_over_week().empty
@@ -0,0 +1,39 @@
+"""analyze_hashtags against golden output of the original iterrows implementation"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from analyze_instagram import InstagramAnalyzer
+from generate_instagram_data import generate_posts
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+# Written by the pre-vectorization analyze_hashtags for the dumps below
+GOLDEN = json.loads((Path(__file__).parent / 'golden' / 'hashtags.json').read_text(encoding='utf-8'))
+
+
+@pytest.fixture(params=sorted(GOLDEN))
+def golden_case(request, dump_file):
+    if request.param == 'synthetic':
+        path = dump_file(generate_posts(2000, hashtags_per_post=5, seed=7))
+    else:
+        path = str(REPO_DIR / request.param)
+    return InstagramAnalyzer(path), GOLDEN[request.param]
+
+
+def test_hashtags_match_golden_output(golden_case):
+    analyzer, expected = golden_case
+    result = analyzer.analyze_hashtags()
+    assert result['total_unique'] == expected['total_unique']
+    assert [list(item) for item in result['top_used']] == expected['top_used']
+    assert [list(item) for item in result['top_performing']] == expected['top_performing']
+
+
+def test_hashtag_stats_and_min_usage(golden_case):
+    analyzer, _ = golden_case
+    result = analyzer.analyze_hashtags(min_usage=3)
+    stats = result['stats']
+    assert dict(result['top_used']) == stats['count'].loc[[tag for tag, _ in result['top_used']]].to_dict()
+    assert all(stats.loc[tag, 'count'] >= 3 for tag, _ in result['top_performing'])
+    assert list(stats['avg_engagement'] * stats['count']) == pytest.approx(list(stats['total_engagement']))
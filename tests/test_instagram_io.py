@@ -0,0 +1,61 @@
+import gzip
+import json
+
+import pytest
+
+from instagram_io import iter_batches, iter_posts, peek_first_post
+
+POSTS = [{'id': str(i), 'caption': f'пост {i} ' + 'x' * i} for i in range(20)]
+
+
+def test_iter_posts_reads_json_array(tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(POSTS, ensure_ascii=False, indent=2), encoding='utf-8')
+    assert list(iter_posts(path)) == POSTS
+
+
+def test_iter_posts_reads_json_lines(tmp_path):
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(json.dumps(post, ensure_ascii=False) for post in POSTS) + '\n', encoding='utf-8')
+    assert list(iter_posts(path)) == POSTS
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64])
+def test_iter_posts_handles_posts_split_across_chunks(tmp_path, chunk_size):
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(POSTS, ensure_ascii=False), encoding='utf-8')
+    assert list(iter_posts(path, chunk_size=chunk_size)) == POSTS
+
+
+def test_iter_posts_reads_gzip(tmp_path):
+    path = tmp_path / 'dump.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(POSTS, f, ensure_ascii=False)
+    assert list(iter_posts(path)) == POSTS
+
+
+@pytest.mark.parametrize('content', ['', '  \n', '[]', '[ ]\n'])
+def test_iter_posts_empty_input(tmp_path, content):
+    path = tmp_path / 'dump.json'
+    path.write_text(content, encoding='utf-8')
+    assert list(iter_posts(path)) == []
+    assert peek_first_post(path) is None
+
+
+def test_iter_posts_rejects_unclosed_array(tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps(POSTS)[:-1], encoding='utf-8')
+    with pytest.raises(ValueError, match='not closed'):
+        list(iter_posts(path))
+
+
+def test_iter_posts_rejects_non_objects(tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_text('[{"id": "1"}, 2]', encoding='utf-8')
+    with pytest.raises(ValueError, match='Expected a post object'):
+        list(iter_posts(path))
+
+
+def test_iter_batches():
+    assert [len(batch) for batch in iter_batches(iter(range(10)), 4)] == [4, 4, 2]
+    assert list(iter_batches(iter([]), 4)) == []
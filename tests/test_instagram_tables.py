@@ -0,0 +1,40 @@
+from instagram_tables import TABLE_COLUMNS, iter_normalized, normalize_posts
+
+
+def test_normalize_posts_builds_every_table(sample_posts):
+    batch = normalize_posts(sample_posts)
+    assert len(batch) == len(sample_posts)
+    assert batch.row_count('hashtags') == sum(len(post['hashtags']) for post in sample_posts)
+    assert batch.row_count('comments') == sum(len(post['latestComments']) for post in sample_posts)
+    assert batch.row_count('child_posts') == sum(len(post.get('childPosts') or []) for post in sample_posts)
+
+    posts = batch.columns('posts')
+    assert posts['post_id'] == [post['id'] for post in sample_posts]
+    assert posts['engagement'] == [post['likesCount'] + post['commentsCount'] for post in sample_posts]
+    assert posts['is_carousel'] == [bool(post.get('childPosts')) for post in sample_posts]
+    assert batch.raw_posts is sample_posts
+
+
+def test_child_posts_keep_their_position(sample_posts):
+    batch = normalize_posts(sample_posts)
+    carousel = next(post for post in sample_posts if post.get('childPosts'))
+    rows = [row for row in batch.rows('child_posts', ['post_id', 'child_id', 'position'])
+            if row[0] == carousel['id']]
+    assert rows == [(carousel['id'], child.get('id'), position)
+                    for position, child in enumerate(carousel['childPosts'])]
+
+
+def test_iter_normalized_matches_a_single_pass(sample_posts):
+    batches = list(iter_normalized(iter(sample_posts), batch_size=5))
+    assert [len(batch) for batch in batches] == [5, 5, 2]
+    whole = normalize_posts(sample_posts)
+    for table, columns in TABLE_COLUMNS.items():
+        for column in columns:
+            assert [value for batch in batches for value in batch.tables[table][column]] == whole.tables[table][column]
+
+
+def test_posts_without_optional_fields():
+    batch = normalize_posts([{'id': '1'}])
+    assert list(batch.rows('posts', ['likes', 'engagement', 'caption_length', 'hashtag_count', 'is_carousel'])) == [
+        (None, 0, 0, 0, False)]
+    assert batch.row_count('comments') == 0
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from convert_instagram_data import InstagramDataConverter
+
+PACKAGE_FILES = ['README.md', 'data.db', 'data.parquet', 'detailed', 'metrics.csv', 'raw_data.json']
+
+
+def package_contents(package_dir):
+    contents = {}
+    for root, _, files in os.walk(package_dir):
+        for name in files:
+            if name == 'README.md':
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                contents[os.path.relpath(path, package_dir)] = f.read()
+    return contents
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_package_replaces_previous_directory(tmp_path, dump_file, sample_posts, workers, capsys):
+    converter = InstagramDataConverter(dump_file(sample_posts))
+    output_dir = tmp_path / 'package'
+    converter.create_analysis_package(output_dir, workers=workers)
+    (output_dir / 'stale.txt').write_text('left from an older run')
+    converter.create_analysis_package(output_dir, workers=workers)
+
+    assert output_dir.is_dir() and not output_dir.is_symlink()
+    assert sorted(os.listdir(output_dir)) == PACKAGE_FILES
+    # Only the package itself is left next to it: no staging or replaced copies
+    assert sorted(os.listdir(tmp_path)) == ['dump.json', 'package']
+    out = capsys.readouterr().out
+    assert out.count('✅ SQLite saved to') == 2
+    assert 'Sample queries' not in out
+
+
+def test_threaded_package_matches_sequential(tmp_path, dump_file, sample_posts):
+    converter = InstagramDataConverter(dump_file(sample_posts))
+    converter.create_analysis_package(tmp_path / 'sequential', workers=1)
+    converter.create_analysis_package(tmp_path / 'threaded', workers=4)
+    sequential = package_contents(tmp_path / 'sequential')
+    threaded = package_contents(tmp_path / 'threaded')
+    # SQLite files may differ byte for byte; compare everything else exactly
+    sequential.pop('data.db'), threaded.pop('data.db')
+    assert threaded == sequential
+
+
+def test_package_symlink_swap(tmp_path, dump_file, sample_posts):
+    converter = InstagramDataConverter(dump_file(sample_posts))
+    output_dir = tmp_path / 'package'
+    converter.create_analysis_package(output_dir, symlink=True)
+    first = os.readlink(output_dir)
+    converter.create_analysis_package(output_dir, symlink=True)
+    assert output_dir.is_symlink() and os.readlink(output_dir) != first
+    assert sorted(os.listdir(output_dir)) == PACKAGE_FILES
+    assert not (tmp_path / first).exists()
+    # Switching back to the default replaces the link with a plain directory
+    converter.create_analysis_package(output_dir)
+    assert not output_dir.is_symlink()
+    assert sorted(os.listdir(tmp_path)) == ['dump.json', 'package']
@@ -0,0 +1,97 @@
+import copy
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from convert_instagram_data import InstagramDataConverter
+from instagram_tables import normalize_posts
+from instagram_writers import ParquetDatasetWriter, ParquetWriter
+
+
+def baseline_frame(posts):
+    """data.parquet as the original pd.DataFrame(posts) export built it"""
+    df = pd.DataFrame(posts)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    df['engagement'] = df['likesCount'] + df['commentsCount']
+    df['caption_length'] = df['caption'].str.len()
+    df['hashtag_count'] = df['hashtags'].apply(len)
+    df['is_carousel'] = df['childPosts'].apply(len) > 0
+    return df
+
+
+def test_parquet_matches_dataframe_export(tmp_path, dump_file, sample_posts):
+    output_file = tmp_path / 'data.parquet'
+    InstagramDataConverter(dump_file(sample_posts)).to_parquet(str(output_file))
+    written = pd.read_parquet(output_file)
+    expected = baseline_frame(sample_posts)
+    # Same column order as the DataFrame export; fields this dump lacks are extra null columns
+    assert [column for column in written.columns if column in expected.columns] == list(expected.columns)
+    for column in ['id', 'caption', 'likesCount', 'timestamp', 'engagement', 'caption_length',
+                   'hashtag_count', 'is_carousel']:
+        assert written[column].tolist() == expected[column].tolist()
+    assert written['hashtags'].map(list).tolist() == [post['hashtags'] for post in sample_posts]
+
+
+def test_parquet_streams_batches_with_a_fixed_schema(tmp_path, sample_posts):
+    posts = copy.deepcopy(sample_posts)
+    # A field first seen in a later batch keeps its schema position
+    posts[-1]['isPinned'] = True
+    output_file = tmp_path / 'data.parquet'
+    writer = ParquetWriter(str(output_file), row_group_size=4)
+    for start in range(0, len(posts), 5):
+        writer.write(normalize_posts(posts[start:start + 5]))
+    writer.close()
+    parquet = pq.ParquetFile(output_file)
+    assert parquet.schema_arrow == writer.schema
+    assert parquet.metadata.num_row_groups == 5
+    assert parquet.read(columns=['isPinned'])['isPinned'].to_pylist()[-2:] == [None, True]
+
+
+def write_dataset(dataset_dir, posts, batch_size=100):
+    writer = ParquetDatasetWriter(str(dataset_dir))
+    for start in range(0, len(posts), batch_size):
+        writer.write(normalize_posts(posts[start:start + batch_size]))
+    writer.close()
+
+
+def test_dataset_keeps_one_copy_per_post(tmp_path, sample_posts):
+    dataset_dir = tmp_path / 'dataset'
+    write_dataset(dataset_dir, sample_posts)
+    moved = copy.deepcopy(sample_posts[0])
+    moved['timestamp'] = '2030-01-05T00:00:00.000Z'
+    updated = copy.deepcopy(sample_posts[1])
+    updated['likesCount'] = 999
+    # Adjacent copies of one post: the last one wins and keeps its own comments
+    write_dataset(dataset_dir, [moved, sample_posts[1], updated])
+
+    table = pq.read_table(dataset_dir).to_pandas()
+    assert sorted(table['post_id']) == sorted(post['id'] for post in sample_posts)
+    assert table.loc[table['post_id'] == moved['id'], 'month'].tolist() == ['2030-01']
+    row = table[table['post_id'] == updated['id']].iloc[0]
+    assert row['likes'] == 999
+    assert len(row['latest_comments']) == len(updated['latestComments'])
+    old_month = sample_posts[0]['timestamp'][:7]
+    assert not (dataset_dir / 'account=synthetic_account' / f'month={old_month}').exists()
+
+
+def test_dataset_failure_leaves_previous_files(tmp_path, sample_posts, monkeypatch):
+    dataset_dir = tmp_path / 'dataset'
+    write_dataset(dataset_dir, sample_posts)
+    before = sorted(path.relative_to(dataset_dir) for path in dataset_dir.rglob('*'))
+
+    writer = ParquetDatasetWriter(str(dataset_dir))
+    writer.write(normalize_posts(sample_posts))
+    calls = []
+    stage = ParquetDatasetWriter._stage
+
+    def failing_stage(self, *args):
+        calls.append(args)
+        if len(calls) == 3:
+            raise OSError('disk full')
+        return stage(self, *args)
+
+    monkeypatch.setattr(ParquetDatasetWriter, '_stage', failing_stage)
+    with pytest.raises(OSError):
+        writer.close()
+    assert sorted(path.relative_to(dataset_dir) for path in dataset_dir.rglob('*')) == before
@@ -0,0 +1,58 @@
+import json
+import pstats
+
+from analyze_instagram import InstagramAnalyzer
+from pipeline_profiler import DISABLED, PROFILE_ENV, PROFILE_STAGE_ENV, StageProfiler
+
+
+def test_nested_stages_accumulate(tmp_path):
+    profiler = StageProfiler(str(tmp_path / 'profile.json'))
+    with profiler.stage('load', rows=3) as stage:
+        stage.add_rows(2)
+        with profiler.stage('parse'):
+            pass
+    with profiler.stage('load', rows=1):
+        pass
+    stages = {record['stage']: record for record in profiler.report()['stages']}
+    assert stages['load']['calls'] == 2 and stages['load']['rows'] == 6
+    assert stages['load']['parent'] is None
+    assert stages['parse']['parent'] == 'load'
+    assert stages['load']['wall_s'] >= stages['parse']['wall_s'] >= 0
+
+
+def test_flags_are_consumed_and_enable_profiling(tmp_path, monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    monkeypatch.delenv(PROFILE_STAGE_ENV, raising=False)
+    args = ['dump.json', '--profile', str(tmp_path / 'p.json'), '--profile-stage', 'json_load', 'out.md']
+    profiler = StageProfiler.from_args(args, 'default.json')
+    assert args == ['dump.json', 'out.md']
+    assert profiler.enabled and profiler.cprofile_stage == 'json_load'
+    assert StageProfiler.from_args(['dump.json'], 'default.json') is DISABLED
+
+
+def test_environment_enables_profiling(monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, '1')
+    monkeypatch.delenv(PROFILE_STAGE_ENV, raising=False)
+    assert StageProfiler.from_args([], 'default.json').output_file == 'default.json'
+
+
+def test_disabled_profiler_records_nothing():
+    with DISABLED.stage('anything', rows=5) as stage:
+        stage.add_rows(1)
+    assert DISABLED.stages == {}
+    assert DISABLED.save() is None
+
+
+def test_analyzer_report_and_cprofile_dump(tmp_path, dump_file, sample_posts):
+    output_file = tmp_path / 'profile.json'
+    profiler = StageProfiler(str(output_file), cprofile_stage='json_load')
+    analyzer = InstagramAnalyzer(dump_file(sample_posts), batch_size=5, profiler=profiler)
+    analyzer.compute_sections()
+    profiler.save()
+
+    report = json.loads(output_file.read_text(encoding='utf-8'))
+    stages = {record['stage']: record for record in report['stages']}
+    assert stages['json_load']['rows'] == len(sample_posts)
+    assert stages['json_load']['calls'] == 4
+    assert {'dataframe_build', 'analyze_engagement', 'analyze_comments'} <= set(stages)
+    assert pstats.Stats(str(tmp_path / 'profile.json_load.prof')).total_calls > 0
@@ -0,0 +1,31 @@
+import copy
+
+import numpy as np
+
+from post_ranking import QuantileSketch, ranking_frame, rank_files, top_k
+
+
+def test_hidden_likes_rank_as_zero(dump_file, sample_posts):
+    posts = copy.deepcopy(sample_posts)
+    posts[0]['likesCount'] = -1
+    ranker = rank_files([dump_file(posts)], k=3, by='type')
+    assert ranker.posts == len(posts)
+    assert (ranker.bottom['likesCount'] >= 0).all()
+    assert ranker.percentiles()['posts'].sum() == len(posts)
+
+
+def test_top_k_matches_nlargest(sample_posts):
+    frame, _ = ranking_frame(sample_posts)
+    expected = frame['engagement'].nlargest(5)
+    ranked = top_k(frame, k=5)
+    assert ranked.index.tolist() == expected.index.tolist()
+    assert ranked['rank'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_quantile_sketch_accuracy_and_merge():
+    values = np.random.default_rng(0).lognormal(5, 1, 10000)
+    whole = QuantileSketch().update(values)
+    merged = QuantileSketch().update(values[:4000]).merge(QuantileSketch().update(values[4000:]))
+    exact = np.quantile(values, 0.9, method='lower')
+    assert abs(whole.quantile(0.9) - exact) <= 0.01 * exact
+    assert merged.quantile(0.9) == whole.quantile(0.9)
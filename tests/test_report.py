@@ -0,0 +1,36 @@
+import json
+
+from analyze_instagram import InstagramAnalyzer
+from generate_instagram_data import generate_posts
+from instagram_report import JSON_TABLE_ROWS, render_report
+
+
+def without_timestamp(text):
+    return [line for line in text.splitlines() if not line.startswith('*Generated')]
+
+
+def test_sections_json_is_keyed_by_post_id_and_capped(tmp_path, dump_file):
+    posts = list(generate_posts(300, hashtags_per_post=5, comments_per_post=3, seed=3))
+    analyzer = InstagramAnalyzer(dump_file(posts))
+    output_file = tmp_path / 'sections.json'
+    analyzer.save_report(str(tmp_path / 'report.md'), json_file=str(output_file))
+
+    sections = json.loads(output_file.read_text(encoding='utf-8'))['sections']
+    per_post = sections['comments']['per_post']
+    assert len(per_post) == JSON_TABLE_ROWS
+    ids = {post['id'] for post in posts}
+    assert all(row['post_id'] in ids for row in per_post)
+    counts = [row['comments'] for row in per_post]
+    assert counts == sorted(counts, reverse=True)
+    assert len(sections['comments']['commenters']) <= JSON_TABLE_ROWS
+    assert len(sections['hashtags']['stats']) == JSON_TABLE_ROWS
+    assert sections['hashtags']['total_unique'] > JSON_TABLE_ROWS
+
+
+def test_markdown_report_matches_rendered_sections(tmp_path, dump_file, sample_posts):
+    analyzer = InstagramAnalyzer(dump_file(sample_posts))
+    sections = analyzer.compute_sections()
+    report_file = tmp_path / 'report.md'
+    analyzer.save_report(str(report_file), sections=sections)
+    rendered = ''.join(render_report(sections, analyzer.account_name, analyzer.full_name))
+    assert without_timestamp(report_file.read_text(encoding='utf-8')) == without_timestamp(rendered)
@@ -0,0 +1,65 @@
+"""Cold starts of the CLI stay fast and free of heavy dependencies"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ['pandas', 'pyarrow', 'sqlite3']
+CLI_MODULES = ['main', 'convert_instagram_data', 'analyze_competitors', 'instagram_writers', 'competitor_cache']
+STARTUP_CODE = [f'import {module}' for module in CLI_MODULES] + [
+    'import main, convert_instagram_data, analyze_competitors, instagram_writers\n'
+    'try:\n'
+    '    main.main(["--help"])\n'
+    'except SystemExit:\n'
+    '    pass',
+]
+# Importing pandas alone takes several times these budgets
+IMPORT_BUDGET_SECONDS = 0.25
+HELP_BUDGET_SECONDS = 0.3
+RUNS = 3
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=REPO_DIR, capture_output=True, text=True, timeout=60)
+
+
+def best_time(*args):
+    """Best wall time of several runs, in seconds"""
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = run_python(*args)
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stderr
+    return min(timings)
+
+
+@pytest.mark.parametrize('code', STARTUP_CODE)
+def test_startup_skips_heavy_imports(code):
+    check = f"\nimport sys\nsys.stderr.write(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = run_python('-c', code + check)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ''
+
+
+def test_import_time_within_budget():
+    result = run_python('-X', 'importtime', '-c', f"import {', '.join(CLI_MODULES)}")
+    assert result.returncode == 0, result.stderr
+    # Lines look like "import time: self [us] | cumulative [us] | name"; modules pulled in
+    # by an earlier CLI module are nested under it, so only the top-level ones are summed
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit() and not fields[2].startswith('  '):
+            cumulative[fields[2].strip()] = int(fields[1])
+    assert 'main' in cumulative
+    assert sum(cumulative.get(module, 0) for module in CLI_MODULES) / 1e6 < IMPORT_BUDGET_SECONDS
+
+
+def test_help_wall_time_within_budget():
+    overhead = best_time('main.py', '--help') - best_time('-c', 'pass')
+    assert overhead < HELP_BUDGET_SECONDS
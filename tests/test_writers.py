@@ -0,0 +1,79 @@
+import copy
+import sqlite3
+
+from convert_instagram_data import InstagramDataConverter
+
+
+def table_counts(db_file, tables):
+    with sqlite3.connect(db_file) as conn:
+        return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in tables}
+
+
+def test_sqlite_rerun_is_idempotent(tmp_path, dump_file, sample_posts):
+    db_file = str(tmp_path / 'data.db')
+    converter = InstagramDataConverter(dump_file(sample_posts))
+    tables = ['posts', 'hashtags', 'comments', 'child_posts']
+    converter.to_sqlite(db_file)
+    first = table_counts(db_file, tables)
+    converter.to_sqlite(db_file)
+    converter.to_sqlite(db_file)
+    assert table_counts(db_file, tables) == first
+    assert first['posts'] == len(sample_posts)
+
+
+def test_sqlite_upsert_refreshes_counts(tmp_path, dump_file, sample_posts):
+    db_file = str(tmp_path / 'data.db')
+    InstagramDataConverter(dump_file(sample_posts)).to_sqlite(db_file)
+    updated = copy.deepcopy(sample_posts)
+    updated[0]['likesCount'] += 1000
+    InstagramDataConverter(dump_file(updated, 'updated.json')).to_sqlite(db_file)
+    with sqlite3.connect(db_file) as conn:
+        likes = conn.execute('SELECT likes FROM posts WHERE post_id = ?', (updated[0]['id'],)).fetchone()[0]
+        posts = conn.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+    assert likes == updated[0]['likesCount']
+    assert posts == len(sample_posts)
+
+
+def test_comments_without_id_get_a_stable_key(tmp_path, dump_file, sample_posts):
+    posts = copy.deepcopy(sample_posts)
+    for post in posts:
+        for comment in post['latestComments']:
+            comment.pop('id')
+    db_file = str(tmp_path / 'data.db')
+    converter = InstagramDataConverter(dump_file(posts))
+    converter.to_sqlite(db_file)
+    converter.to_sqlite(db_file)
+    expected = sum(len(post['latestComments']) for post in posts)
+    assert table_counts(db_file, ['comments']) == {'comments': expected}
+
+
+def test_warehouse_files_ownerless_posts_under_dump_account(tmp_path, dump_file, sample_posts):
+    posts = copy.deepcopy(sample_posts)
+    for post in posts[1:]:
+        post.pop('ownerUsername')
+    db_file = str(tmp_path / 'warehouse.db')
+    converter = InstagramDataConverter(dump_file(posts))
+    converter.to_warehouse(db_file)
+    with sqlite3.connect(db_file) as conn:
+        accounts = conn.execute('SELECT DISTINCT account FROM posts').fetchall()
+        summary = conn.execute('SELECT account, posts, likes, comments FROM account_summary').fetchall()
+    assert accounts == [(converter.account_name,)]
+
+    converter.to_warehouse(db_file)
+    with sqlite3.connect(db_file) as conn:
+        assert conn.execute('SELECT account, posts, likes, comments FROM account_summary').fetchall() == summary
+    assert summary[0][1] == len(posts)
+
+
+def test_warehouse_summary_counts_undated_posts(tmp_path, dump_file, sample_posts):
+    posts = copy.deepcopy(sample_posts)
+    for post in posts[:3]:
+        post.pop('timestamp')
+    db_file = str(tmp_path / 'warehouse.db')
+    InstagramDataConverter(dump_file(posts)).to_warehouse(db_file)
+    with sqlite3.connect(db_file) as conn:
+        totals = conn.execute('SELECT COUNT(*), SUM(likes), SUM(comments), SUM(engagement) FROM posts').fetchone()
+        summary = conn.execute('SELECT posts, likes, comments, engagement FROM account_summary').fetchone()
+        daily_posts = conn.execute('SELECT SUM(posts) FROM account_daily').fetchone()[0]
+    assert summary == totals
+    assert daily_posts == len(posts) - 3